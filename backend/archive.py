@@ -0,0 +1,174 @@
+"""Hot/cold archival of old messages, past events and closed jobs.
+
+The worker moves rows past their retention boundary into the month-partitioned
+`*_archive` tables (see schema.sql): copied and deleted in one transaction, at
+most ARCHIVE_BATCH_ROWS parents per batch with ARCHIVE_PAUSE_SECONDS between
+batches, so the hot tables and their indexes stay small without long locks.
+
+- messages older than ARCHIVE_MESSAGE_MONTHS, except each conversation's last
+  message, which the conversation list shows;
+- events that took place more than ARCHIVE_EVENT_DAYS ago, with registrations;
+- closed jobs posted more than ARCHIVE_JOB_DAYS ago, with their applications.
+  Jobs with referrals stay hot, since job_referrals cascades from jobs.
+
+Archived rows keep their ids. Jobs and events read by id fall back to the
+archive, and conversations record `archived_message_id` so a message history
+reads the archive only when part of it was moved. Application lists (and the
+dashboard's) union in applications_archive, since they are a user's history.
+Event and job listings stay hot-only: they show what is current, and upcoming
+events, with their registrations, are never archived.
+"""
+import logging
+import time
+
+from config import Config
+from database import cursor, db
+
+logger = logging.getLogger("archive")
+
+# Columns copied to <table>_archive, which adds archive_month (YYYYMM)
+COLUMNS = {
+    "messages": ("id", "conversation_id", "sender_id", "content", "is_read", "created_at"),
+    "events": ("id", "title", "event_date", "event_time", "location", "description", "type", "max_capacity",
+               "organizer", "status", "created_at"),
+    "event_registrations": ("id", "event_id", "user_id", "registered_at"),
+    "jobs": ("id", "title", "company", "location", "type", "description", "requirements", "posted_by_id",
+             "posted_by_name", "status", "created_at"),
+    "applications": ("id", "job_id", "student_id", "cover_letter", "resume_url", "status", "created_at"),
+}
+
+
+def _marks(ids) -> str:
+    return ", ".join(["%s"] * len(ids))
+
+
+def _next_month(month: int) -> int:
+    year, m = divmod(month, 100)
+    return month + 1 if m < 12 else (year + 1) * 100 + 1
+
+
+def ensure_partitions(table: str, months) -> int:
+    """Split p_future so every month in `months` (YYYYMM) has a partition; returns how many were added.
+    This is DDL, so it commits: call it before a batch's transaction starts."""
+    cursor.execute(
+        "SELECT PARTITION_DESCRIPTION AS bound FROM INFORMATION_SCHEMA.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL",
+        (table,),
+    )
+    # Months below the highest bound already have a home
+    covered = max(int(r["bound"]) for r in cursor.fetchall() if r["bound"] != "MAXVALUE")
+    month, top = max(min(months), covered), max(months)
+    parts = []
+    while month <= top:
+        parts.append(f"PARTITION p{month} VALUES LESS THAN ({_next_month(month)})")
+        month = _next_month(month)
+    if parts:
+        # p_future never holds rows, so this only rewrites partition metadata
+        cursor.execute(
+            f"ALTER TABLE {table} REORGANIZE PARTITION p_future INTO "
+            f"({', '.join(parts)}, PARTITION p_future VALUES LESS THAN MAXVALUE)"
+        )
+    return len(parts)
+
+
+def _copy(table: str, where: str, params, month_sql: str, join: str = ""):
+    cols = COLUMNS[table]
+    cursor.execute(
+        f"INSERT INTO {table}_archive ({', '.join(cols)}, archive_month) "
+        f"SELECT {', '.join('t.' + c for c in cols)}, {month_sql} FROM {table} t{join} WHERE {where}",
+        params,
+    )
+
+
+def _archive_messages() -> int:
+    """Move one batch of old messages; returns how many moved."""
+    # Oldest first along the primary key; a conversation's last message is never moved
+    cursor.execute(
+        "SELECT m.id, m.conversation_id, EXTRACT(YEAR_MONTH FROM m.created_at) AS month FROM messages m "
+        "JOIN conversations c ON c.id = m.conversation_id "
+        "WHERE m.created_at < NOW() - INTERVAL %s MONTH AND NOT (c.last_message_id <=> m.id) ORDER BY m.id LIMIT %s",
+        (Config.ARCHIVE_MESSAGE_MONTHS, Config.ARCHIVE_BATCH_ROWS),
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return 0
+    ensure_partitions("messages_archive", {r["month"] for r in rows})
+    ids = [r["id"] for r in rows]
+    _copy("messages", f"t.id IN ({_marks(ids)})", ids, "EXTRACT(YEAR_MONTH FROM t.created_at)")
+    cursor.execute(f"DELETE FROM messages WHERE id IN ({_marks(ids)})", ids)
+    upto = {}
+    for r in rows:
+        upto[r["conversation_id"]] = max(upto.get(r["conversation_id"], 0), r["id"])
+    cursor.executemany(
+        "UPDATE conversations SET archived_message_id = GREATEST(COALESCE(archived_message_id, 0), %s) WHERE id = %s",
+        [(message_id, conversation_id) for conversation_id, message_id in upto.items()],
+    )
+    db.commit()
+    return len(rows)
+
+
+def _archive_parents(table: str, child: str, fk: str, month_sql: str, due_sql: str, due_param) -> int:
+    """Move one batch of `table` rows matching `due_sql` with their `child` rows; returns how many parents moved.
+    month_sql and due_sql refer to the parent as `p`."""
+    cursor.execute(
+        f"SELECT p.id, {month_sql} AS month FROM {table} p WHERE {due_sql} ORDER BY p.id LIMIT %s",
+        (due_param, Config.ARCHIVE_BATCH_ROWS),
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return 0
+    months = {r["month"] for r in rows}
+    ensure_partitions(f"{table}_archive", months)
+    ensure_partitions(f"{child}_archive", months)
+    # Lock the parents and re-check: a child inserted meanwhile now waits on its foreign key and then fails
+    ids = [r["id"] for r in rows]
+    cursor.execute(f"SELECT p.id FROM {table} p WHERE p.id IN ({_marks(ids)}) AND {due_sql} FOR UPDATE", ids + [due_param])
+    ids = [r["id"] for r in cursor.fetchall()]
+    if ids:
+        _copy(child, f"t.{fk} IN ({_marks(ids)})", ids, month_sql, join=f" JOIN {table} p ON p.id = t.{fk}")
+        _copy(table, f"t.id IN ({_marks(ids)})", ids, month_sql, join=f" JOIN {table} p ON p.id = t.id")
+        cursor.execute(f"DELETE FROM {child} WHERE {fk} IN ({_marks(ids)})", ids)
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({_marks(ids)})", ids)
+    db.commit()
+    return len(ids)
+
+
+def _archive_events() -> int:
+    return _archive_parents(
+        "events", "event_registrations", "event_id", "EXTRACT(YEAR_MONTH FROM p.event_date)",
+        "p.event_date < CURDATE() - INTERVAL %s DAY", Config.ARCHIVE_EVENT_DAYS,
+    )
+
+
+def _archive_jobs() -> int:
+    return _archive_parents(
+        "jobs", "applications", "job_id", "EXTRACT(YEAR_MONTH FROM p.created_at)",
+        "p.status = 'closed' AND p.created_at < NOW() - INTERVAL %s DAY "
+        "AND NOT EXISTS (SELECT 1 FROM job_referrals r WHERE r.job_id = p.id)",
+        Config.ARCHIVE_JOB_DAYS,
+    )
+
+
+def run() -> dict:
+    """One throttled archival pass; returns messages and parent rows moved per kind. Single runner via a named lock."""
+    cursor.execute("SELECT GET_LOCK('archive_run', 0) AS got")
+    if not cursor.fetchone()["got"]:
+        return {}
+    moved = {}
+    try:
+        for kind, batch in (("messages", _archive_messages), ("events", _archive_events), ("jobs", _archive_jobs)):
+            moved[kind] = 0
+            for _ in range(Config.ARCHIVE_MAX_BATCHES):
+                count = batch()
+                moved[kind] += count
+                if count < Config.ARCHIVE_BATCH_ROWS:
+                    break
+                time.sleep(Config.ARCHIVE_PAUSE_SECONDS)
+        logger.info("Archived %s", ", ".join(f"{n} {kind}" for kind, n in moved.items()))
+        return moved
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK('archive_run')")
+        cursor.fetchall()
@@ -5,6 +5,11 @@ from typing import Optional
 from database import cursor, db
 from security import hash_password, verify_password, create_token
 from deps import get_current_user
+import careers
+import inbox
+import matching
+import tasks
+import writes
 
 router = APIRouter(tags=["auth"])
 
@@ -49,36 +54,31 @@ def _user_row_to_dict(row: dict) -> dict:
 
 @router.post("/register")
 def register(data: Register):
-    cursor.execute("SELECT id FROM users WHERE email = %s", (data.email,))
-    if cursor.fetchone():
-        raise HTTPException(status_code=400, detail="User already exists")
-
     is_approved = 1 if data.role in ("student", "admin") else 0
 
-    cursor.execute(
-        """INSERT INTO users (name, email, password, role, is_approved,
-           graduation_year, current_organization, current_role, department, batch)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-        (
-            data.name,
-            data.email,
-            hash_password(data.password),
-            data.role,
-            is_approved,
-            data.graduation_year,
-            data.current_organization,
-            data.current_role,
-            data.department,
-            data.batch,
-        ),
-    )
+    # The unique key on email is the existence check
+    user = writes.insert("users", {
+        "name": data.name,
+        "email": data.email,
+        "password": hash_password(data.password),
+        "role": data.role,
+        "is_approved": is_approved,
+        "graduation_year": data.graduation_year,
+        "current_organization": data.current_organization,
+        "current_role": data.current_role,
+        "department": data.department,
+        "batch": data.batch,
+    }, duplicate="User already exists")
+    user_id = user["id"]
+    inbox.ensure_state(user_id)
+    if data.role == "alumni":
+        matching.ensure_profile(user_id)
+    careers.record_initial(user_id, data.current_organization, data.current_role)
+    if not is_approved:
+        tasks.enqueue("notify", {"role": "admin", "notification": {
+            "type": "user", "title": "Alumni approval pending",
+            "message": f"{data.name} registered as alumni and is awaiting approval", "action_url": "/admin/users"}})
     db.commit()
-    user_id = cursor.lastrowid
-    cursor.execute(
-        "SELECT id, name, email, role, graduation_year, current_organization, current_role, department, batch, phone, location, bio, linkedin, avatar FROM users WHERE id = %s",
-        (user_id,),
-    )
-    user = cursor.fetchone()
     return {
         "message": "Registered successfully",
         "approvalRequired": not is_approved,
@@ -0,0 +1,14 @@
+"""Load benchmarks for the API.
+
+Run from the backend directory:
+
+    python init_db.py                                   # create the schema
+    python -m benchmarks seed --scale 10k --truncate    # synthetic dataset
+    uvicorn main:app --workers 4                        # server under test
+    python -m benchmarks run --scale 10k --duration 60  # drive the workload
+    python -m benchmarks compare old.json new.json      # diff two runs
+
+The app speaks MySQL (ENUM/JSON columns, %s parameters), so the stand-in
+database is any local MySQL-compatible server such as MariaDB or a mysql
+container, configured through the same DB_* variables as the app.
+"""
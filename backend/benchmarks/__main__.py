@@ -0,0 +1,148 @@
+"""Command line entry point: python -m benchmarks {seed,run,compare}."""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from . import dataset, workload
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _spec(args) -> dataset.DatasetSpec:
+    overrides = {}
+    for item in args.set or []:
+        key, _, value = item.partition("=")
+        field = dataset.DatasetSpec.__dataclass_fields__.get(key)
+        if field is None or key == "users":
+            raise SystemExit(f"unknown dataset parameter: {key}")
+        overrides[key] = field.type(value)
+    return dataset.DatasetSpec.from_scale(args.scale, **overrides)
+
+
+def cmd_seed(args):
+    import mysql.connector
+    from security import hash_password
+
+    load_dotenv()
+    spec = _spec(args)
+    conn = mysql.connector.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        database=os.getenv("DB_NAME", "smart_alumni_db"),
+        time_zone="+00:00",
+    )
+    started = time.perf_counter()
+    counts = dataset.seed(conn, spec, hash_password(dataset.BENCH_PASSWORD), truncate=args.truncate, batch_size=args.batch_size)
+    conn.close()
+    print(json.dumps({"dataset": spec.to_dict(), "rows": counts, "seconds": round(time.perf_counter() - started, 1)}, indent=2))
+
+
+def cmd_run(args):
+    spec = _spec(args)
+    summary = workload.run(
+        args.base_url, spec, mix=args.mix, concurrency=args.concurrency, duration=args.duration,
+        warmup=args.warmup, sessions_per_role=args.sessions, seed=args.seed,
+    )
+    commit = _git("rev-parse", "HEAD")
+    result = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain")),
+        "startedAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "scale": args.scale,
+        "dataset": spec.to_dict(),
+        "config": {"baseUrl": args.base_url, "mix": args.mix, "concurrency": args.concurrency,
+                   "duration": args.duration, "warmup": args.warmup, "sessions": args.sessions, "seed": args.seed},
+        **summary,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit[:10] or 'nogit'}-{args.scale}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+    print(f"{'endpoint':<45}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'err':>6}{'thr':>7}")
+    for name, e in result["endpoints"].items():
+        print(f"{name:<45}{e['throughput_rps']:>9}{e['p50_ms']:>10}{e['p95_ms']:>10}{e['p99_ms']:>10}{e['errors']:>6}{e['throttled']:>7}")
+    t = result["total"]
+    print(f"{'TOTAL':<45}{t['throughput_rps']:>9}{t['p50_ms']:>10}{t['p95_ms']:>10}{t['p99_ms']:>10}{t['errors']:>6}{t['throttled']:>7}")
+    if t["throttled"]:
+        print(f"warning: {t['throttled']} requests were rate limited and left out of the latencies; "
+              "start the server with RATE_LIMIT_ENABLED=False to benchmark the handlers")
+    print(f"saved {out}")
+
+
+def cmd_compare(args):
+    base = json.loads(Path(args.baseline).read_text())
+    new = json.loads(Path(args.candidate).read_text())
+    print(f"baseline  {base.get('commit', '')[:10]}  candidate {new.get('commit', '')[:10]}")
+    print(f"{'endpoint':<45}{'p50 %':>9}{'p95 %':>9}{'p99 %':>9}{'rps %':>9}")
+    regressions = []
+    for name in sorted(set(base["endpoints"]) & set(new["endpoints"])):
+        b, n = base["endpoints"][name], new["endpoints"][name]
+
+        def delta(key):
+            return 100.0 * (n[key] - b[key]) / b[key] if b[key] else 0.0
+
+        row = {k: delta(k) for k in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")}
+        flag = ""
+        if row["p95_ms"] > args.threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<45}{row['p50_ms']:>+9.1f}{row['p95_ms']:>+9.1f}{row['p99_ms']:>+9.1f}{row['throughput_rps']:>+9.1f}{flag}")
+    for name in sorted(set(base["endpoints"]) ^ set(new["endpoints"])):
+        print(f"{name:<45}  only in {'baseline' if name in base['endpoints'] else 'candidate'}")
+    if regressions:
+        print(f"{len(regressions)} endpoint(s) regressed by more than {args.threshold}% at p95")
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def dataset_args(p):
+        p.add_argument("--scale", default="10k", help="10k, 100k, 1m or an explicit user count")
+        p.add_argument("--set", action="append", metavar="KEY=VALUE",
+                       help="override a DatasetSpec parameter, e.g. --set messages_per_conversation=20")
+
+    p = sub.add_parser("seed", help="insert the synthetic dataset")
+    dataset_args(p)
+    p.add_argument("--truncate", action="store_true", help="empty the benchmark tables first")
+    p.add_argument("--batch-size", type=int, default=5000)
+    p.set_defaults(func=cmd_seed)
+
+    p = sub.add_parser("run", help="drive the workload against a running server")
+    dataset_args(p)
+    p.add_argument("--base-url", default="http://127.0.0.1:8000")
+    p.add_argument("--mix", choices=sorted(workload.MIXES), default="mixed")
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--duration", type=float, default=60.0)
+    p.add_argument("--warmup", type=float, default=5.0)
+    p.add_argument("--sessions", type=int, default=25, help="logged-in users per role")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--out", help="result file (default: benchmarks/results/<time>-<commit>-<scale>.json)")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("compare", help="diff two result files")
+    p.add_argument("baseline")
+    p.add_argument("candidate")
+    p.add_argument("--threshold", type=float, default=10.0, help="allowed p95 slowdown in percent")
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
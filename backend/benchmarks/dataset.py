@@ -0,0 +1,323 @@
+"""Deterministic synthetic dataset generator.
+
+Ids are assigned explicitly so the workload driver can derive valid ids from the
+same DatasetSpec without querying the database: admins come first, then alumni,
+then students.
+"""
+import json
+import random
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+BENCH_PASSWORD = "benchmark-password"
+
+DEPARTMENTS = ["Computer Science", "Electrical", "Mechanical", "Civil", "Chemical", "Biotech", "Mathematics", "Physics"]
+ORGANIZATIONS = ["Google", "Microsoft", "Amazon", "Infosys", "TCS", "Goldman Sachs", "Deloitte", "Startup", "Meta", "Adobe"]
+ROLES = ["Software Engineer", "Data Scientist", "Product Manager", "Analyst", "Consultant", "Designer", "Founder", "Researcher"]
+LOCATIONS = ["Bengaluru", "Hyderabad", "Pune", "Mumbai", "Delhi", "Chennai", "San Francisco", "London", "Singapore"]
+JOB_TYPES = ["full-time", "part-time", "internship", "contract"]
+EVENT_TYPES = ["webinar", "meetup", "workshop", "reunion", "networking"]
+DOMAINS = ["Software", "Data Science", "Finance", "Product", "Research", "Entrepreneurship"]
+WORDS = (
+    "alumni network career growth mentor project team data cloud product market research design "
+    "startup interview referral opportunity experience learning community event workshop"
+).split()
+
+# Child tables first so TRUNCATE order respects foreign keys.
+TABLES = [
+    "applications_archive",
+    "jobs_archive",
+    "event_registrations_archive",
+    "events_archive",
+    "messages_archive",
+    "referrer_stats",
+    "job_referrals",
+    "story_comments",
+    "story_likes",
+    "success_stories",
+    "career_transitions",
+    "role_history",
+    "connection_suggestions",
+    "skill_endorsements",
+    "user_skills",
+    "skills",
+    "coffee_chat_slots",
+    "coffee_chats",
+    "availability_windows",
+    "mentor_domains",
+    "mentor_profiles",
+    "task_queue",
+    "notification_state",
+    "notification_broadcasts",
+    "notification_streams",
+    "notifications",
+    "messages",
+    "conversation_participants",
+    "conversations",
+    "applications",
+    "event_registrations",
+    "events",
+    "mentorship_requests",
+    "donations",
+    "jobs",
+    "users",
+]
+
+
+@dataclass
+class DatasetSpec:
+    users: int
+    admins: int = 5
+    alumni_share: float = 0.35
+    jobs_per_alumnus: float = 0.2
+    applications_per_student: float = 3.0
+    events_per_1k_users: float = 5.0
+    registrations_per_user: float = 2.0
+    conversations_per_user: float = 0.5
+    messages_per_conversation: float = 8.0
+    donations_per_alumnus: float = 0.5
+    mentorship_per_student: float = 0.3
+    seed: int = 42
+
+    @classmethod
+    def from_scale(cls, scale: str, **overrides) -> "DatasetSpec":
+        users = SCALES[scale.lower()] if scale.lower() in SCALES else int(scale)
+        return cls(users=users, **overrides)
+
+    @property
+    def alumni(self) -> range:
+        start = self.admins + 1
+        return range(start, start + int((self.users - self.admins) * self.alumni_share))
+
+    @property
+    def students(self) -> range:
+        return range(self.alumni.stop, self.users + 1)
+
+    @property
+    def admin_ids(self) -> range:
+        return range(1, self.admins + 1)
+
+    @property
+    def jobs(self) -> int:
+        return max(1, int(len(self.alumni) * self.jobs_per_alumnus))
+
+    @property
+    def events(self) -> int:
+        return max(1, int(self.users * self.events_per_1k_users / 1000))
+
+    @property
+    def conversations(self) -> int:
+        return max(1, int(self.users * self.conversations_per_user))
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def user_email(user_id: int) -> str:
+    return f"user{user_id}@bench.example"
+
+
+def user_name(user_id: int) -> str:
+    return f"Bench User {user_id}"
+
+
+def _count(rng: random.Random, mean: float) -> int:
+    """Integer draw whose expectation is `mean`."""
+    whole = int(mean)
+    return whole + (1 if rng.random() < mean - whole else 0)
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _past(rng: random.Random, now: datetime, days: int) -> datetime:
+    return now - timedelta(seconds=rng.randrange(days * 86400))
+
+
+def _insert(conn, table: str, columns: list, rows, batch_size: int) -> int:
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    cur = conn.cursor()
+    batch, total = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            cur.executemany(sql, batch)
+            conn.commit()
+            total += len(batch)
+            batch.clear()
+    if batch:
+        cur.executemany(sql, batch)
+        conn.commit()
+        total += len(batch)
+    cur.close()
+    return total
+
+
+def _users(spec: DatasetSpec, rng: random.Random, now: datetime, password_hash: str):
+    for uid in range(1, spec.users + 1):
+        if uid in spec.admin_ids:
+            role = "admin"
+        elif uid in spec.alumni:
+            role = "alumni"
+        else:
+            role = "student"
+        year = rng.randint(1995, 2023) if role == "alumni" else rng.randint(2024, 2028)
+        yield (
+            uid, user_name(uid), user_email(uid), password_hash, role, 1,
+            str(year),
+            rng.choice(ORGANIZATIONS) if role == "alumni" else None,
+            rng.choice(ROLES) if role == "alumni" else None,
+            rng.choice(DEPARTMENTS),
+            f"{year - 4}-{year}",
+            f"+91-9{rng.randrange(10**9):09d}",
+            rng.choice(LOCATIONS),
+            _text(rng, 20),
+            f"https://linkedin.com/in/bench{uid}",
+            f"https://avatars.example/{uid}.png",
+            _past(rng, now, 1000),
+        )
+
+
+def _jobs(spec: DatasetSpec, rng: random.Random, now: datetime):
+    alumni = spec.alumni
+    for jid in range(1, spec.jobs + 1):
+        poster = rng.choice(alumni)
+        yield (
+            jid, f"{rng.choice(ROLES)} at {rng.choice(ORGANIZATIONS)}", rng.choice(ORGANIZATIONS),
+            rng.choice(LOCATIONS), rng.choice(JOB_TYPES), _text(rng, 60),
+            json.dumps([_text(rng, 4) for _ in range(3)]), poster, user_name(poster),
+            "closed" if rng.random() < 0.1 else "open", _past(rng, now, 365),
+        )
+
+
+def _applications(spec: DatasetSpec, rng: random.Random, now: datetime):
+    statuses = ["pending", "reviewed", "accepted", "rejected"]
+    for sid in spec.students:
+        for job_id in rng.sample(range(1, spec.jobs + 1), min(_count(rng, spec.applications_per_student), spec.jobs)):
+            yield (job_id, sid, _text(rng, 30), f"https://resumes.example/{sid}.pdf", rng.choice(statuses), _past(rng, now, 365))
+
+
+def _events(spec: DatasetSpec, rng: random.Random, now: datetime):
+    for eid in range(1, spec.events + 1):
+        day = (now + timedelta(days=rng.randint(-365, 180))).date()
+        yield (
+            eid, f"{rng.choice(EVENT_TYPES).title()}: {_text(rng, 3)}", day, f"{rng.randint(9, 20)}:00",
+            rng.choice(LOCATIONS), _text(rng, 40), rng.choice(EVENT_TYPES),
+            rng.choice([None, 50, 100, 500, 5000]), "Alumni Office",
+            "completed" if day < now.date() else "upcoming", _past(rng, now, 400),
+        )
+
+
+def _registrations(spec: DatasetSpec, rng: random.Random, now: datetime):
+    for uid in range(1, spec.users + 1):
+        for eid in rng.sample(range(1, spec.events + 1), min(_count(rng, spec.registrations_per_user), spec.events)):
+            yield (eid, uid, _past(rng, now, 365))
+
+
+def _donations(spec: DatasetSpec, rng: random.Random, now: datetime):
+    for uid in spec.alumni:
+        for _ in range(_count(rng, spec.donations_per_alumnus)):
+            yield (uid, round(rng.uniform(10, 5000), 2), "USD", _text(rng, 8), 1 if rng.random() < 0.2 else 0, _past(rng, now, 730))
+
+
+def _mentorship(spec: DatasetSpec, rng: random.Random, now: datetime):
+    statuses = ["pending", "accepted", "rejected"]
+    for sid in spec.students:
+        for _ in range(_count(rng, spec.mentorship_per_student)):
+            yield (sid, rng.choice(spec.alumni), rng.choice(DOMAINS), _text(rng, 25), rng.choice(statuses), _past(rng, now, 365))
+
+
+def _conversation_pairs(spec: DatasetSpec, rng: random.Random) -> list:
+    seen, pairs = set(), []
+    while len(pairs) < spec.conversations:
+        a, b = rng.randint(1, spec.users), rng.randint(1, spec.users)
+        key = (min(a, b), max(a, b))
+        if a != b and key not in seen:
+            seen.add(key)
+            pairs.append(key)
+    return pairs
+
+
+def _messages(spec: DatasetSpec, rng: random.Random, now: datetime, pairs: list):
+    for cid, pair in enumerate(pairs, 1):
+        n = _count(rng, spec.messages_per_conversation)
+        start = _past(rng, now, 365)
+        for i in range(n):
+            yield (cid, rng.choice(pair), _text(rng, 12), 1 if i < n - 1 else 0, start + timedelta(minutes=i * 7))
+
+
+# Columns the app maintains on write, recomputed once after the bulk insert
+DERIVED = [
+    "UPDATE conversations c SET last_message_id = "
+    "(SELECT MAX(m.id) FROM messages m WHERE m.conversation_id = c.id)",
+    "UPDATE conversation_participants p SET last_read_message_id = COALESCE("
+    "(SELECT MAX(m.id) FROM messages m WHERE m.conversation_id = p.conversation_id "
+    "AND m.sender_id != p.user_id AND m.is_read = 1), 0)",
+    "INSERT IGNORE INTO mentor_profiles (user_id) SELECT id FROM users WHERE role = 'alumni'",
+    "UPDATE mentor_profiles mp SET "
+    "open_requests = (SELECT COUNT(*) FROM mentorship_requests r WHERE r.mentor_id = mp.user_id AND r.status = 'pending'), "
+    "accepted_requests = (SELECT COUNT(*) FROM mentorship_requests r WHERE r.mentor_id = mp.user_id AND r.status = 'accepted')",
+    "INSERT IGNORE INTO mentor_domains (domain, user_id) "
+    "SELECT DISTINCT LOWER(TRIM(domain)), mentor_id FROM mentorship_requests WHERE status = 'accepted'",
+]
+
+
+def seed(conn, spec: DatasetSpec, password_hash: str, truncate: bool = False, batch_size: int = 5000, log=print) -> dict:
+    """Insert the dataset described by `spec`; returns row counts per table."""
+    rng = random.Random(spec.seed)
+    # Sessions run in UTC (database.SESSION_TIME_ZONE)
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    cur = conn.cursor()
+    cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+    if truncate:
+        for table in TABLES:
+            cur.execute(f"TRUNCATE TABLE {table}")
+    conn.commit()
+
+    pairs = _conversation_pairs(spec, rng)
+    steps = [
+        ("users", ["id", "name", "email", "password", "role", "is_approved", "graduation_year",
+                   "current_organization", "current_role", "department", "batch", "phone",
+                   "location", "bio", "linkedin", "avatar", "created_at"],
+         _users(spec, rng, now, password_hash)),
+        ("jobs", ["id", "title", "company", "location", "type", "description", "requirements",
+                  "posted_by_id", "posted_by_name", "status", "created_at"],
+         _jobs(spec, rng, now)),
+        ("applications", ["job_id", "student_id", "cover_letter", "resume_url", "status", "created_at"],
+         _applications(spec, rng, now)),
+        ("events", ["id", "title", "event_date", "event_time", "location", "description", "type",
+                    "max_capacity", "organizer", "status", "created_at"],
+         _events(spec, rng, now)),
+        ("event_registrations", ["event_id", "user_id", "registered_at"],
+         _registrations(spec, rng, now)),
+        ("donations", ["user_id", "amount", "currency", "message", "is_anonymous", "created_at"],
+         _donations(spec, rng, now)),
+        ("mentorship_requests", ["student_id", "mentor_id", "domain", "message", "status", "created_at"],
+         _mentorship(spec, rng, now)),
+        ("conversations", ["id", "user_low_id", "user_high_id", "created_at"],
+         ((cid, a, b, _past(rng, now, 365)) for cid, (a, b) in enumerate(pairs, 1))),
+        ("conversation_participants", ["conversation_id", "user_id"],
+         (row for cid, (a, b) in enumerate(pairs, 1) for row in ((cid, a), (cid, b)))),
+        ("messages", ["conversation_id", "sender_id", "content", "is_read", "created_at"],
+         _messages(spec, rng, now, pairs)),
+    ]
+    counts = {}
+    for table, columns, rows in steps:
+        started = time.perf_counter()
+        counts[table] = _insert(conn, table, columns, rows, batch_size)
+        log(f"{table}: {counts[table]} rows in {time.perf_counter() - started:.1f}s")
+    for sql in DERIVED:
+        cur.execute(sql)
+        conn.commit()
+    # Rows changed underneath any running API processes
+    cur.execute("INSERT INTO cache_invalidations (cache) VALUES ('*')")
+    conn.commit()
+    cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+    cur.close()
+    return counts
+
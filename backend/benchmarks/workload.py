@@ -0,0 +1,449 @@
+"""Mixed HTTP workload driver.
+
+Each worker thread keeps one keep-alive connection, picks operations by weight
+and records per-operation latency. Operation names are `<router>.<handler>` so
+results line up with backend/routers.
+
+Requests turned away by the rate limiter (429, or 503 "Server busy" from its
+concurrency cap) are counted as `throttled` and kept out of the latency and
+throughput figures: they never reach a handler, so they would make a run look
+faster. Benchmark a server started with RATE_LIMIT_ENABLED=False (or limits
+raised above the load) unless the limiter itself is what is being measured.
+"""
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from .dataset import BENCH_PASSWORD, DOMAINS, ROLES, DatasetSpec, user_email
+
+# ratelimit.py's rejection when an expensive route's concurrency cap is full; other 503s are real errors
+SHED_DETAIL = "Server busy"
+
+
+class Client:
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self._host = parts.hostname
+        self._port = parts.port or (443 if parts.scheme == "https" else 80)
+        self._https = parts.scheme == "https"
+        self._timeout = timeout
+        self._conn = None
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        self._conn = cls(self._host, self._port, timeout=self._timeout)
+
+    def request(self, method: str, path: str, body=None, token: str = None):
+        """Returns (status, decoded json or None); status 0 means a transport error."""
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = json.dumps(body) if body is not None else None
+        for attempt in (1, 2):
+            if self._conn is None:
+                self._connect()
+            try:
+                self._conn.request(method, path, body=payload, headers=headers)
+                resp = self._conn.getresponse()
+                raw = resp.read()
+                try:
+                    data = json.loads(raw) if raw else None
+                except ValueError:
+                    data = None
+                return resp.status, data
+            except (http.client.HTTPException, OSError):
+                self._conn.close()
+                self._conn = None
+                if attempt == 2:
+                    return 0, None
+
+
+class Session:
+    def __init__(self, user_id: int, role: str, token: str):
+        self.user_id = user_id
+        self.role = role
+        self.token = token
+        self.conversation_id = None
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.throttled = Counter()
+
+    def add(self, name: str, status: int, seconds: float, throttled: bool = False):
+        with self._lock:
+            self.statuses.setdefault(name, Counter())[status] += 1
+            if throttled:
+                self.throttled[name] += 1
+            else:
+                self.latencies.setdefault(name, []).append(seconds * 1000)
+
+
+class Worker:
+    def __init__(self, base_url: str, spec: DatasetSpec, sessions: dict, recorder: Recorder, seed: int):
+        self.client = Client(base_url)
+        self.spec = spec
+        self.sessions = sessions
+        self.recorder = recorder
+        self.rng = random.Random(seed)
+
+    def session(self, role: str = None) -> Session:
+        role = role or self.rng.choice(["student", "student", "alumni"])
+        return self.rng.choice(self.sessions[role])
+
+    def call(self, name: str, method: str, path: str, body=None, session: Session = None):
+        started = time.perf_counter()
+        status, data = self.client.request(method, path, body, session.token if session else None)
+        if self.recorder is not None:
+            throttled = status == 429 or (status == 503 and isinstance(data, dict) and data.get("detail") == SHED_DETAIL)
+            self.recorder.add(name, status, time.perf_counter() - started, throttled)
+        return status, data
+
+    def job_id(self) -> int:
+        return self.rng.randint(1, self.spec.jobs)
+
+    def event_id(self) -> int:
+        return self.rng.randint(1, self.spec.events)
+
+    def user_ids(self, n: int) -> str:
+        return ",".join(str(self.rng.randint(1, self.spec.users)) for _ in range(n))
+
+    def other_user(self, session: Session) -> int:
+        while True:
+            uid = self.rng.randint(1, self.spec.users)
+            if uid != session.user_id:
+                return uid
+
+
+# --- operations, grouped by router -------------------------------------------------
+
+def op_auth_login(w: Worker):
+    uid = w.session().user_id
+    w.call("auth.login", "POST", "/login", {"email": user_email(uid), "password": BENCH_PASSWORD})
+
+
+def op_auth_me(w: Worker):
+    w.call("auth.me", "GET", "/me", session=w.session())
+
+
+def op_users_me(w: Worker):
+    w.call("users.get_me", "GET", "/users/me", session=w.session())
+
+
+def op_users_update_me(w: Worker):
+    w.call("users.update_me", "PATCH", "/users/me", {"location": w.rng.choice(["Pune", "Delhi", "London"])}, w.session())
+
+
+def op_users_alumni(w: Worker):
+    w.call("users.list_alumni", "GET", "/users/alumni", session=w.session())
+
+
+def op_users_students(w: Worker):
+    w.call("users.list_students", "GET", "/users/students", session=w.session())
+
+
+def op_users_pending(w: Worker):
+    w.call("users.list_pending_alumni", "GET", "/users/pending", session=w.session("admin"))
+
+
+def op_users_batch(w: Worker):
+    w.call("users.batch_users", "GET", f"/users/batch?ids={w.user_ids(20)}", session=w.session())
+
+
+def op_jobs_list(w: Worker):
+    w.call("jobs.list_jobs", "GET", "/jobs", session=w.session())
+
+
+def op_jobs_list_fields(w: Worker):
+    w.call("jobs.list_jobs.fields", "GET", "/jobs?fields=id,title,company", session=w.session())
+
+
+def op_jobs_batch(w: Worker):
+    ids = ",".join(str(w.job_id()) for _ in range(10))
+    w.call("jobs.batch_jobs", "GET", f"/jobs/batch?ids={ids}", session=w.session())
+
+
+def op_jobs_get(w: Worker):
+    w.call("jobs.get_job", "GET", f"/jobs/{w.job_id()}", session=w.session())
+
+
+def op_jobs_create(w: Worker):
+    body = {"title": "Benchmark Engineer", "company": "Bench Co", "location": "Remote",
+            "type": "full-time", "description": "Synthetic job posted by the benchmark.", "requirements": ["python"]}
+    w.call("jobs.create_job", "POST", "/jobs", body, w.session("alumni"))
+
+
+def op_jobs_update(w: Worker):
+    w.call("jobs.update_job", "PATCH", f"/jobs/{w.job_id()}", {"location": "Remote"}, w.session("admin"))
+
+
+def op_events_list(w: Worker):
+    w.call("events.list_events", "GET", "/events", session=w.session())
+
+
+def op_events_get(w: Worker):
+    w.call("events.get_event", "GET", f"/events/{w.event_id()}", session=w.session())
+
+
+def op_events_register(w: Worker):
+    w.call("events.register_for_event", "POST", f"/events/{w.event_id()}/register", session=w.session())
+
+
+def op_donations_create(w: Worker):
+    w.call("donations.create_donation", "POST", "/donations", {"amount": round(w.rng.uniform(5, 500), 2)}, w.session("alumni"))
+
+
+def op_donations_list(w: Worker):
+    w.call("donations.list_donations", "GET", "/donations", session=w.session("alumni"))
+
+
+def op_donations_stats(w: Worker):
+    w.call("donations.donation_stats", "GET", "/donations/stats", session=w.session("admin"))
+
+
+def op_mentorship_list(w: Worker):
+    w.call("mentorship.list_mentorship_requests", "GET", "/mentorship", session=w.session())
+
+
+def op_mentorship_create(w: Worker):
+    body = {"mentor_id": w.rng.choice(w.spec.alumni), "domain": w.rng.choice(DOMAINS), "message": "Benchmark request"}
+    w.call("mentorship.create_mentorship_request", "POST", "/mentorship", body, w.session("student"))
+
+
+def op_applications_list(w: Worker):
+    w.call("applications.list_applications", "GET", "/applications", session=w.session("student"))
+
+
+def op_applications_create(w: Worker):
+    body = {"job_id": w.job_id(), "cover_letter": "Benchmark application"}
+    w.call("applications.create_application", "POST", "/applications", body, w.session("student"))
+
+
+def op_messages_conversations(w: Worker):
+    w.call("messages.list_conversations", "GET", "/messages/conversations", session=w.session())
+
+
+def op_messages_open(w: Worker):
+    s = w.session()
+    w.call("messages.get_or_create_conversation", "GET", f"/messages/conversations/{w.other_user(s)}", session=s)
+
+
+def op_messages_list(w: Worker):
+    s = w.session()
+    w.call("messages.list_messages", "GET", f"/messages/conversations/{s.conversation_id}/messages", session=s)
+
+
+def op_messages_send(w: Worker):
+    s = w.session()
+    w.call("messages.send_message", "POST", f"/messages/conversations/{s.conversation_id}/messages", {"content": "Benchmark hello"}, s)
+
+
+def op_messages_read(w: Worker):
+    s = w.session()
+    w.call("messages.mark_read", "POST", f"/messages/conversations/{s.conversation_id}/read", session=s)
+
+
+def op_dashboard(w: Worker):
+    w.call("dashboard.dashboard", "GET", "/dashboard", session=w.session())
+
+
+def op_notifications_list(w: Worker):
+    w.call("notifications.list_notifications", "GET", "/notifications", session=w.session())
+
+
+def op_notifications_unread(w: Worker):
+    w.call("notifications.unread_count", "GET", "/notifications/unread-count", session=w.session())
+
+
+def op_notifications_read_all(w: Worker):
+    w.call("notifications.mark_all_read", "POST", "/notifications/read-all", session=w.session())
+
+
+def op_network_suggestions(w: Worker):
+    w.call("network.people_you_may_know", "GET", "/network/suggestions", session=w.session())
+
+
+def op_network_mutual(w: Worker):
+    s = w.session()
+    w.call("network.mutual_connections", "GET", f"/network/mutual/{w.other_user(s)}", session=s)
+
+
+def op_careers_history(w: Worker):
+    w.call("careers.my_history", "GET", "/careers/history/me", session=w.session("alumni"))
+
+
+def op_careers_next_moves(w: Worker):
+    w.call("careers.next_moves", "GET", f"/careers/next-moves?role={w.rng.choice(ROLES)}", session=w.session())
+
+
+def op_insights_group(w: Worker):
+    w.call("insights.group_counts", "GET", "/insights?group_by=department,batch", session=w.session())
+
+
+def op_insights_overview(w: Worker):
+    w.call("insights.overview", "GET", "/insights/overview", session=w.session())
+
+
+def op_stories_list(w: Worker):
+    w.call("stories.list_stories", "GET", "/stories", session=w.session())
+
+
+def op_stories_create(w: Worker):
+    body = {"title": "Benchmark story", "story": "Synthetic story posted by the benchmark.", "tags": ["bench"]}
+    w.call("stories.create_story", "POST", "/stories", body, w.session("alumni"))
+
+
+def op_skills_search(w: Worker):
+    w.call("skills.search_skills", "GET", f"/skills?q={w.rng.choice(['py', 'ja', 'da', 'ma'])}", session=w.session())
+
+
+def op_skills_user(w: Worker):
+    s = w.session()
+    w.call("skills.get_user_skills", "GET", f"/skills/users/{w.other_user(s)}", session=s)
+
+
+def op_skills_set(w: Worker):
+    body = {"skills": w.rng.sample(["python", "java", "data analysis", "machine learning", "sql", "design"], 3)}
+    w.call("skills.set_my_skills", "PUT", "/skills/me", body, w.session())
+
+
+def op_referrals_leaderboard(w: Worker):
+    w.call("referrals.leaderboard", "GET", "/referrals/leaderboard", session=w.session())
+
+
+def op_coffee_chats_list(w: Worker):
+    w.call("coffee_chats.list_coffee_chats", "GET", "/coffee-chats", session=w.session())
+
+
+def op_coffee_chats_slots(w: Worker):
+    s = w.session("student")
+    w.call("coffee_chats.find_slots", "GET", f"/coffee-chats/slots?user_ids={w.rng.choice(w.spec.alumni)}", session=s)
+
+
+# Reads outweigh writes roughly 20:1, matching production traffic.
+MIXES = {
+    "mixed": {
+        op_users_me: 10, op_auth_me: 4, op_users_alumni: 3, op_users_students: 2, op_users_pending: 1,
+        op_jobs_list: 8, op_jobs_get: 8, op_events_list: 6, op_events_get: 5,
+        op_applications_list: 4, op_mentorship_list: 4, op_donations_list: 3, op_donations_stats: 1,
+        op_messages_conversations: 8, op_messages_list: 6,
+        op_dashboard: 6, op_notifications_list: 4, op_notifications_unread: 6, op_users_batch: 2, op_jobs_batch: 1,
+        op_jobs_list_fields: 2, op_network_suggestions: 2, op_network_mutual: 1, op_careers_history: 1,
+        op_careers_next_moves: 1, op_insights_group: 1, op_insights_overview: 0.5, op_stories_list: 2,
+        op_skills_search: 1, op_skills_user: 1, op_referrals_leaderboard: 0.5, op_coffee_chats_list: 1,
+        op_coffee_chats_slots: 0.5,
+        op_users_update_me: 0.4, op_jobs_create: 0.2, op_jobs_update: 0.2, op_events_register: 0.4,
+        op_donations_create: 0.2, op_mentorship_create: 0.2, op_applications_create: 0.4,
+        op_messages_open: 0.3, op_messages_send: 1, op_messages_read: 0.8, op_auth_login: 0.1,
+        op_notifications_read_all: 0.5, op_skills_set: 0.2, op_stories_create: 0.1,
+    },
+}
+MIXES["read-only"] = {
+    op: weight for op, weight in MIXES["mixed"].items()
+    if op not in (op_users_update_me, op_jobs_create, op_jobs_update, op_events_register, op_donations_create,
+                  op_mentorship_create, op_applications_create, op_messages_open, op_messages_send,
+                  op_messages_read, op_auth_login, op_notifications_read_all, op_skills_set, op_stories_create)
+}
+
+
+def login_sessions(base_url: str, spec: DatasetSpec, per_role: int, seed: int) -> dict:
+    """Log in a fixed sample of users per role and open one conversation for each."""
+    rng = random.Random(seed)
+    client = Client(base_url)
+    pools = {"admin": spec.admin_ids, "alumni": spec.alumni, "student": spec.students}
+    sessions = {}
+    for role, ids in pools.items():
+        sessions[role] = []
+        for uid in rng.sample(ids, min(per_role, len(ids))):
+            status, data = client.request("POST", "/login", {"email": user_email(uid), "password": BENCH_PASSWORD})
+            if status != 200:
+                raise RuntimeError(f"login failed for user {uid}: HTTP {status} {data}")
+            session = Session(uid, role, data["access_token"])
+            other = uid
+            while other == uid:
+                other = rng.randint(1, spec.users)
+            status, conv = client.request("GET", f"/messages/conversations/{other}", token=session.token)
+            if status != 200:
+                raise RuntimeError(f"could not open a conversation for user {uid}: HTTP {status}")
+            session.conversation_id = int(conv["id"])
+            sessions[role].append(session)
+    return sessions
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    """Latency and throughput over the requests that reached a handler; throttled ones are only counted."""
+    endpoints = {}
+    for name in sorted(recorder.statuses):
+        values = sorted(recorder.latencies.get(name, []))
+        statuses = recorder.statuses[name]
+        throttled = recorder.throttled[name]
+        # Shed 503s are in `throttled`, so whatever remains at 5xx is a real error
+        shed = throttled - statuses.get(429, 0)
+        endpoints[name] = {
+            "requests": len(values),
+            "throttled": throttled,
+            "errors": sum(n for status, n in statuses.items() if status == 0 or status >= 500) - shed,
+            "statuses": {str(k): v for k, v in sorted(statuses.items())},
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+            "max_ms": round(values[-1], 3) if values else 0.0,
+        }
+    everything = sorted(v for values in recorder.latencies.values() for v in values)
+    total = {
+        "requests": len(everything),
+        "throttled": sum(e["throttled"] for e in endpoints.values()),
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "throughput_rps": round(len(everything) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(everything, 50), 3),
+        "p95_ms": round(percentile(everything, 95), 3),
+        "p99_ms": round(percentile(everything, 99), 3),
+    }
+    return {"elapsed_s": round(elapsed, 3), "total": total, "endpoints": endpoints}
+
+
+def run(base_url: str, spec: DatasetSpec, mix: str = "mixed", concurrency: int = 16, duration: float = 60.0,
+        warmup: float = 5.0, sessions_per_role: int = 25, seed: int = 1) -> dict:
+    sessions = login_sessions(base_url, spec, sessions_per_role, seed)
+    ops = list(MIXES[mix].items())
+    funcs = [op for op, _ in ops]
+    weights = [w for _, w in ops]
+    recorder = Recorder()
+    measuring = threading.Event()
+    stop = threading.Event()
+
+    def loop(i: int):
+        worker = Worker(base_url, spec, sessions, None, seed * 1000 + i)
+        while not stop.is_set():
+            worker.recorder = recorder if measuring.is_set() else None
+            worker.rng.choices(funcs, weights)[0](worker)
+
+    threads = [threading.Thread(target=loop, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    time.sleep(warmup)
+    measuring.set()
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    elapsed = time.perf_counter() - started
+    for t in threads:
+        t.join()
+    return summarize(recorder, elapsed)
@@ -0,0 +1,201 @@
+"""In-process caches kept coherent across worker processes by an invalidation log.
+
+Writers call invalidate() inside their transaction, so the `cache_invalidations`
+row exists only if the write committed. Every process (the writer included) runs
+a tailer thread that polls the log by id and evicts the named keys; ids that
+commit out of order are tracked as gaps and picked up on a later poll.
+
+Fills are versioned: a value loaded before an invalidation was applied, or within
+the replica lag window after one, is returned to the caller but not stored.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+import database
+from database import cursor, db
+
+logger = logging.getLogger("cache")
+
+_caches = {}
+_lock = threading.Lock()
+# Bumped for every invalidation applied in this process; fills compare against it
+_generation = 0
+_synced = False
+
+
+class Cache:
+    """Bounded LRU with TTL. Values must be treated as read-only by callers."""
+
+    def __init__(self, name: str, ttl: float = None, maxsize: int = None):
+        self.name = name
+        self.ttl = Config.CACHE_TTL_SECONDS if ttl is None else ttl
+        self.maxsize = Config.CACHE_MAX_ENTRIES if maxsize is None else maxsize
+        self._entries = OrderedDict()
+        # key -> (generation, monotonic time) of its last invalidation; bounded like the entries
+        self._stamps = OrderedDict()
+        self._cleared = (0, 0.0)
+        _caches[name] = self
+
+    def get(self, key):
+        with _lock:
+            entry = self._entries.get(key) if _synced else None
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def get_or_load(self, key, loader):
+        """Cached value for `key`, else loader() stored unless it may already be stale."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        generation = _generation
+        value = loader()
+        if value is not None:
+            self._store(key, value, generation)
+        return value
+
+    def _store(self, key, value, generation: int):
+        now = time.monotonic()
+        with _lock:
+            if not _synced:
+                return
+            for stamp_generation, stamped_at in (self._stamps.get(key, (0, 0.0)), self._cleared):
+                if stamp_generation > generation or now - stamped_at < database.DB_REPLICA_LAG_SECONDS:
+                    return
+            self._entries[key] = (value, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _evict(self, key, generation: int):
+        stamp = (generation, time.monotonic())
+        if key is None:
+            self._entries.clear()
+            self._stamps.clear()
+            self._cleared = stamp
+            return
+        self._entries.pop(key, None)
+        self._stamps[key] = stamp
+        self._stamps.move_to_end(key)
+        if len(self._stamps) > self.maxsize:
+            # Too many tombstones to track individually; fall back to a full clear
+            self._evict(None, generation)
+
+
+def invalidate(name: str, key=None):
+    """Queue eviction of `key` (or the whole cache, or every cache for name "*") in every
+    process; the caller commits."""
+    cursor.execute(
+        "INSERT INTO cache_invalidations (cache, cache_key) VALUES (%s, %s)",
+        (name, None if key is None else str(key)),
+    )
+    _apply(name, None if key is None else str(key))
+
+
+def _apply(name: str, key):
+    global _generation
+    if name == "*":
+        _clear_all()
+        return
+    cache = _caches.get(name)
+    if cache is None:
+        return
+    with _lock:
+        _generation += 1
+        cache._evict(key, _generation)
+
+
+def _clear_all():
+    global _generation
+    with _lock:
+        _generation += 1
+        for cache in _caches.values():
+            cache._evict(None, _generation)
+
+
+class _Tailer(threading.Thread):
+    GAP_SECONDS = 30.0
+
+    def __init__(self):
+        super().__init__(name="cache-invalidation-tailer", daemon=True)
+        self.stop_event = threading.Event()
+        self.applied = None
+        self.gaps = {}
+
+    def _poll(self):
+        global _synced
+        if self.applied is None:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) AS id FROM cache_invalidations")
+            self.applied = cursor.fetchone()["id"]
+            db.commit()
+            _clear_all()
+            _synced = True
+            return
+        start = min(self.gaps) - 1 if self.gaps else self.applied
+        cursor.execute(
+            "SELECT id, cache, cache_key FROM cache_invalidations WHERE id > %s ORDER BY id LIMIT 1000",
+            (start,),
+        )
+        rows = cursor.fetchall()
+        db.commit()  # end the read snapshot so the next poll sees new commits
+        now = time.monotonic()
+        for row in rows:
+            if row["id"] <= self.applied and self.gaps.pop(row["id"], None) is None:
+                continue
+            if row["id"] > self.applied:
+                for missing in range(self.applied + 1, row["id"]):
+                    self.gaps[missing] = now + self.GAP_SECONDS
+                self.applied = row["id"]
+            _apply(row["cache"], row["cache_key"])
+        for gap, deadline in list(self.gaps.items()):
+            if deadline < now:
+                del self.gaps[gap]  # rolled back, or a transaction longer than we wait for
+
+    def run(self):
+        global _synced
+        while not self.stop_event.is_set():
+            try:
+                self._poll()
+            except Exception:
+                # Missed invalidations can't be ruled out; serve misses until back in sync
+                logger.exception("Cache invalidation poll failed")
+                _synced = False
+                self.applied = None
+                self.gaps.clear()
+            finally:
+                # Hand the connection back between polls instead of pinning a pool slot
+                database.current_binding().release()
+            self.stop_event.wait(Config.CACHE_POLL_SECONDS)
+
+
+_tailer = None
+
+
+def start():
+    global _tailer
+    if _tailer is None:
+        _tailer = _Tailer()
+        _tailer.start()
+
+
+def stop():
+    global _tailer, _synced
+    if _tailer is not None:
+        _tailer.stop_event.set()
+        _tailer.join(timeout=5)
+        _tailer = None
+    _synced = False
+
+
+def purge_log():
+    """Drop log rows every tailer has long since read."""
+    cursor.execute(
+        "DELETE FROM cache_invalidations WHERE created_at < NOW() - INTERVAL %s SECOND LIMIT 1000",
+        (Config.CACHE_LOG_RETENTION_SECONDS,),
+    )
+    db.commit()
+    return cursor.rowcount
@@ -0,0 +1,101 @@
+"""Career history and the precomputed transition matrix.
+
+Every change of organization, role or industry made through the profile appends
+a `role_history` row. The worker periodically folds consecutive history rows
+into `career_transitions`: one row per (kind, from, to) with the number of
+people who made that move and the median time they spent in the earlier
+position. "Common next moves from X" is then a primary-key prefix read.
+"""
+import logging
+import statistics
+from collections import defaultdict
+
+from database import cursor, db
+
+logger = logging.getLogger("careers")
+
+TRACKED_FIELDS = ("current_organization", "current_role", "industry")
+
+
+def normalize(value: str) -> str:
+    return " ".join(value.lower().split())[:191] if value else ""
+
+
+def record_change(user_id: int, before: dict, updates: dict):
+    """Append a history row if the update changes any tracked field; the caller commits."""
+    after = {f: updates.get(f, before.get(f)) for f in TRACKED_FIELDS}
+    if all(normalize(after[f]) == normalize(before.get(f)) for f in TRACKED_FIELDS):
+        return
+    cursor.execute(
+        "INSERT INTO role_history (user_id, organization, role, industry) VALUES (%s, %s, %s, %s)",
+        (user_id, after["current_organization"], after["current_role"], after["industry"]),
+    )
+
+
+def record_initial(user_id: int, organization: str, role: str, industry: str = None):
+    if organization or role or industry:
+        cursor.execute(
+            "INSERT INTO role_history (user_id, organization, role, industry) VALUES (%s, %s, %s, %s)",
+            (user_id, organization, role, industry),
+        )
+
+
+def _transitions(rows) -> dict:
+    """(kind, from_key, to_key) -> [tenure days, ...] from rows ordered by user, then start."""
+    moves = defaultdict(list)
+    user_id = None
+    # kind -> (value, started_at) of the user's current run; an organization-only change doesn't end a role run
+    runs = {}
+    for row in rows:
+        if row["user_id"] != user_id:
+            user_id, runs = row["user_id"], {}
+        for kind in ("role", "industry"):
+            value = normalize(row[kind])
+            if not value:
+                continue
+            run = runs.get(kind)
+            if run and run[0] != value:
+                moves[(kind, run[0], value)].append(max((row["started_at"] - run[1]).days, 0))
+            if not run or run[0] != value:
+                runs[kind] = (value, row["started_at"])
+    return moves
+
+
+def refresh_transitions() -> int:
+    """Recompute the whole matrix; returns the number of transition rows. Single runner via a named lock."""
+    cursor.execute("SELECT GET_LOCK('career_transitions_refresh', 0) AS got")
+    if not cursor.fetchone()["got"]:
+        return 0
+    try:
+        cursor.execute("SELECT user_id, role, industry, started_at FROM role_history ORDER BY user_id, started_at, id")
+        moves = _transitions(cursor.fetchall())
+        # Replace in one transaction: readers keep seeing the previous matrix until commit
+        cursor.execute("DELETE FROM career_transitions")
+        if moves:
+            cursor.executemany(
+                "INSERT INTO career_transitions (kind, from_key, to_key, move_count, median_tenure_days) VALUES (%s, %s, %s, %s, %s)",
+                [(kind, src, dst, len(t), int(statistics.median(t))) for (kind, src, dst), t in moves.items()],
+            )
+        db.commit()
+        logger.info("Career transitions refreshed: %d moves", len(moves))
+        return len(moves)
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK('career_transitions_refresh')")
+        cursor.fetchall()
+
+
+def next_moves(kind: str, source: str, limit: int) -> list:
+    cursor.execute(
+        "SELECT to_key, move_count, median_tenure_days, SUM(move_count) OVER () AS total FROM career_transitions "
+        "WHERE kind = %s AND from_key = %s ORDER BY move_count DESC, to_key LIMIT %s",
+        (kind, normalize(source), limit),
+    )
+    return [
+        {
+            "to": r["to_key"],
+            "count": r["move_count"],
+            "share": round(r["move_count"] / r["total"], 3),
+            "medianTenureMonths": round(r["median_tenure_days"] / 30.44, 1),
+        }
+        for r in cursor.fetchall()
+    ]
@@ -8,6 +8,106 @@ class Config:
     DEBUG = os.getenv('DEBUG', 'False') == 'True'
     ENV = os.getenv('ENV', 'development')
 
+    # Instrumentation
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+    SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', '200'))
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', '10'))
+
+    # Sampling profiler (off unless a sample rate or a slow threshold is set)
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', '0'))
+    PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
+
+    # Background task queue (see tasks.py / worker.py)
+    TASK_BATCH_SIZE = int(os.getenv('TASK_BATCH_SIZE', '100'))
+    TASK_POLL_SECONDS = float(os.getenv('TASK_POLL_SECONDS', '1'))
+    TASK_MAX_ATTEMPTS = int(os.getenv('TASK_MAX_ATTEMPTS', '5'))
+    TASK_BACKOFF_SECONDS = float(os.getenv('TASK_BACKOFF_SECONDS', '5'))
+    TASK_BACKOFF_MAX_SECONDS = float(os.getenv('TASK_BACKOFF_MAX_SECONDS', '900'))
+    TASK_LEASE_SECONDS = int(os.getenv('TASK_LEASE_SECONDS', '300'))
+    TASK_RETENTION_HOURS = int(os.getenv('TASK_RETENTION_HOURS', '72'))
+
+    # Outgoing mail; point at a local stand-in such as `python -m aiosmtpd -n -l localhost:1025`
+    SMTP_HOST = os.getenv('SMTP_HOST', 'localhost')
+    SMTP_PORT = int(os.getenv('SMTP_PORT', '1025'))
+    MAIL_FROM = os.getenv('MAIL_FROM', 'no-reply@smart-alumni.local')
+
+    # In-process caches and the cross-process invalidation log (see cache.py)
+    CACHE_TTL_SECONDS = float(os.getenv('CACHE_TTL_SECONDS', '300'))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+    CACHE_POLL_SECONDS = float(os.getenv('CACHE_POLL_SECONDS', '0.5'))
+    CACHE_LOG_RETENTION_SECONDS = int(os.getenv('CACHE_LOG_RETENTION_SECONDS', '3600'))
+
+    # Admission control (see ratelimit.py); rates are requests/second per caller
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True') == 'True'
+    RATE_LIMIT_READ_RATE = float(os.getenv('RATE_LIMIT_READ_RATE', '20'))
+    RATE_LIMIT_READ_BURST = float(os.getenv('RATE_LIMIT_READ_BURST', '40'))
+    RATE_LIMIT_WRITE_RATE = float(os.getenv('RATE_LIMIT_WRITE_RATE', '5'))
+    RATE_LIMIT_WRITE_BURST = float(os.getenv('RATE_LIMIT_WRITE_BURST', '10'))
+    RATE_LIMIT_EXPENSIVE_RATE = float(os.getenv('RATE_LIMIT_EXPENSIVE_RATE', '1'))
+    RATE_LIMIT_EXPENSIVE_BURST = float(os.getenv('RATE_LIMIT_EXPENSIVE_BURST', '5'))
+    # Matched exactly, not as prefixes
+    RATE_LIMIT_EXPENSIVE_PATHS = [
+        p.strip() for p in os.getenv(
+            'RATE_LIMIT_EXPENSIVE_PATHS', '/users/alumni,/users/students,/messages/conversations,/dashboard'
+        ).split(',') if p.strip()
+    ]
+    RATE_LIMIT_QUEUE_MS = float(os.getenv('RATE_LIMIT_QUEUE_MS', '250'))
+    ADMISSION_EXPENSIVE_CONCURRENCY = int(os.getenv('ADMISSION_EXPENSIVE_CONCURRENCY', '8'))
+    ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv('ADMISSION_QUEUE_TIMEOUT_MS', '500'))
+    ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', '64'))
+
+    # Mentor matching (see matching.py)
+    MENTOR_DEFAULT_CAPACITY = int(os.getenv('MENTOR_DEFAULT_CAPACITY', '5'))
+    MENTOR_ASSIGN_BATCH_SIZE = int(os.getenv('MENTOR_ASSIGN_BATCH_SIZE', '500'))
+
+    # Coffee chat scheduling (see scheduling.py); bookings are made of SLOT_MINUTES steps
+    COFFEE_SLOT_MINUTES = int(os.getenv('COFFEE_SLOT_MINUTES', '15'))
+    COFFEE_HORIZON_DAYS = int(os.getenv('COFFEE_HORIZON_DAYS', '60'))
+    COFFEE_MAX_GROUP = int(os.getenv('COFFEE_MAX_GROUP', '10'))
+
+    # Connection graph (see network.py)
+    NETWORK_REFRESH_SECONDS = int(os.getenv('NETWORK_REFRESH_SECONDS', '300'))
+    NETWORK_SUGGESTIONS = int(os.getenv('NETWORK_SUGGESTIONS', '20'))
+    NETWORK_BFS_LIMIT = int(os.getenv('NETWORK_BFS_LIMIT', '20000'))
+    NETWORK_GROUP_CANDIDATES = int(os.getenv('NETWORK_GROUP_CANDIDATES', '50'))
+
+    # Career transition matrix rebuild period (see careers.py)
+    CAREER_REFRESH_SECONDS = int(os.getenv('CAREER_REFRESH_SECONDS', '3600'))
+
+    # Insights snapshot: incremental refresh period, and age at which it is rebuilt from scratch (see insights.py)
+    INSIGHTS_REFRESH_SECONDS = int(os.getenv('INSIGHTS_REFRESH_SECONDS', '30'))
+    INSIGHTS_REBUILD_SECONDS = int(os.getenv('INSIGHTS_REBUILD_SECONDS', '3600'))
+
+    # Newest stories held in memory per feed for first pages (see routers/stories.py)
+    STORIES_HOT_SIZE = int(os.getenv('STORIES_HOT_SIZE', '100'))
+
+    # Uploaded avatars and resumes (see uploads.py)
+    UPLOAD_DIR = os.getenv('UPLOAD_DIR', 'uploads')
+    UPLOAD_CHUNK_BYTES = int(os.getenv('UPLOAD_CHUNK_BYTES', str(64 * 1024)))
+    UPLOAD_MAX_AVATAR_BYTES = int(os.getenv('UPLOAD_MAX_AVATAR_BYTES', str(5 * 1024 * 1024)))
+    UPLOAD_MAX_RESUME_BYTES = int(os.getenv('UPLOAD_MAX_RESUME_BYTES', str(10 * 1024 * 1024)))
+    UPLOAD_THUMB_WORKERS = int(os.getenv('UPLOAD_THUMB_WORKERS', '2'))
+    AVATAR_THUMB_SIZES = tuple(int(s) for s in os.getenv('AVATAR_THUMB_SIZES', '64,256').split(','))
+
+    # Dashboard bootstrap payload caps (see routers/dashboard.py)
+    DASHBOARD_SECTION_LIMIT = int(os.getenv('DASHBOARD_SECTION_LIMIT', '5'))
+    DASHBOARD_TEXT_CHARS = int(os.getenv('DASHBOARD_TEXT_CHARS', '280'))
+
+    # Ids accepted by one /users|/jobs|/events batch request
+    BATCH_MAX_IDS = int(os.getenv('BATCH_MAX_IDS', '200'))
+
+    # Hot/cold archival run by the worker (see archive.py)
+    ARCHIVE_INTERVAL_SECONDS = int(os.getenv('ARCHIVE_INTERVAL_SECONDS', '3600'))
+    ARCHIVE_MESSAGE_MONTHS = int(os.getenv('ARCHIVE_MESSAGE_MONTHS', '12'))
+    ARCHIVE_EVENT_DAYS = int(os.getenv('ARCHIVE_EVENT_DAYS', '30'))
+    ARCHIVE_JOB_DAYS = int(os.getenv('ARCHIVE_JOB_DAYS', '90'))
+    ARCHIVE_BATCH_ROWS = int(os.getenv('ARCHIVE_BATCH_ROWS', '500'))
+    ARCHIVE_MAX_BATCHES = int(os.getenv('ARCHIVE_MAX_BATCHES', '20'))
+    ARCHIVE_PAUSE_SECONDS = float(os.getenv('ARCHIVE_PAUSE_SECONDS', '0.5'))
+
 class ProductionConfig(Config):
     """
     Production configuration
@@ -1,7 +1,25 @@
-<<<<<<< HEAD
+"""MySQL connections: a primary pool, optional replica pools, and per-request routing.
+
+Routers keep using the module-level `cursor` and `db`. Both are proxies that resolve
+to the connection bound to the current request by ConnectionMiddleware: GET/HEAD
+requests read from a replica, everything else (and any request carrying a fresh
+consistency token) goes to the primary. Code running outside a request, such as
+scripts and workers, gets a per-thread primary connection.
+"""
+import contextvars
+import logging
 import mysql.connector
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from itertools import count
 from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+import metrics
 
 # Load environment variables
 load_dotenv()
@@ -10,35 +28,393 @@ DB_HOST = os.getenv("DB_HOST")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
+DB_PORT = int(os.getenv("DB_PORT", "3306"))
+
+# Comma-separated host[:port] list; replicas share the primary's credentials.
+DB_REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+# Connections per pool opened during startup warm-up, before the worker reports ready.
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", "2"))
+# Upper bound on replication lag; reads stay on the primary this long after a write.
+DB_REPLICA_LAG_SECONDS = float(os.getenv("DB_REPLICA_LAG_SECONDS", "2"))
+# Threads shared by all fan_out() calls, and how long a fanned-out query waits for a free connection
+# before it is run on the caller's own connection instead.
+DB_FANOUT_WORKERS = int(os.getenv("DB_FANOUT_WORKERS", "16"))
+DB_FANOUT_ACQUIRE_TIMEOUT = float(os.getenv("DB_FANOUT_ACQUIRE_TIMEOUT", "0.05"))
+
+# Every session runs in UTC, so CURRENT_TIMESTAMP, NOW() and CURDATE() read the same clock as
+# timestamps the app computes (writes.now(), scheduling) whatever the server's own time zone.
+SESSION_TIME_ZONE = "+00:00"
+
+CONSISTENCY_HEADER = "X-Consistency-Token"
+
+logger = logging.getLogger("database")
+
+
+class PoolTimeout(Exception):
+    """No connection became free within DB_POOL_TIMEOUT."""
+
+
+class TracedCursor:
+    """Cursor wrapper that reports every statement's duration to the metrics registry."""
+
+    def __init__(self, inner):
+        self._inner = inner
+
+    def execute(self, operation, params=None):
+        start = time.perf_counter()
+        try:
+            return self._inner.execute(operation, params)
+        finally:
+            metrics.record_query(operation, time.perf_counter() - start)
+
+    def executemany(self, operation, seq_params):
+        start = time.perf_counter()
+        try:
+            return self._inner.executemany(operation, seq_params)
+        finally:
+            metrics.record_query(operation, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def __iter__(self):
+        return iter(self._inner)
+
+
+class ConnectionPool:
+    """Bounded LIFO pool; connections are opened on demand and pinged only after idling."""
+
+    IDLE_PING_SECONDS = 30
+
+    def __init__(self, name: str, size: int, autocommit: bool = False, **params):
+        self.name = name
+        self.size = size
+        self._params = dict(params, autocommit=autocommit)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self, timeout: float = None):
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT if timeout is None else timeout):
+            raise PoolTimeout(f"{self.name} pool exhausted")
+        try:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return mysql.connector.connect(**self._params)
+            if time.monotonic() - last_used > self.IDLE_PING_SECONDS:
+                conn.ping(reconnect=True, attempts=2)
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put((conn, time.monotonic()))
+        except mysql.connector.Error:
+            try:
+                conn.close()
+            except mysql.connector.Error:
+                pass
+        finally:
+            self._slots.release()
+
+    def warm(self, n: int):
+        """Open up to `n` connections now so the first requests don't pay for the handshake."""
+        conns = []
+        try:
+            for _ in range(min(n, self.size)):
+                conn = self.acquire()
+                conns.append(conn)
+                cur = conn.cursor()
+                cur.execute("SELECT 1")
+                cur.fetchall()
+                cur.close()
+        finally:
+            for conn in conns:
+                self.release(conn)
+
+    def ping(self, timeout: float = 1.0):
+        """Round-trip SELECT 1 on a pooled connection; raises if the pool or server is unavailable."""
+        conn = self.acquire(timeout=timeout)
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchall()
+            cur.close()
+        finally:
+            self.release(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.close()
+            except mysql.connector.Error:
+                pass
+
+
+def _connection_params(host: str) -> dict:
+    name, _, port = host.partition(":")
+    return {"host": name, "port": int(port) if port else DB_PORT, "user": DB_USER, "password": DB_PASSWORD, "database": DB_NAME,
+            "time_zone": SESSION_TIME_ZONE}
+
+
+primary_pool = ConnectionPool("primary", DB_POOL_SIZE, **_connection_params(DB_HOST or "localhost"))
+replica_pools = [
+    ConnectionPool(f"replica{i}", DB_POOL_SIZE, autocommit=True, **_connection_params(host))
+    for i, host in enumerate(DB_REPLICA_HOSTS)
+]
+_replica_turn = count()
+
+
+def all_pools() -> list:
+    return [primary_pool] + replica_pools
+
+
+def warm_up():
+    """Open connections ahead of traffic. The primary must succeed; replicas are best-effort."""
+    primary_pool.warm(DB_POOL_WARM)
+    for pool in replica_pools:
+        try:
+            pool.warm(DB_POOL_WARM)
+        except mysql.connector.Error:
+            pass
+
+
+def readiness(timeout: float = 1.0) -> dict:
+    """Pool name -> "ok" or the error that made its ping fail."""
+    status = {}
+    for pool in all_pools():
+        try:
+            pool.ping(timeout)
+            status[pool.name] = "ok"
+        except Exception as e:
+            status[pool.name] = f"{type(e).__name__}: {e}"
+    return status
+
+
+def close_pools():
+    for pool in all_pools():
+        pool.close()
+
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "ALTER", "DROP", "TRUNCATE")
+
 
-print("DB_HOST:", DB_HOST)
-print("DB_USER:", DB_USER)
-print("DB_NAME:", DB_NAME)
+def is_write(sql: str) -> bool:
+    head = sql.lstrip()[:8].upper()
+    return head.startswith(_WRITE_PREFIXES) or " FOR UPDATE" in sql.upper()
 
-db = mysql.connector.connect(
-    host=DB_HOST,
-    user=DB_USER,
-    password=DB_PASSWORD,
-    database=DB_NAME
-)
 
-cursor = db.cursor(dictionary=True)
-=======
-from sqlalchemy import create_engine, sessionmaker
+class Binding:
+    """Connections checked out on behalf of one request (or one background thread)."""
 
-# SQLAlchemy Database Setup
-DATABASE_URL = "sqlite:///./test.db"  # Change for your database
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    def __init__(self, read_only: bool = False, acquire_timeout: float = None):
+        self.read_only = read_only and bool(replica_pools)
+        self.acquire_timeout = acquire_timeout
+        self.wrote = False
+        self._conns = {}
+        self._cursors = {}
+        self.current = None
 
-# Session Management
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    @property
+    def checked_out(self) -> bool:
+        return bool(self._conns)
 
-# Dependency to get DB session
+    def _target(self) -> str:
+        return "replica" if self.read_only else "primary"
 
-def get_db():
-    db = SessionLocal()
+    def _checkout(self, target: str):
+        if target == "primary":
+            return primary_pool, primary_pool.acquire(self.acquire_timeout)
+        start = next(_replica_turn)
+        for i in range(len(replica_pools)):
+            pool = replica_pools[(start + i) % len(replica_pools)]
+            try:
+                return pool, pool.acquire(timeout=0.05 if i < len(replica_pools) - 1 else self.acquire_timeout)
+            except (PoolTimeout, mysql.connector.Error):
+                continue
+        return primary_pool, primary_pool.acquire(self.acquire_timeout)
+
+    def cursor(self, sql: str = "") -> TracedCursor:
+        if sql and self.read_only and is_write(sql):
+            self.read_only = False
+        target = self._target()
+        if target not in self._cursors:
+            pool, conn = self._checkout(target)
+            self._conns[target] = (pool, conn)
+            self._cursors[target] = TracedCursor(conn.cursor(dictionary=True))
+        if sql and is_write(sql):
+            self.wrote = True
+        self.current = self._cursors[target]
+        return self.current
+
+    def connection(self):
+        self.cursor()
+        return self._conns[self._target()][1]
+
+    def commit(self):
+        if "primary" in self._conns:
+            self._conns["primary"][1].commit()
+
+    def rollback(self):
+        if "primary" in self._conns:
+            self._conns["primary"][1].rollback()
+
+    def release(self):
+        for target, (pool, conn) in self._conns.items():
+            try:
+                self._cursors[target].close()
+            except mysql.connector.Error:
+                pass
+            pool.release(conn)
+        self._conns.clear()
+        self._cursors.clear()
+        self.current = None
+
+
+_binding: ContextVar = ContextVar("db_binding", default=None)
+_thread = threading.local()
+
+
+def current_binding() -> Binding:
+    binding = _binding.get()
+    if binding is None:
+        binding = getattr(_thread, "binding", None)
+        if binding is None:
+            binding = _thread.binding = Binding()
+    return binding
+
+
+_fanout_executor = None
+_fanout_lock = threading.Lock()
+
+
+def _run_bound(binding: Binding, fn):
+    _binding.set(binding)
     try:
-        yield db
+        return fn()
     finally:
-        db.close()
->>>>>>> 19ba7efd8ff9a9b742326274a4c48ecf8ab248d6
+        binding.release()
+
+
+def fan_out(calls: dict) -> dict:
+    """Run independent read-only callables concurrently, each on its own pooled connection.
+
+    Returns name -> result, or the exception the call raised. A call that can't get a
+    connection within DB_FANOUT_ACQUIRE_TIMEOUT runs afterwards on the caller's binding,
+    so a busy pool degrades to sequential queries instead of stalling.
+    """
+    global _fanout_executor
+    with _fanout_lock:
+        if _fanout_executor is None:
+            _fanout_executor = ThreadPoolExecutor(DB_FANOUT_WORKERS, thread_name_prefix="db-fanout")
+    parent = current_binding()
+    futures = {
+        # A copy of the caller's context per call keeps metrics attribution; the binding is the call's own
+        name: _fanout_executor.submit(
+            contextvars.copy_context().run, _run_bound,
+            Binding(read_only=parent.read_only, acquire_timeout=DB_FANOUT_ACQUIRE_TIMEOUT), fn,
+        )
+        for name, fn in calls.items()
+    }
+    results, starved = {}, []
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except PoolTimeout:
+            starved.append(name)
+        except Exception as e:
+            logger.exception("Fanned-out call %s failed", name)
+            results[name] = e
+    for name in starved:
+        try:
+            results[name] = calls[name]()
+        except Exception as e:
+            logger.exception("Fanned-out call %s failed", name)
+            results[name] = e
+    return results
+
+
+def use_primary():
+    """Route dependency for GET handlers that write, e.g. get-or-create lookups."""
+    current_binding().read_only = False
+
+
+class _CursorProxy:
+    def execute(self, operation, params=None):
+        return current_binding().cursor(operation).execute(operation, params)
+
+    def executemany(self, operation, seq_params):
+        return current_binding().cursor(operation).executemany(operation, seq_params)
+
+    def __getattr__(self, name):
+        binding = current_binding()
+        return getattr(binding.current or binding.cursor(), name)
+
+
+class _ConnectionProxy:
+    def commit(self):
+        current_binding().commit()
+
+    def rollback(self):
+        current_binding().rollback()
+
+    def __getattr__(self, name):
+        return getattr(current_binding().connection(), name)
+
+
+cursor = _CursorProxy()
+db = _ConnectionProxy()
+
+
+def _pinned(headers) -> bool:
+    for key, value in headers:
+        if key == b"x-consistency-token":
+            try:
+                age = time.time() * 1000 - int(value)
+            except ValueError:
+                return False
+            # A token from the future is not one we issued; honouring it would pin the client indefinitely
+            return 0 <= age < DB_REPLICA_LAG_SECONDS * 1000
+    return False
+
+
+class ConnectionMiddleware:
+    """Binds a connection set to each HTTP request and returns it to the pools afterwards.
+
+    Responses to requests that wrote carry an X-Consistency-Token; clients echo it so
+    their reads stay on the primary until replicas have had time to catch up.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        read_only = scope["method"] in ("GET", "HEAD") and not _pinned(scope["headers"])
+        binding = Binding(read_only=read_only)
+        token = _binding.set(binding)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and binding.wrote:
+                headers = list(message.get("headers", []))
+                headers.append((CONSISTENCY_HEADER.lower().encode(), str(int(time.time() * 1000)).encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _binding.reset(token)
+            if binding.checked_out:
+                await run_in_threadpool(binding.release)
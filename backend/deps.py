@@ -1,15 +1,38 @@
 """Dependencies: JWT auth and current user."""
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 import os
 
+from config import Config
 from security import ALGORITHM
 from database import cursor
+import cache
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 bearer = HTTPBearer(auto_error=False)
 
+# Auth lookups by token email; every authenticated request goes through here
+users_by_email = cache.Cache("users")
+
+
+def _load_user(email: str):
+    cursor.execute(
+        "SELECT id, name, email, role, is_approved, graduation_year, current_organization, "
+        "current_role, industry, department, batch, phone, location, bio, linkedin, avatar, created_at "
+        "FROM users WHERE email = %s",
+        (email,),
+    )
+    return cursor.fetchone()
+
+
+def invalidate_user(user_id: int):
+    """Evict a user's cached row everywhere once the caller's transaction commits."""
+    cursor.execute("SELECT email FROM users WHERE id = %s", (user_id,))
+    row = cursor.fetchone()
+    if row:
+        cache.invalidate("users", row["email"])
+
 
 def get_current_user_id(
     credentials: HTTPAuthorizationCredentials | None = Depends(bearer),
@@ -28,8 +51,7 @@ def get_current_user_id(
             raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    cursor.execute("SELECT id, name, email, role, is_approved FROM users WHERE email = %s", (email,))
-    user = cursor.fetchone()
+    user = users_by_email.get_or_load(email, lambda: _load_user(email))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     if user.get("role") == "alumni" and not user.get("is_approved"):
@@ -54,21 +76,29 @@ def get_current_user(
             raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    cursor.execute(
-        "SELECT id, name, email, role, is_approved, graduation_year, current_organization, "
-        "current_role, department, batch, phone, location, bio, linkedin, avatar, created_at "
-        "FROM users WHERE email = %s",
-        (email,),
-    )
-    user = cursor.fetchone()
+    user = users_by_email.get_or_load(email, lambda: _load_user(email))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     if user.get("role") == "alumni" and not user.get("is_approved"):
         raise HTTPException(status_code=403, detail="Alumni approval pending")
-    return user
+    return dict(user)
 
 
 def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
     if current_user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
     return current_user
+
+
+def batch_ids(ids: str = Query(..., description="Comma-separated ids")) -> list:
+    """Distinct ids from a batch multi-get, in first-seen order."""
+    try:
+        parsed = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    distinct = list(dict.fromkeys(parsed))
+    if not distinct:
+        raise HTTPException(status_code=400, detail="Give at least one id")
+    if len(distinct) > Config.BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {Config.BATCH_MAX_IDS} ids per request")
+    return distinct
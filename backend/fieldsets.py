@@ -0,0 +1,45 @@
+"""Sparse fieldsets: `?fields=id,name` on read endpoints.
+
+A resource declares which SQL expressions each response key needs. The
+requested keys decide both the SELECT list and which keys the serialized item
+keeps, so a picker that only renders names reads and sends only names. Without
+`fields`, every key is returned, as before.
+"""
+from typing import Optional
+
+from fastapi import HTTPException
+
+
+class FieldSet:
+    def __init__(self, columns: dict, always=("id",)):
+        # response key -> tuple of SQL expressions (with any AS alias) it is built from
+        self.columns = columns
+        self.always = tuple(always)
+
+    def parse(self, raw: Optional[str]) -> Optional[tuple]:
+        """Requested keys in declaration order, or None for all; unknown keys are a 400."""
+        if raw is None or not raw.strip():
+            return None
+        wanted = {f.strip() for f in raw.split(",") if f.strip()}
+        unknown = wanted - set(self.columns)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(self.columns)}",
+            )
+        wanted.update(self.always)
+        return tuple(k for k in self.columns if k in wanted)
+
+    def sql(self, keys: Optional[tuple]) -> str:
+        """SELECT list for the keys, each expression once."""
+        exprs = {}
+        for key in self.columns if keys is None else keys:
+            for expr in self.columns[key]:
+                exprs.setdefault(expr, None)
+        return ", ".join(exprs)
+
+    def wants(self, keys: Optional[tuple], key: str) -> bool:
+        return keys is None or key in keys
+
+    def prune(self, item: dict, keys: Optional[tuple]) -> dict:
+        return item if keys is None else {k: item[k] for k in keys if k in item}
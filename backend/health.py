@@ -0,0 +1,71 @@
+"""Startup warm-up and the liveness/readiness probes.
+
+The process starts serving immediately; /healthz answers as soon as the event loop
+runs, while /readyz stays 503 until warm-up has opened the database pools and the
+primary answers a ping. Orchestrators route traffic on /readyz only.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+import cache
+import database
+import uploads
+
+logger = logging.getLogger("health")
+
+router = APIRouter(tags=["health"])
+
+WARM_UP_RETRY_SECONDS = 2.0
+WARM_UP_RETRY_MAX_SECONDS = 30.0
+
+_state = {"warm": False}
+
+
+async def _warm_up():
+    delay = WARM_UP_RETRY_SECONDS
+    while True:
+        try:
+            await run_in_threadpool(database.warm_up)
+        except Exception as e:
+            logger.warning("Warm-up failed (%s); retrying in %.0fs", e, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARM_UP_RETRY_MAX_SECONDS)
+            continue
+        _state["warm"] = True
+        logger.info("Warm-up complete")
+        return
+
+
+@asynccontextmanager
+async def lifespan(app):
+    warming = asyncio.create_task(_warm_up())
+    cache.start()
+    try:
+        yield
+    finally:
+        warming.cancel()
+        await run_in_threadpool(cache.stop)
+        uploads.shutdown()
+        await run_in_threadpool(database.close_pools)
+
+
+@router.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    if not _state["warm"]:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    pools = await run_in_threadpool(database.readiness)
+    # Replicas are optional: reads fall back to the primary when one is down
+    ready = pools[database.primary_pool.name] == "ok"
+    degraded = any(v != "ok" for v in pools.values())
+    status = "degraded" if ready and degraded else "ready" if ready else "unavailable"
+    return JSONResponse(status_code=200 if ready else 503, content={"status": status, "pools": pools})
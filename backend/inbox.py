@@ -0,0 +1,203 @@
+"""Notification inbox storage with hybrid fan-out.
+
+Targeted notifications are copied into each recipient's `notifications` rows
+(fan-out on write). Broadcasts to a whole audience ('all' or a role) are stored
+once in `notification_broadcasts`, numbered by a per-audience sequence, and
+merged into inboxes at read time (fan-out on read).
+
+A user's unread badge is `unread_direct` plus, for each stream they follow, the
+distance between the stream's sequence and the position they last read, so it is
+answered from a handful of primary-key lookups whatever the inbox size.
+"""
+from collections import Counter
+from datetime import datetime
+
+from database import cursor
+
+AUDIENCES = ("all", "student", "alumni", "admin")
+NOTIFICATION_TYPES = ("event", "job", "user", "message", "system", "mentorship")
+
+
+def _stream_seq_sql(audience_expr: str) -> str:
+    return f"COALESCE((SELECT seq FROM notification_streams WHERE audience = {audience_expr}), 0)"
+
+
+_ALL_SEQ = _stream_seq_sql("'all'")
+_USER_ROLE_SEQ = _stream_seq_sql("u.role")
+_ROLE_SEQ = _stream_seq_sql("%s")
+
+
+def ensure_state(user_id: int):
+    """Start a user's broadcast cursors at the current stream heads (no backlog)."""
+    cursor.execute(
+        f"INSERT IGNORE INTO notification_state (user_id, unread_direct, seen_all_seq, seen_role_seq) "
+        f"SELECT u.id, 0, {_ALL_SEQ}, {_USER_ROLE_SEQ} FROM users u WHERE u.id = %s",
+        (user_id,),
+    )
+
+
+def notify_users(notifications: list):
+    """Fan out on write. Each item: user_id, type, title, message, action_url, priority."""
+    if not notifications:
+        return
+    cursor.executemany(
+        "INSERT INTO notifications (user_id, type, title, message, action_url, priority) VALUES (%s, %s, %s, %s, %s, %s)",
+        [
+            (n["user_id"], n["type"], n["title"], n["message"], n.get("action_url"), n.get("priority") or "medium")
+            for n in notifications
+        ],
+    )
+    per_user = Counter(n["user_id"] for n in notifications)
+    cursor.executemany(
+        f"INSERT INTO notification_state (user_id, unread_direct, seen_all_seq, seen_role_seq) "
+        f"SELECT u.id, %s, {_ALL_SEQ}, {_USER_ROLE_SEQ} FROM users u WHERE u.id = %s "
+        f"ON DUPLICATE KEY UPDATE unread_direct = unread_direct + %s",
+        [(n, user_id, n) for user_id, n in sorted(per_user.items())],
+    )
+
+
+def broadcast(audience: str, type: str, title: str, message: str, action_url: str = None, priority: str = "medium") -> int:
+    """Fan out on read: one row however many users the audience has. Returns the broadcast id."""
+    if audience not in AUDIENCES:
+        raise ValueError(f"Unknown audience {audience!r}")
+    cursor.execute(
+        "INSERT INTO notification_streams (audience, seq) VALUES (%s, 1) "
+        "ON DUPLICATE KEY UPDATE seq = LAST_INSERT_ID(seq + 1)",
+        (audience,),
+    )
+    seq = cursor.lastrowid or 1
+    cursor.execute(
+        "INSERT INTO notification_broadcasts (audience, seq, type, title, message, action_url, priority) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+        (audience, seq, type, title, message, action_url, priority),
+    )
+    return cursor.lastrowid
+
+
+def _state(user_id: int, role: str) -> dict:
+    cursor.execute(
+        f"SELECT s.unread_direct, s.seen_all_seq, s.seen_role_seq, "
+        f"{_ALL_SEQ} AS all_seq, {_ROLE_SEQ} AS role_seq "
+        f"FROM notification_state s WHERE s.user_id = %s",
+        (role, user_id),
+    )
+    return cursor.fetchone()
+
+
+def unread_count(user_id: int, role: str) -> int:
+    state = _state(user_id, role)
+    if state is None:
+        return 0
+    return (
+        state["unread_direct"]
+        + max(state["all_seq"] - state["seen_all_seq"], 0)
+        + max(state["role_seq"] - state["seen_role_seq"], 0)
+    )
+
+
+def _direct_to_dict(row: dict) -> dict:
+    return {
+        "id": f"n{row['id']}",
+        "type": row["type"],
+        "title": row["title"],
+        "message": row["message"],
+        "timestamp": str(row["created_at"]) if row.get("created_at") else "",
+        "read": bool(row["is_read"]),
+        "actionUrl": row.get("action_url"),
+        "priority": row.get("priority") or "medium",
+    }
+
+
+def _broadcast_to_dict(row: dict, read: bool) -> dict:
+    return {
+        "id": f"b{row['id']}",
+        "type": row["type"],
+        "title": row["title"],
+        "message": row["message"],
+        "timestamp": str(row["created_at"]) if row.get("created_at") else "",
+        "read": read,
+        "actionUrl": row.get("action_url"),
+        "priority": row.get("priority") or "medium",
+    }
+
+
+_STAMP = "%Y%m%d%H%M%S"
+
+
+def _format_cursor(positions: list) -> str:
+    return ".".join("" if p is None else f"{p[0]:{_STAMP}}_{p[1]}" for p in positions)
+
+
+def _parse_cursor(value: str) -> list:
+    """One (created_at, id) keyset position per stream (direct, 'all', role); None where a stream has none yet."""
+    parts = value.split(".")
+    if len(parts) != 3:
+        raise ValueError("Invalid cursor")
+    positions = []
+    for part in parts:
+        if not part:
+            positions.append(None)
+            continue
+        stamp, _, row_id = part.partition("_")
+        positions.append((datetime.strptime(stamp, _STAMP), int(row_id)))
+    return positions
+
+
+_DIRECT = "SELECT id, type, title, message, action_url, priority, is_read, created_at FROM notifications WHERE user_id = %s"
+_BROADCASTS = "SELECT id, seq, type, title, message, action_url, priority, created_at FROM notification_broadcasts WHERE audience = %s"
+
+
+def list_inbox(user_id: int, role: str, limit: int = 30, before: str = None) -> dict:
+    """Newest first: the user's own rows merged with both broadcast streams.
+
+    TIMESTAMP only has second resolution and a fan-out inserts many rows in the
+    same second, so each stream pages by (created_at, id) and `nextCursor`
+    records where each of the three stopped. Raises ValueError for a bad cursor.
+    """
+    state = _state(user_id, role) or {"seen_all_seq": 0, "seen_role_seq": 0}
+    positions = _parse_cursor(before) if before else [None, None, None]
+    streams = [(_DIRECT, user_id, None), (_BROADCASTS, "all", state["seen_all_seq"]), (_BROADCASTS, role, state["seen_role_seq"])]
+    items = []
+    more = False
+    for stream, (select, key, seen) in enumerate(streams):
+        position = positions[stream]
+        keyset = " AND (created_at, id) < (%s, %s)" if position else ""
+        cursor.execute(f"{select}{keyset} ORDER BY created_at DESC, id DESC LIMIT %s", (key, *(position or ()), limit))
+        rows = cursor.fetchall()
+        more = more or len(rows) == limit
+        for r in rows:
+            item = _direct_to_dict(r) if seen is None else _broadcast_to_dict(r, r["seq"] <= seen)
+            items.append(((r["created_at"], r["id"]), stream, item))
+    items.sort(key=lambda i: (i[0], i[1]), reverse=True)
+    page = items[:limit]
+    for position, stream, _ in page:
+        positions[stream] = position
+    return {
+        "items": [item for _, _, item in page],
+        "nextCursor": _format_cursor(positions) if more or len(items) > limit else None,
+    }
+
+
+def mark_read(user_id: int, notification_id: int) -> bool:
+    cursor.execute(
+        "UPDATE notifications SET is_read = 1 WHERE id = %s AND user_id = %s AND is_read = 0",
+        (notification_id, user_id),
+    )
+    if cursor.rowcount == 0:
+        return False
+    cursor.execute(
+        "UPDATE notification_state SET unread_direct = GREATEST(unread_direct - 1, 0) WHERE user_id = %s",
+        (user_id,),
+    )
+    return True
+
+
+def mark_all_read(user_id: int, role: str):
+    ensure_state(user_id)
+    cursor.execute("UPDATE notifications SET is_read = 1 WHERE user_id = %s AND is_read = 0", (user_id,))
+    cursor.execute(
+        f"UPDATE notification_state SET unread_direct = 0, "
+        f"seen_all_seq = {_ALL_SEQ}, seen_role_seq = {_ROLE_SEQ} "
+        f"WHERE user_id = %s",
+        (role, user_id),
+    )
@@ -19,12 +19,52 @@ DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_NAME = os.getenv("DB_NAME", "smart_alumni_db")
 
+def add_missing_columns(cursor, conn, table, columns):
+    """ALTER TABLE for each (name, definition) not yet present; returns the names added."""
+    cursor.execute(
+        "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+        (DB_NAME, table),
+    )
+    existing = {row[0] for row in cursor.fetchall()}
+    added = []
+    for col_name, col_def in columns:
+        if col_name not in existing:
+            try:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_def}")
+                conn.commit()
+                added.append(col_name)
+                print(f"Added column {table}.{col_name}")
+            except Exception as e:
+                print(f"Skip {table}.{col_name}: {e}")
+    return added
+
+
+def add_missing_index(cursor, conn, table, name, definition):
+    """ALTER TABLE ADD <definition> unless an index called `name` exists; returns True if added."""
+    cursor.execute(
+        "SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+        (DB_NAME, table, name),
+    )
+    if cursor.fetchall():
+        return False
+    try:
+        cursor.execute(f"ALTER TABLE {table} ADD {definition}")
+        conn.commit()
+        print(f"Added index {table}.{name}")
+        return True
+    except Exception as e:
+        print(f"Skip index {table}.{name}: {e}")
+        return False
+
+
 def main():
     conn = mysql.connector.connect(
         host=DB_HOST,
         user=DB_USER,
         password=DB_PASSWORD,
         database=DB_NAME,
+        # Same session clock as the API (database.SESSION_TIME_ZONE)
+        time_zone="+00:00",
     )
     cursor = conn.cursor()
 
@@ -33,6 +73,7 @@ def main():
         ("graduation_year", "VARCHAR(20) NULL"),
         ("current_organization", "VARCHAR(255) NULL"),
         ("current_role", "VARCHAR(255) NULL"),
+        ("industry", "VARCHAR(255) NULL"),
         ("department", "VARCHAR(255) NULL"),
         ("batch", "VARCHAR(50) NULL"),
         ("phone", "VARCHAR(50) NULL"),
@@ -41,6 +82,7 @@ def main():
         ("linkedin", "VARCHAR(255) NULL"),
         ("avatar", "VARCHAR(512) NULL"),
         ("created_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+        ("updated_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"),
     ]
     cursor.execute("SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'users'", (DB_NAME,))
     existing = {row[0] for row in cursor.fetchall()}
@@ -59,7 +101,8 @@ def main():
         sql = schema_path.read_text()
         # Run each CREATE TABLE statement
         for stmt in sql.split(";"):
-            stmt = stmt.strip()
+            # Drop comment lines so a table preceded by a comment is still picked up
+            stmt = "\n".join(line for line in stmt.splitlines() if not line.strip().startswith("--")).strip()
             if stmt.upper().startswith("CREATE TABLE"):
                 try:
                     cursor.execute(stmt)
@@ -68,6 +111,113 @@ def main():
                 except Exception as e:
                     print(f"Schema statement: {e}")
 
+    # Read receipts moved from messages.is_read to per-participant cursors
+    added = add_missing_columns(cursor, conn, "conversations", [("last_message_id", "INT NULL")])
+    if "last_message_id" in added:
+        cursor.execute(
+            "UPDATE conversations c SET last_message_id = "
+            "(SELECT MAX(m.id) FROM messages m WHERE m.conversation_id = c.id)"
+        )
+        conn.commit()
+        print("Backfilled conversations.last_message_id")
+    added = add_missing_columns(cursor, conn, "conversation_participants", [("last_read_message_id", "INT NOT NULL DEFAULT 0")])
+    if "last_read_message_id" in added:
+        cursor.execute(
+            "UPDATE conversation_participants p SET last_read_message_id = COALESCE("
+            "(SELECT MAX(m.id) FROM messages m WHERE m.conversation_id = p.conversation_id "
+            "AND m.sender_id != p.user_id AND m.is_read = 1), 0)"
+        )
+        conn.commit()
+        print("Backfilled conversation_participants.last_read_message_id from messages.is_read")
+
+    # Direct conversations are keyed by their canonical (low, high) user pair
+    added = add_missing_columns(cursor, conn, "conversations", [("user_low_id", "INT NULL"), ("user_high_id", "INT NULL")])
+    if "user_high_id" in added:
+        # Earlier duplicates of a pair keep NULL keys; the oldest conversation becomes the canonical one
+        cursor.execute(
+            "UPDATE conversations c JOIN ("
+            "  SELECT MIN(conversation_id) AS id, lo, hi FROM ("
+            "    SELECT conversation_id, MIN(user_id) AS lo, MAX(user_id) AS hi FROM conversation_participants"
+            "    GROUP BY conversation_id HAVING COUNT(*) = 2"
+            "  ) pairs GROUP BY lo, hi"
+            ") k ON k.id = c.id SET c.user_low_id = k.lo, c.user_high_id = k.hi"
+        )
+        conn.commit()
+        print("Backfilled conversations.user_low_id/user_high_id")
+    add_missing_index(cursor, conn, "conversations", "unique_pair", "UNIQUE KEY unique_pair (user_low_id, user_high_id)")
+
+    # Mentor-less requests wait for batch assignment
+    cursor.execute(
+        "SELECT IS_NULLABLE FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'mentorship_requests' AND COLUMN_NAME = 'mentor_id'",
+        (DB_NAME,),
+    )
+    row = cursor.fetchone()
+    if row and row[0] == "NO":
+        cursor.execute("ALTER TABLE mentorship_requests MODIFY mentor_id INT NULL")
+        conn.commit()
+        print("mentorship_requests.mentor_id is now nullable")
+    # Profiles for every alumnus, with load counters recomputed from the requests
+    cursor.execute("INSERT IGNORE INTO mentor_profiles (user_id) SELECT id FROM users WHERE role = 'alumni'")
+    cursor.execute(
+        "UPDATE mentor_profiles mp SET "
+        "open_requests = (SELECT COUNT(*) FROM mentorship_requests r WHERE r.mentor_id = mp.user_id AND r.status = 'pending'), "
+        "accepted_requests = (SELECT COUNT(*) FROM mentorship_requests r WHERE r.mentor_id = mp.user_id AND r.status = 'accepted')"
+    )
+    cursor.execute(
+        "INSERT IGNORE INTO mentor_domains (domain, user_id) "
+        "SELECT DISTINCT LOWER(TRIM(domain)), mentor_id FROM mentorship_requests WHERE status = 'accepted' AND mentor_id IS NOT NULL"
+    )
+    conn.commit()
+
+    # Inbox badge state for users who signed up before notification_state existed: their unread direct
+    # notifications are counted, and earlier broadcasts are treated as seen, as for a new sign-up
+    cursor.execute(
+        "INSERT IGNORE INTO notification_state (user_id, unread_direct, seen_all_seq, seen_role_seq) "
+        "SELECT u.id, (SELECT COUNT(*) FROM notifications n WHERE n.user_id = u.id AND n.is_read = 0), "
+        "COALESCE((SELECT seq FROM notification_streams WHERE audience = 'all'), 0), "
+        "COALESCE((SELECT seq FROM notification_streams WHERE audience = u.role), 0) FROM users u"
+    )
+    if cursor.rowcount:
+        print(f"Backfilled notification_state for {cursor.rowcount} users")
+    conn.commit()
+
+    # Inbox pages walk each stream by (created_at, id)
+    add_missing_index(cursor, conn, "notifications", "idx_notifications_page", "INDEX idx_notifications_page (user_id, created_at, id)")
+    add_missing_index(cursor, conn, "notification_broadcasts", "idx_broadcasts_page", "INDEX idx_broadcasts_page (audience, created_at, id)")
+
+    # Seed career history with each user's current position, dated from sign-up
+    cursor.execute(
+        "INSERT INTO role_history (user_id, organization, role, industry, started_at) "
+        "SELECT u.id, u.current_organization, u.current_role, u.industry, COALESCE(u.created_at, NOW()) FROM users u "
+        "WHERE (u.current_organization IS NOT NULL OR u.current_role IS NOT NULL OR u.industry IS NOT NULL) "
+        "AND NOT EXISTS (SELECT 1 FROM role_history h WHERE h.user_id = u.id)"
+    )
+    if cursor.rowcount:
+        print(f"Backfilled role_history for {cursor.rowcount} users")
+    conn.commit()
+
+    # Insights snapshots read users changed since their last refresh
+    add_missing_index(cursor, conn, "users", "idx_users_updated", "INDEX idx_users_updated (updated_at)")
+
+    # Conversations remember how far their history was moved to messages_archive
+    add_missing_columns(cursor, conn, "conversations", [("archived_message_id", "INT NULL")])
+
+    # Applying twice is refused by a unique key instead of a check before the insert; keep each pair's first application
+    cursor.execute(
+        "SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'applications' "
+        "AND INDEX_NAME = 'unique_application' LIMIT 1",
+        (DB_NAME,),
+    )
+    if not cursor.fetchall():
+        cursor.execute(
+            "DELETE a FROM applications a JOIN applications b "
+            "ON b.job_id = a.job_id AND b.student_id = a.student_id AND b.id < a.id"
+        )
+        if cursor.rowcount:
+            print(f"Removed {cursor.rowcount} duplicate applications")
+        conn.commit()
+    add_missing_index(cursor, conn, "applications", "unique_application", "UNIQUE KEY unique_application (job_id, student_id)")
+
     cursor.close()
     conn.close()
     print("Init done.")
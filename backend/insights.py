@@ -0,0 +1,218 @@
+"""Columnar snapshot of user dimensions for the insights dashboard.
+
+Each dimension is dictionary-encoded: `values[d]` lists the distinct values
+(code 0 is "not set") and `codes[d]` is an int32 array with one code per user,
+aligned with the sorted `ids` array. A filter is a boolean mask built from
+code comparisons and a group-by is `np.unique` over the masked code rows, so
+a slice of the whole user base is a few vector passes instead of a GROUP BY
+scan of `users`. Only combinations that occur are counted, never the product
+of the dictionaries.
+
+Like the network graph, each API process keeps a snapshot that is refreshed
+in the background once it is older than INSIGHTS_REFRESH_SECONDS. A refresh
+reads only users whose `updated_at` moved since the previous one and patches a
+copy of the arrays, dropping users who became invisible; a row count mismatch
+(deletes) or INSIGHTS_REBUILD_SECONDS of age forces a full rebuild.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from config import Config
+from database import current_binding, cursor
+
+logger = logging.getLogger("insights")
+
+DIMENSIONS = (
+    "role",
+    "department",
+    "batch",
+    "graduation_year",
+    "current_organization",
+    "current_role",
+    "industry",
+    "location",
+)
+# Rows changed in the same second as the previous high-water mark are read again
+_OVERLAP = timedelta(seconds=1)
+
+
+def _clean(value) -> str:
+    return " ".join(str(value).split()) if value is not None else ""
+
+
+class Snapshot:
+    def __init__(self, ids, codes: dict, values: dict, watermark, built_at: float):
+        self.ids = ids
+        self.codes = codes
+        self.values = values
+        self.index = {d: {v: i for i, v in enumerate(values[d])} for d in DIMENSIONS}
+        self.watermark = watermark
+        self.built_at = built_at
+        self.refreshed_at = time.monotonic()
+
+    @classmethod
+    def from_rows(cls, rows, watermark):
+        ids = np.fromiter((r["id"] for r in rows), dtype=np.int64, count=len(rows))
+        codes, values = {}, {}
+        for d in DIMENSIONS:
+            # Sorted dictionary so codes order like the values; "" (not set) sorts first as code 0
+            column = [_clean(r.get(d)) for r in rows]
+            distinct = sorted(set(column) | {""})
+            lookup = {v: i for i, v in enumerate(distinct)}
+            codes[d] = np.fromiter((lookup[v] for v in column), dtype=np.int32, count=len(rows))
+            values[d] = distinct
+        return cls(ids, codes, values, watermark, time.monotonic())
+
+    def apply(self, rows, watermark):
+        """A new snapshot with `rows` upserted by id; self is left untouched for concurrent readers."""
+        ids = self.ids
+        positions = np.searchsorted(ids, [r["id"] for r in rows])
+        existing = [p < len(ids) and ids[p] == r["id"] for p, r in zip(positions, rows)]
+        new_ids = [r["id"] for r, e in zip(rows, existing) if not e]
+        merged_ids = np.concatenate([ids, np.array(new_ids, dtype=np.int64)])
+        codes, values = {}, {}
+        for d in DIMENSIONS:
+            distinct = list(self.values[d])
+            lookup = dict(self.index[d])
+            column = np.concatenate([self.codes[d], np.zeros(len(new_ids), dtype=np.int32)])
+            appended = len(ids)
+            for p, r, e in zip(positions, rows, existing):
+                value = _clean(r.get(d))
+                code = lookup.get(value)
+                if code is None:
+                    # Appended, so existing codes stay valid; the dictionary is no longer sorted, which nothing relies on
+                    code = lookup[value] = len(distinct)
+                    distinct.append(value)
+                if e:
+                    column[p] = code
+                else:
+                    column[appended] = code
+                    appended += 1
+            codes[d] = column
+            values[d] = distinct
+        order = np.argsort(merged_ids, kind="stable")
+        if new_ids and not np.all(order == np.arange(len(order))):
+            merged_ids = merged_ids[order]
+            codes = {d: c[order] for d, c in codes.items()}
+        return Snapshot(merged_ids, codes, values, watermark, self.built_at)
+
+    def without(self, ids):
+        """A new snapshot minus `ids`; ids not in the snapshot are ignored."""
+        keep = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+        if keep.all():
+            return self
+        return Snapshot(self.ids[keep], {d: c[keep] for d, c in self.codes.items()}, self.values, self.watermark, self.built_at)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def mask(self, filters: dict):
+        """Boolean row mask for equality filters {dimension: [values]}; unknown values match nothing."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        for d, wanted in filters.items():
+            wanted_codes = [self.index[d][v] for v in map(_clean, wanted) if v in self.index[d]]
+            mask &= np.isin(self.codes[d], wanted_codes)
+        return mask
+
+    def group_by(self, dimensions: list, mask, limit: int, include_unset: bool = False) -> list:
+        """[(value tuple, count)] most common first."""
+        # One row of codes per user; sized by the users, not by the product of the dictionaries
+        rows = np.stack([self.codes[d][mask] for d in dimensions], axis=1)
+        if not include_unset:
+            rows = rows[(rows != 0).all(axis=1)]
+        if not len(rows):
+            return []
+        cells, counts = np.unique(rows, axis=0, return_counts=True)
+        top = np.arange(len(counts))
+        if len(top) > limit:
+            top = top[np.argpartition(-counts, limit - 1)[:limit]]
+        # Most common first, ties in code order
+        top = top[np.lexsort((top, -counts[top]))]
+        return [
+            (tuple(self.values[d][int(cells[i, axis])] for axis, d in enumerate(dimensions)), int(counts[i]))
+            for i in top
+        ]
+
+
+def _select(where: str = "", params=()):
+    cursor.execute(
+        f"SELECT id, is_approved, updated_at, {', '.join(DIMENSIONS)} FROM users {where}",
+        params,
+    )
+    return cursor.fetchall()
+
+
+def _visible(row: dict) -> bool:
+    # Pending alumni are invisible everywhere else, so they are left out here too
+    return row["role"] != "alumni" or bool(row["is_approved"])
+
+
+def build() -> Snapshot:
+    cursor.execute("SELECT MAX(updated_at) AS watermark FROM users")
+    watermark = cursor.fetchone()["watermark"]
+    rows = [r for r in _select("ORDER BY id") if _visible(r)]
+    return Snapshot.from_rows(rows, watermark)
+
+
+def refresh(snapshot: Snapshot) -> Snapshot:
+    """Patch in users changed since the snapshot's watermark, or rebuild when that can't be trusted."""
+    if snapshot is None or snapshot.watermark is None or time.monotonic() - snapshot.built_at > Config.INSIGHTS_REBUILD_SECONDS:
+        return build()
+    cursor.execute("SELECT MAX(updated_at) AS watermark FROM users")
+    watermark = cursor.fetchone()["watermark"]
+    changed = _select("WHERE updated_at >= %s ORDER BY id", (snapshot.watermark - _OVERLAP,))
+    rows = [r for r in changed if _visible(r)]
+    # Users who are pending now may be in the snapshot from before
+    hidden = [r["id"] for r in changed if not _visible(r)]
+    cursor.execute("SELECT COUNT(*) AS n FROM users WHERE role != 'alumni' OR is_approved = 1")
+    visible = cursor.fetchone()["n"]
+    patched = snapshot.apply(rows, watermark) if rows else snapshot
+    if hidden:
+        patched = patched.without(hidden)
+    if len(patched) != visible:
+        return build()
+    patched.watermark = watermark
+    patched.refreshed_at = time.monotonic()
+    return patched
+
+
+_snapshot = {"current": None, "refreshing": False}
+_snapshot_lock = threading.Lock()
+# Held for the first build so concurrent cold requests wait for one build instead of each running it
+_build_lock = threading.Lock()
+
+
+def _refresh_snapshot():
+    try:
+        updated = refresh(_snapshot["current"])
+        with _snapshot_lock:
+            _snapshot["current"] = updated
+    except Exception:
+        logger.exception("Insights snapshot refresh failed")
+    finally:
+        current_binding().release()
+        _snapshot["refreshing"] = False
+
+
+def current_snapshot() -> Snapshot:
+    """The process-wide snapshot; built on first use, refreshed in the background when stale."""
+    with _snapshot_lock:
+        snapshot = _snapshot["current"]
+        stale = snapshot is None or time.monotonic() - snapshot.refreshed_at > Config.INSIGHTS_REFRESH_SECONDS
+        start = stale and snapshot is not None and not _snapshot["refreshing"]
+        if start:
+            _snapshot["refreshing"] = True
+    if snapshot is None:
+        with _build_lock:
+            snapshot = _snapshot["current"]
+            if snapshot is None:
+                snapshot = build()
+                with _snapshot_lock:
+                    _snapshot["current"] = snapshot
+    elif start:
+        threading.Thread(target=_refresh_snapshot, name="insights-refresh", daemon=True).start()
+    return snapshot
@@ -0,0 +1,16 @@
+"""Outgoing email over SMTP."""
+import smtplib
+from email.message import EmailMessage
+
+from config import Config
+
+
+def send(to: str, subject: str, body: str):
+    """Send one message over its own SMTP session."""
+    msg = EmailMessage()
+    msg["From"] = Config.MAIL_FROM
+    msg["To"] = to
+    msg["Subject"] = subject
+    msg.set_content(body)
+    with smtplib.SMTP(Config.SMTP_HOST, Config.SMTP_PORT, timeout=30) as smtp:
+        smtp.send_message(msg)
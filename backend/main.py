@@ -1,44 +1,37 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-<<<<<<< HEAD
+from fastapi.responses import JSONResponse
 
+import database
+import health
+import metrics
+import profiling
+import ratelimit
 from auth import router as auth_router
-from routers import users, jobs, events, donations, mentorship, applications, messages
+from routers import users, jobs, events, donations, mentorship, applications, messages, notifications, coffee_chats, skills, network, careers, insights, stories, uploads, referrals, dashboard, slow_queries
 
 app = FastAPI(
     title="Smart Alumni Connect API",
     description="Alumni engagement platform: registration, networking, jobs, events, donations, mentorship.",
     version="1.0.0",
+    lifespan=health.lifespan,
 )
 
+# Innermost, so CORS headers are still added to 429/503 rejections
+app.add_middleware(ratelimit.RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://127.0.0.1:5173", "http://localhost:3000", "http://127.0.0.1:3000"],
-=======
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-
-# Database configuration
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={{"check_same_thread": False}})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
-
-# Create FastAPI instance
-app = FastAPI()
-
-# CORS configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
->>>>>>> 19ba7efd8ff9a9b742326274a4c48ecf8ab248d6
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[database.CONSISTENCY_HEADER, "Retry-After"],
 )
+app.add_middleware(database.ConnectionMiddleware)
+app.add_middleware(profiling.ProfilingMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 
-<<<<<<< HEAD
+app.include_router(health.router)
 app.include_router(auth_router)
 app.include_router(users.router)
 app.include_router(jobs.router)
@@ -47,17 +40,26 @@ app.include_router(donations.router)
 app.include_router(mentorship.router)
 app.include_router(applications.router)
 app.include_router(messages.router)
+app.include_router(notifications.router)
+app.include_router(coffee_chats.router)
+app.include_router(skills.router)
+app.include_router(network.router)
+app.include_router(careers.router)
+app.include_router(insights.router)
+app.include_router(stories.router)
+app.include_router(uploads.router)
+app.include_router(referrals.router)
+app.include_router(dashboard.router)
+app.include_router(metrics.router)
+app.include_router(slow_queries.router)
+app.include_router(profiling.router)
+
+
+@app.exception_handler(database.PoolTimeout)
+def pool_timeout_handler(request: Request, exc: database.PoolTimeout):
+    return JSONResponse(status_code=503, content={"detail": "Database busy"}, headers={"Retry-After": "1"})
 
 
 @app.get("/")
 def root():
     return {"message": "Smart Alumni Connect API", "docs": "/docs"}
-=======
-# Include routes
-# from .routes import router as api_router
-# app.include_router(api_router)
-
-@app.get("/")
-async def read_root():
-    return {"message": "Welcome to the FastAPI application!"}
->>>>>>> 19ba7efd8ff9a9b742326274a4c48ecf8ab248d6
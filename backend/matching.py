@@ -0,0 +1,253 @@
+"""Capacity-aware mentor matching.
+
+Every alumnus has a `mentor_profiles` row holding a capacity and counters of the
+pending and accepted requests addressed to them; a request holds its slot
+until it is rejected or the mentorship is completed. A stored `load_pct` column
+derived from those is indexed together with `accepting`, so "least loaded
+available mentors" is an index range read. Mentors are also indexed by domain
+in `mentor_domains`, which they declare themselves and which grows whenever they
+accept a request in a new domain.
+
+Suggestions rank domain matches first, then department, then load. Batch
+assignment places requests submitted without a mentor, scarcest domain first,
+onto the least loaded matching mentor.
+"""
+import heapq
+from collections import defaultdict
+
+from config import Config
+from database import cursor
+import tasks
+
+
+def normalize_domain(domain: str) -> str:
+    return " ".join(domain.lower().split())[:100]
+
+
+def ensure_profile(user_id: int):
+    cursor.execute(
+        "INSERT IGNORE INTO mentor_profiles (user_id, capacity) VALUES (%s, %s)",
+        (user_id, Config.MENTOR_DEFAULT_CAPACITY),
+    )
+
+
+def get_profile(user_id: int) -> dict:
+    cursor.execute(
+        "SELECT capacity, open_requests, accepted_requests, accepting FROM mentor_profiles WHERE user_id = %s",
+        (user_id,),
+    )
+    profile = cursor.fetchone() or {"capacity": Config.MENTOR_DEFAULT_CAPACITY, "open_requests": 0, "accepted_requests": 0, "accepting": 1}
+    cursor.execute("SELECT domain FROM mentor_domains WHERE user_id = %s ORDER BY domain", (user_id,))
+    return {
+        "capacity": profile["capacity"],
+        "openRequests": profile["open_requests"],
+        "acceptedRequests": profile["accepted_requests"],
+        "accepting": bool(profile["accepting"]),
+        "domains": [r["domain"] for r in cursor.fetchall()],
+    }
+
+
+def update_profile(user_id: int, capacity: int = None, accepting: bool = None, domains: list = None):
+    ensure_profile(user_id)
+    if capacity is not None or accepting is not None:
+        cursor.execute(
+            "UPDATE mentor_profiles SET capacity = COALESCE(%s, capacity), accepting = COALESCE(%s, accepting) WHERE user_id = %s",
+            (capacity, None if accepting is None else int(accepting), user_id),
+        )
+    if domains is not None:
+        cursor.execute("DELETE FROM mentor_domains WHERE user_id = %s", (user_id,))
+        normalized = sorted({normalize_domain(d) for d in domains if d.strip()})
+        if normalized:
+            cursor.executemany(
+                "INSERT INTO mentor_domains (domain, user_id) VALUES (%s, %s)",
+                [(d, user_id) for d in normalized],
+            )
+
+
+def reserve(mentor_id: int) -> bool:
+    """Count a new pending request against the mentor; False if they are full or not accepting."""
+    cursor.execute(
+        "UPDATE mentor_profiles SET open_requests = open_requests + 1 "
+        "WHERE user_id = %s AND accepting = 1 AND open_requests + accepted_requests < capacity",
+        (mentor_id,),
+    )
+    return cursor.rowcount == 1
+
+
+# status -> statuses a mentorship request may move to; completing releases the mentor's slot
+TRANSITIONS = {
+    "pending": ("accepted", "rejected"),
+    "accepted": ("completed",),
+}
+
+
+def record_transition(mentor_id: int, old_status: str, new_status: str, domain: str = None) -> bool:
+    """Keep the load counters in step with a request's status change; False if accepting would exceed capacity."""
+    if new_status == "accepted":
+        cursor.execute(
+            "UPDATE mentor_profiles SET open_requests = GREATEST(open_requests - 1, 0), accepted_requests = accepted_requests + 1 "
+            "WHERE user_id = %s AND accepted_requests < capacity",
+            (mentor_id,),
+        )
+        if cursor.rowcount != 1:
+            return False
+        if domain:
+            cursor.execute("INSERT IGNORE INTO mentor_domains (domain, user_id) VALUES (%s, %s)", (normalize_domain(domain), mentor_id))
+        return True
+    column = "open_requests" if old_status == "pending" else "accepted_requests"
+    cursor.execute(f"UPDATE mentor_profiles SET {column} = GREATEST({column} - 1, 0) WHERE user_id = %s", (mentor_id,))
+    return True
+
+
+_CANDIDATE_COLUMNS = (
+    "u.id, u.name, u.department, u.current_role, u.current_organization, u.avatar, "
+    "mp.capacity, mp.open_requests, mp.accepted_requests, mp.load_pct"
+)
+
+
+def _domain_candidates(domain: str, limit: int) -> list:
+    cursor.execute(
+        f"SELECT {_CANDIDATE_COLUMNS} FROM mentor_domains md "
+        f"JOIN mentor_profiles mp ON mp.user_id = md.user_id "
+        f"JOIN users u ON u.id = md.user_id "
+        f"WHERE md.domain = %s AND mp.accepting = 1 AND mp.load_pct < 100 AND u.is_approved = 1 "
+        f"ORDER BY mp.load_pct, mp.user_id LIMIT %s",
+        (domain, limit),
+    )
+    return cursor.fetchall()
+
+
+def _least_loaded(limit: int, lock: bool = False) -> list:
+    cursor.execute(
+        f"SELECT {_CANDIDATE_COLUMNS} FROM mentor_profiles mp "
+        f"JOIN users u ON u.id = mp.user_id "
+        f"WHERE mp.accepting = 1 AND mp.load_pct < 100 AND u.is_approved = 1 "
+        f"ORDER BY mp.load_pct, mp.user_id LIMIT %s{' FOR UPDATE OF mp' if lock else ''}",
+        (limit,),
+    )
+    return cursor.fetchall()
+
+
+def suggest(student: dict, domain: str, k: int = 5) -> list:
+    """Top-k available mentors for `student` in `domain`, spreading load across equals."""
+    domain = normalize_domain(domain)
+    cursor.execute(
+        "SELECT mentor_id FROM mentorship_requests WHERE student_id = %s AND mentor_id IS NOT NULL AND status IN ('pending', 'accepted')",
+        (student["id"],),
+    )
+    excluded = {r["mentor_id"] for r in cursor.fetchall()}
+    # Over-fetch so department ranking and exclusions still leave k candidates
+    fetch = 4 * k + len(excluded)
+    candidates = {}
+    for r in _domain_candidates(domain, fetch):
+        candidates[r["id"]] = dict(r, domain_match=True)
+    if len(candidates) < fetch:
+        for r in _least_loaded(fetch):
+            candidates.setdefault(r["id"], dict(r, domain_match=False))
+    department = student.get("department")
+    ranked = heapq.nsmallest(
+        k,
+        (c for c in candidates.values() if c["id"] not in excluded),
+        key=lambda c: (not c["domain_match"], not (department and c["department"] == department), c["load_pct"], c["id"]),
+    )
+    return [
+        {
+            "mentorId": str(c["id"]),
+            "name": c["name"],
+            "department": c.get("department"),
+            "currentRole": c.get("current_role"),
+            "currentOrganization": c.get("current_organization"),
+            "avatar": c.get("avatar"),
+            "domainMatch": c["domain_match"],
+            "openSlots": max(c["capacity"] - c["open_requests"] - c["accepted_requests"], 0),
+        }
+        for c in ranked
+    ]
+
+
+def assign_pending(limit: int = None) -> int:
+    """Assign a batch of mentor-less requests; the caller commits. Returns how many were placed.
+
+    Requests are claimed with SKIP LOCKED so concurrent runs split the backlog.
+    Domains with the fewest available mentors are placed first, each request
+    going to the least loaded matching mentor (department match breaking ties);
+    requests in a domain nobody covers fall back to the least loaded mentor.
+    """
+    cursor.execute(
+        "SELECT r.id, r.student_id, r.domain, u.department FROM mentorship_requests r "
+        "JOIN users u ON u.id = r.student_id "
+        "WHERE r.mentor_id IS NULL AND r.status = 'pending' ORDER BY r.id LIMIT %s FOR UPDATE OF r SKIP LOCKED",
+        (limit or Config.MENTOR_ASSIGN_BATCH_SIZE,),
+    )
+    requests = cursor.fetchall()
+    if not requests:
+        return 0
+    by_domain = defaultdict(list)
+    for r in requests:
+        by_domain[normalize_domain(r["domain"])].append(r)
+    domains = list(by_domain)
+    cursor.execute(
+        f"SELECT md.domain, mp.user_id, mp.capacity, mp.open_requests + mp.accepted_requests AS load_count, u.department "
+        f"FROM mentor_domains md JOIN mentor_profiles mp ON mp.user_id = md.user_id JOIN users u ON u.id = md.user_id "
+        f"WHERE md.domain IN ({', '.join(['%s'] * len(domains))}) AND mp.accepting = 1 AND mp.load_pct < 100 AND u.is_approved = 1 "
+        f"FOR UPDATE OF mp",
+        domains,
+    )
+    mentors = {}
+    coverage = defaultdict(list)
+    for row in cursor.fetchall():
+        mentors[row["user_id"]] = row
+        coverage[row["domain"]].append(row["user_id"])
+    # Locked like the domain candidates so a concurrent reserve() cannot fill them under us
+    fallback = _least_loaded(len(requests), lock=True)
+    for row in fallback:
+        mentors.setdefault(row["id"], {
+            "user_id": row["id"], "capacity": row["capacity"], "department": row["department"],
+            "load_count": row["open_requests"] + row["accepted_requests"],
+        })
+
+    cursor.execute(
+        "SELECT student_id, mentor_id FROM mentorship_requests WHERE mentor_id IS NOT NULL AND status IN ('pending', 'accepted') "
+        f"AND student_id IN ({', '.join(['%s'] * len(requests))})",
+        [r["student_id"] for r in requests],
+    )
+    taken = {(r["student_id"], r["mentor_id"]) for r in cursor.fetchall()}
+
+    def pick(candidate_ids, request):
+        best = None
+        for mentor_id in candidate_ids:
+            m = mentors[mentor_id]
+            if m["load_count"] >= m["capacity"] or (request["student_id"], mentor_id) in taken:
+                continue
+            key = (m["load_count"] / m["capacity"], m["department"] != request["department"], mentor_id)
+            if best is None or key < best[0]:
+                best = (key, mentor_id)
+        return best and best[1]
+
+    assignments = []
+    for domain in sorted(domains, key=lambda d: len(coverage.get(d, ()))):
+        for request in by_domain[domain]:
+            mentor_id = pick(coverage.get(domain, ()), request) or pick([r["id"] for r in fallback], request)
+            if mentor_id is None:
+                continue
+            mentors[mentor_id]["load_count"] += 1
+            taken.add((request["student_id"], mentor_id))
+            assignments.append((mentor_id, request["id"]))
+    if not assignments:
+        return 0
+    cursor.executemany("UPDATE mentorship_requests SET mentor_id = %s WHERE id = %s", assignments)
+    per_mentor = defaultdict(int)
+    for mentor_id, _ in assignments:
+        per_mentor[mentor_id] += 1
+    cursor.executemany(
+        "UPDATE mentor_profiles SET open_requests = open_requests + %s WHERE user_id = %s",
+        [(n, mentor_id) for mentor_id, n in per_mentor.items()],
+    )
+    tasks.enqueue("notify", {"user_ids": sorted(per_mentor), "notification": {
+        "type": "mentorship", "title": "New mentorship request",
+        "message": "You have been matched with a new mentee request", "action_url": "/mentorship"}})
+    assigned = {request_id for _, request_id in assignments}
+    tasks.enqueue("notify", {"user_ids": sorted({r["student_id"] for r in requests if r["id"] in assigned}), "notification": {
+        "type": "mentorship", "title": "Mentor assigned",
+        "message": "Your mentorship request has been matched with a mentor", "action_url": "/mentorship"}})
+    return len(assignments)
@@ -0,0 +1,251 @@
+"""Request latency and DB query instrumentation, exported in Prometheus text format.
+
+Statement series are labelled with a short fingerprint of the normalized SQL,
+not the SQL itself, so label values stay small; the text behind a fingerprint is
+in the log lines and in the slow query log served at /admin/slow-queries.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from functools import lru_cache
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from config import Config
+
+logger = logging.getLogger("metrics")
+
+router = APIRouter(tags=["metrics"])
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%s|%\(\w+\)s")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    """Strip literals and parameters so that repeated statements share one key."""
+    sql = _STRING.sub("?", sql)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _VALUE_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Short stable id of a normalized statement, used as its metric label."""
+    return hashlib.sha1(statement.encode()).hexdigest()[:12]
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class _RequestStats:
+    """Per-request query tally, shared with threadpool handlers through a context variable."""
+
+    __slots__ = ("scope", "queries", "query_seconds", "statements")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.statements = defaultdict(int)
+
+
+_current: ContextVar = ContextVar("metrics_request", default=None)
+_lock = threading.Lock()
+
+_request_latency: dict = {}
+_requests_total = defaultdict(int)
+_route_queries = defaultdict(int)
+_route_query_seconds = defaultdict(float)
+_queries_per_request: dict = {}
+_n_plus_one = defaultdict(int)
+_slow_queries = defaultdict(int)
+_slow_query_max = defaultdict(float)
+_slow_query_log = deque(maxlen=Config.SLOW_QUERY_LOG_SIZE)
+
+
+def route_label(scope) -> str:
+    """Templated path of the matched route, so /jobs/1 and /jobs/2 share a series."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def record_query(sql: str, seconds: float):
+    """Called by the database cursor wrapper after every statement."""
+    statement = normalize_sql(sql)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += seconds
+        stats.statements[statement] += 1
+    if seconds * 1000 >= Config.SLOW_QUERY_MS:
+        route = route_label(stats.scope) if stats is not None else "-"
+        _slow_query_log.append({
+            "route": route,
+            "fingerprint": fingerprint(statement),
+            "statement": statement,
+            "seconds": round(seconds, 6),
+            "at": time.time(),
+        })
+        with _lock:
+            _slow_queries[(route, statement)] += 1
+            _slow_query_max[(route, statement)] = max(_slow_query_max[(route, statement)], seconds)
+        logger.warning("Slow query (%.1f ms) on %s [%s]: %s", seconds * 1000, route, fingerprint(statement), statement)
+
+
+def slow_queries() -> list:
+    """Most recent slow queries, newest last."""
+    return list(_slow_query_log)
+
+
+def slow_query_totals() -> list:
+    """Every slow statement seen since start, per route, most frequent first."""
+    with _lock:
+        totals = [
+            {"route": route, "fingerprint": fingerprint(statement), "statement": statement, "count": n,
+             "maxSeconds": round(_slow_query_max[(route, statement)], 6)}
+            for (route, statement), n in _slow_queries.items()
+        ]
+    return sorted(totals, key=lambda t: (-t["count"], t["route"], t["fingerprint"]))
+
+
+def _observe_request(method: str, route: str, status: int, seconds: float, stats: _RequestStats):
+    key = (method, route)
+    repeated = [
+        (statement, n) for statement, n in stats.statements.items()
+        if n >= Config.N_PLUS_ONE_THRESHOLD and statement.upper().startswith("SELECT")
+    ]
+    with _lock:
+        if key not in _request_latency:
+            _request_latency[key] = _Histogram(LATENCY_BUCKETS)
+            _queries_per_request[key] = _Histogram(QUERY_COUNT_BUCKETS)
+        _request_latency[key].observe(seconds)
+        _queries_per_request[key].observe(stats.queries)
+        _requests_total[(method, route, status)] += 1
+        _route_queries[key] += stats.queries
+        _route_query_seconds[key] += stats.query_seconds
+        for statement, _ in repeated:
+            _n_plus_one[(method, route, statement)] += 1
+    for statement, n in repeated:
+        logger.warning("Possible N+1 on %s %s: %d x [%s] %s", method, route, n, fingerprint(statement), statement)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request and attributing its DB queries to the route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = _RequestStats(scope)
+        token = _current.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _observe_request(scope["method"], route_label(scope), status_code, time.perf_counter() - start, stats)
+
+
+def _labels(**labels) -> str:
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _render_histogram(lines: list, name: str, histograms: dict):
+    for (method, route), h in sorted(histograms.items()):
+        cumulative = 0
+        for bound, n in zip(h.buckets, h.counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {h.count}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {h.sum}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {h.count}")
+
+
+def render() -> str:
+    lines = []
+    with _lock:
+        lines.append("# HELP http_request_duration_seconds HTTP request latency by route.")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        _render_histogram(lines, "http_request_duration_seconds", _request_latency)
+
+        lines.append("# HELP http_requests_total HTTP requests by route and status.")
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, status), n in sorted(_requests_total.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {n}")
+
+        lines.append("# HELP db_queries_total DB statements executed per route.")
+        lines.append("# TYPE db_queries_total counter")
+        for (method, route), n in sorted(_route_queries.items()):
+            lines.append(f"db_queries_total{_labels(method=method, route=route)} {n}")
+
+        lines.append("# HELP db_query_duration_seconds_total Time spent in DB statements per route.")
+        lines.append("# TYPE db_query_duration_seconds_total counter")
+        for (method, route), s in sorted(_route_query_seconds.items()):
+            lines.append(f"db_query_duration_seconds_total{_labels(method=method, route=route)} {s}")
+
+        lines.append("# HELP db_queries_per_request Number of DB statements issued by a single request.")
+        lines.append("# TYPE db_queries_per_request histogram")
+        _render_histogram(lines, "db_queries_per_request", _queries_per_request)
+
+        lines.append("# HELP db_n_plus_one_total Requests that repeated one SELECT at least N_PLUS_ONE_THRESHOLD times.")
+        lines.append("# TYPE db_n_plus_one_total counter")
+        for (method, route, statement), n in sorted(_n_plus_one.items()):
+            lines.append(f"db_n_plus_one_total{_labels(method=method, route=route, fingerprint=fingerprint(statement))} {n}")
+
+        lines.append("# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS.")
+        lines.append("# TYPE db_slow_queries_total counter")
+        for (route, statement), n in sorted(_slow_queries.items()):
+            lines.append(f"db_slow_queries_total{_labels(route=route, fingerprint=fingerprint(statement))} {n}")
+
+        lines.append("# HELP db_slow_query_max_seconds Slowest observed run of each slow statement.")
+        lines.append("# TYPE db_slow_query_max_seconds gauge")
+        for (route, statement), s in sorted(_slow_query_max.items()):
+            lines.append(f"db_slow_query_max_seconds{_labels(route=route, fingerprint=fingerprint(statement))} {s}")
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,277 @@
+"""Connection graph over mentorships and conversations.
+
+Two users are connected when a mentorship between them was accepted or they
+have exchanged messages. The graph is held in CSR form: users are renumbered
+densely, `offsets[i]:offsets[i + 1]` delimits row i's slice of `targets`, and
+each slice is sorted, so neighbour lists are contiguous int arrays and mutual
+connections are a merge of two slices. Batch, organization and department are
+not edges (batches would be cliques); they boost suggestion scores instead.
+
+API processes keep a snapshot that is rebuilt in the background once it is older
+than NETWORK_REFRESH_SECONDS. The task worker rebuilds on the same period and
+rewrites `connection_suggestions` only for users whose 2-hop neighbourhood or
+profile attributes changed since its previous build.
+"""
+import heapq
+import logging
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+from config import Config
+from database import current_binding, cursor, db
+
+logger = logging.getLogger("network")
+
+MUTUAL_WEIGHT = 3
+ORGANIZATION_WEIGHT = 2
+BATCH_WEIGHT = 1
+DEPARTMENT_WEIGHT = 1
+
+
+class Graph:
+    def __init__(self, user_ids: list, attrs: list, edges):
+        self.user_ids = array("i", user_ids)
+        self.row = {uid: i for i, uid in enumerate(user_ids)}
+        # (batch, organization, department) per row; None where unset
+        self.attrs = attrs
+        degree = array("l", [0] * (len(user_ids) + 1))
+        pairs = []
+        for a, b in edges:
+            ra, rb = self.row.get(a), self.row.get(b)
+            if ra is None or rb is None or ra == rb:
+                continue
+            pairs.append((ra, rb))
+            degree[ra + 1] += 1
+            degree[rb + 1] += 1
+        for i in range(1, len(degree)):
+            degree[i] += degree[i - 1]
+        targets = array("i", [0] * degree[-1])
+        fill = array("l", degree[:-1])
+        for ra, rb in pairs:
+            targets[fill[ra]] = rb
+            fill[ra] += 1
+            targets[fill[rb]] = ra
+            fill[rb] += 1
+        # Sort and de-duplicate each row, compacting leftwards (a row never grows, so reads stay ahead of writes)
+        write = 0
+        starts = array("l", [0] * len(degree))
+        for r in range(len(user_ids)):
+            row = sorted(set(targets[degree[r]:degree[r + 1]]))
+            starts[r] = write
+            targets[write:write + len(row)] = array("i", row)
+            write += len(row)
+        starts[len(user_ids)] = write
+        self.offsets = starts
+        self.targets = targets[:write]
+        self.by_group = defaultdict(list)
+        for r, (batch, organization, _) in enumerate(attrs):
+            if organization:
+                self.by_group[("org", organization.lower())].append(r)
+            if batch:
+                self.by_group[("batch", batch)].append(r)
+        self.built_at = time.monotonic()
+
+    def _slice(self, r: int):
+        return self.targets[self.offsets[r]:self.offsets[r + 1]]
+
+    def neighbors(self, user_id: int) -> list:
+        r = self.row.get(user_id)
+        return [] if r is None else [self.user_ids[n] for n in self._slice(r)]
+
+    def mutual(self, a: int, b: int) -> list:
+        ra, rb = self.row.get(a), self.row.get(b)
+        if ra is None or rb is None:
+            return []
+        left, right = self._slice(ra), self._slice(rb)
+        i = j = 0
+        found = []
+        while i < len(left) and j < len(right):
+            if left[i] == right[j]:
+                found.append(self.user_ids[left[i]])
+                i += 1
+                j += 1
+            elif left[i] < right[j]:
+                i += 1
+            else:
+                j += 1
+        return found
+
+    def _second_degree_rows(self, r: int) -> dict:
+        """Row -> mutual count for users exactly two hops away, visiting at most NETWORK_BFS_LIMIT edges."""
+        direct = self._slice(r)
+        direct_set = set(direct)
+        counts = defaultdict(int)
+        budget = Config.NETWORK_BFS_LIMIT
+        for n in direct:
+            # Cut the row itself: one hub's neighbour list can be longer than the whole budget
+            row = self._slice(n)[:budget]
+            budget -= len(row)
+            for m in row:
+                if m != r and m not in direct_set:
+                    counts[m] += 1
+            if budget <= 0:
+                break
+        return counts
+
+    def second_degree(self, user_id: int, limit: int) -> list:
+        """(user_id, mutual count) pairs two hops away, most mutual connections first."""
+        r = self.row.get(user_id)
+        if r is None:
+            return []
+        counts = self._second_degree_rows(r)
+        top = heapq.nsmallest(limit, counts.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.user_ids[m], c) for m, c in top]
+
+    def suggestions(self, user_id: int, limit: int) -> list:
+        """(user_id, score, mutual count) for people the user may know."""
+        r = self.row.get(user_id)
+        if r is None:
+            return []
+        counts = self._second_degree_rows(r)
+        batch, organization, department = self.attrs[r]
+        candidates = dict(counts)
+        for key in (("org", organization.lower()) if organization else None, ("batch", batch) if batch else None):
+            if key:
+                for m in self.by_group.get(key, [])[:Config.NETWORK_GROUP_CANDIDATES]:
+                    candidates.setdefault(m, 0)
+        direct = set(self._slice(r))
+        scored = []
+        for m, mutual_count in candidates.items():
+            if m == r or m in direct:
+                continue
+            other_batch, other_org, other_dept = self.attrs[m]
+            score = (
+                MUTUAL_WEIGHT * mutual_count
+                + (ORGANIZATION_WEIGHT if organization and other_org and organization.lower() == other_org.lower() else 0)
+                + (BATCH_WEIGHT if batch and batch == other_batch else 0)
+                + (DEPARTMENT_WEIGHT if department and department == other_dept else 0)
+            )
+            if score > 0:
+                scored.append((score, mutual_count, m))
+        top = heapq.nlargest(limit, scored, key=lambda s: (s[0], s[1], -s[2]))
+        return [(self.user_ids[m], score, mutual_count) for score, mutual_count, m in top]
+
+    def groups(self, user_id: int) -> list:
+        """Rows sharing the user's organization or batch."""
+        r = self.row.get(user_id)
+        if r is None:
+            return []
+        batch, organization, _ = self.attrs[r]
+        members = []
+        if organization:
+            members += self.by_group.get(("org", organization.lower()), [])
+        if batch:
+            members += self.by_group.get(("batch", batch), [])
+        return [self.user_ids[m] for m in members]
+
+    def signature(self, user_id: int):
+        """What a user's suggestions depend on from their own row: neighbours and attributes."""
+        r = self.row.get(user_id)
+        return None if r is None else (tuple(self.neighbors(user_id)), self.attrs[r])
+
+
+def build() -> Graph:
+    cursor.execute("SELECT id, batch, current_organization, department FROM users ORDER BY id")
+    users = cursor.fetchall()
+    cursor.execute(
+        "SELECT student_id AS a, mentor_id AS b FROM mentorship_requests WHERE status IN ('accepted', 'completed') AND mentor_id IS NOT NULL "
+        "UNION "
+        "SELECT user_low_id, user_high_id FROM conversations WHERE user_low_id IS NOT NULL AND last_message_id IS NOT NULL"
+    )
+    edges = [(e["a"], e["b"]) for e in cursor.fetchall()]
+    return Graph(
+        [u["id"] for u in users],
+        [(u.get("batch"), u.get("current_organization"), u.get("department")) for u in users],
+        edges,
+    )
+
+
+_snapshot = {"graph": None, "rebuilding": False}
+_snapshot_lock = threading.Lock()
+# Held for the first build so concurrent cold requests wait for one build instead of each running it
+_build_lock = threading.Lock()
+
+
+def _rebuild_snapshot():
+    try:
+        graph = build()
+        with _snapshot_lock:
+            _snapshot["graph"] = graph
+    except Exception:
+        logger.exception("Network graph rebuild failed")
+    finally:
+        current_binding().release()
+        _snapshot["rebuilding"] = False
+
+
+def current_graph() -> Graph:
+    """The process-wide snapshot; built on first use, refreshed in the background when stale."""
+    with _snapshot_lock:
+        graph = _snapshot["graph"]
+        stale = graph is None or time.monotonic() - graph.built_at > Config.NETWORK_REFRESH_SECONDS
+        start = stale and graph is not None and not _snapshot["rebuilding"]
+        if start:
+            _snapshot["rebuilding"] = True
+    if graph is None:
+        with _build_lock:
+            graph = _snapshot["graph"]
+            if graph is None:
+                graph = build()
+                with _snapshot_lock:
+                    _snapshot["graph"] = graph
+    elif start:
+        threading.Thread(target=_rebuild_snapshot, name="network-rebuild", daemon=True).start()
+    return graph
+
+
+def _affected(previous: Graph, current: Graph) -> set:
+    """Users whose suggestions may differ: changed rows plus everyone adjacent to or grouped with them, before or after."""
+    if previous is None:
+        return set(current.user_ids)
+    changed = {
+        uid for uid in set(current.user_ids) | set(previous.user_ids)
+        if current.signature(uid) != previous.signature(uid)
+    }
+    affected = set(changed)
+    for uid in changed:
+        for graph in (current, previous):
+            affected.update(graph.neighbors(uid))
+            affected.update(graph.groups(uid))
+    return affected
+
+
+def refresh_suggestions(previous: Graph = None) -> Graph:
+    """Rebuild the graph and rewrite stored suggestions for affected users only. Returns the new graph."""
+    cursor.execute("SELECT GET_LOCK('network_refresh', 0) AS got")
+    if not cursor.fetchone()["got"]:
+        return previous
+    try:
+        graph = build()
+        affected = sorted(_affected(previous, graph))
+        for i in range(0, len(affected), 500):
+            chunk = affected[i:i + 500]
+            cursor.execute(
+                f"DELETE FROM connection_suggestions WHERE user_id IN ({', '.join(['%s'] * len(chunk))})",
+                chunk,
+            )
+            rows = [
+                (uid, other, score, mutual_count)
+                for uid in chunk
+                for other, score, mutual_count in graph.suggestions(uid, Config.NETWORK_SUGGESTIONS)
+            ]
+            if rows:
+                cursor.executemany(
+                    "INSERT INTO connection_suggestions (user_id, suggested_id, score, mutual_count) VALUES (%s, %s, %s, %s)",
+                    rows,
+                )
+            db.commit()
+        # Nothing may have been rewritten: end build()'s read view so the next pass sees new rows
+        db.commit()
+        logger.info("Network refreshed: %d users, %d edges, %d suggestion lists rewritten",
+                    len(graph.user_ids), len(graph.targets) // 2, len(affected))
+        return graph
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK('network_refresh')")
+        cursor.fetchall()
@@ -0,0 +1,167 @@
+"""Opt-in sampling profiler for slow or randomly sampled requests.
+
+A background thread snapshots every thread's stack while at least one request
+is being profiled. Profiles are written in the folded-stack format understood by
+flamegraph.pl, speedscope and inferno. Samples are taken process-wide, so a
+profile captured under concurrency also contains frames from overlapping requests.
+"""
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from config import Config
+from deps import require_admin
+from metrics import route_label
+
+router = APIRouter(prefix="/admin/profiles", tags=["profiling"])
+
+_PROFILE_NAME = re.compile(r"^[\w.-]+\.folded$")
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+}
+
+
+def enabled() -> bool:
+    return Config.PROFILE_SAMPLE_RATE > 0 or Config.PROFILE_SLOW_MS > 0
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+
+def _fold(frame, max_depth: int = 128) -> str:
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _Session:
+    __slots__ = ("samples",)
+
+    def __init__(self):
+        self.samples = Counter()
+
+
+class _Sampler(threading.Thread):
+    """Samples stacks only while sessions are active; sleeps on an event otherwise."""
+
+    def __init__(self):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self._sessions = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def add(self, session: _Session):
+        with self._lock:
+            self._sessions.add(session)
+            self._wake.set()
+
+    def remove(self, session: _Session):
+        with self._lock:
+            self._sessions.discard(session)
+
+    def run(self):
+        me = threading.get_ident()
+        while True:
+            self._wake.wait()
+            with self._lock:
+                sessions = list(self._sessions)
+                if not sessions:
+                    self._wake.clear()
+                    continue
+            stacks = [
+                _fold(frame)
+                for tid, frame in sys._current_frames().items()
+                if tid != me and not _is_idle(frame)
+            ]
+            for session in sessions:
+                session.samples.update(stacks)
+            time.sleep(Config.PROFILE_INTERVAL_MS / 1000)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def _get_sampler() -> _Sampler:
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = _Sampler()
+            _sampler.start()
+    return _sampler
+
+
+def _save(session: _Session, method: str, route: str, elapsed: float):
+    os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    name = f"{int(time.time() * 1000)}-{method}-{slug}-{int(elapsed * 1000)}ms.folded"
+    with open(os.path.join(Config.PROFILE_DIR, name), "w") as f:
+        for stack, count in session.samples.most_common():
+            f.write(f"{stack} {count}\n")
+    profiles = sorted(p for p in os.listdir(Config.PROFILE_DIR) if _PROFILE_NAME.match(p))
+    for old in profiles[:-Config.PROFILE_MAX_FILES]:
+        os.remove(os.path.join(Config.PROFILE_DIR, old))
+
+
+class ProfilingMiddleware:
+    """Profiles a PROFILE_SAMPLE_RATE fraction of requests, plus any slower than PROFILE_SLOW_MS."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled():
+            await self.app(scope, receive, send)
+            return
+        sampled = random.random() < Config.PROFILE_SAMPLE_RATE
+        if not sampled and Config.PROFILE_SLOW_MS <= 0:
+            await self.app(scope, receive, send)
+            return
+        session = _Session()
+        sampler = _get_sampler()
+        sampler.add(session)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.remove(session)
+            elapsed = time.perf_counter() - start
+            slow = Config.PROFILE_SLOW_MS > 0 and elapsed * 1000 >= Config.PROFILE_SLOW_MS
+            if (sampled or slow) and session.samples:
+                await run_in_threadpool(_save, session, scope["method"], route_label(scope), elapsed)
+
+
+@router.get("")
+def list_profiles(admin: dict = Depends(require_admin)):
+    if not os.path.isdir(Config.PROFILE_DIR):
+        return []
+    result = []
+    for name in sorted(os.listdir(Config.PROFILE_DIR), reverse=True):
+        if not _PROFILE_NAME.match(name):
+            continue
+        st = os.stat(os.path.join(Config.PROFILE_DIR, name))
+        result.append({"name": name, "size": st.st_size, "createdAt": st.st_mtime})
+    return result
+
+
+@router.get("/{name}")
+def download_profile(name: str, admin: dict = Depends(require_admin)):
+    path = os.path.join(Config.PROFILE_DIR, name)
+    if not _PROFILE_NAME.match(name) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
@@ -0,0 +1,137 @@
+"""Admission control: per-user token buckets and a concurrency cap for expensive routes.
+
+Each request is charged against a bucket for (caller, route class), where the
+caller is the token's email or, for anonymous requests, the client address. A
+request that would have a token within RATE_LIMIT_QUEUE_MS waits for it;
+otherwise it is rejected with 429. Expensive routes must also take one of
+ADMISSION_EXPENSIVE_CONCURRENCY slots, waiting at most ADMISSION_QUEUE_TIMEOUT_MS
+before a 503. Both rejections carry Retry-After and never touch the database.
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict
+
+from jose import jwt, JWTError
+from starlette.responses import JSONResponse
+
+from config import Config
+from deps import SECRET_KEY
+from security import ALGORITHM
+
+EXEMPT_PATHS = ("/healthz", "/readyz", "/metrics", "/docs", "/redoc", "/openapi.json")
+MAX_BUCKETS = 50000
+
+
+def _limits() -> dict:
+    return {
+        "read": (Config.RATE_LIMIT_READ_RATE, Config.RATE_LIMIT_READ_BURST),
+        "write": (Config.RATE_LIMIT_WRITE_RATE, Config.RATE_LIMIT_WRITE_BURST),
+        "expensive": (Config.RATE_LIMIT_EXPENSIVE_RATE, Config.RATE_LIMIT_EXPENSIVE_BURST),
+    }
+
+
+def route_class(method: str, path: str) -> str:
+    if method not in ("GET", "HEAD"):
+        return "write"
+    # Exact paths: /messages/conversations is the list, not the threads and get-or-create routes under it
+    if (path.rstrip("/") or "/") in Config.RATE_LIMIT_EXPENSIVE_PATHS:
+        return "expensive"
+    return "read"
+
+
+def _caller(scope) -> str:
+    for key, value in scope["headers"]:
+        if key == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer":
+                try:
+                    email = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("email")
+                except JWTError:
+                    email = None
+                if email:
+                    return f"user:{email}"
+            break
+    client = scope.get("client")
+    return f"addr:{client[0] if client else '-'}"
+
+
+class TokenBuckets:
+    """Token buckets keyed by (caller, class), at most MAX_BUCKETS of them, least recently used
+    evicted first. Only touched from the event loop thread."""
+
+    def __init__(self, limits: dict):
+        self.limits = limits
+        self._buckets = OrderedDict()
+
+    def reserve(self, key: tuple, now: float) -> float:
+        """Take a token, going into debt if needed; returns seconds until it is actually available."""
+        rate, burst = self.limits[key[1]]
+        tokens, last = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - last) * rate) - 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > MAX_BUCKETS:
+            # The oldest bucket has been idle longest, so it has most likely refilled anyway
+            self._buckets.popitem(last=False)
+        return 0.0 if tokens >= 0 else -tokens / rate
+
+    def refund(self, key: tuple):
+        tokens, last = self._buckets[key]
+        self._buckets[key] = (tokens + 1, last)
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RateLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.buckets = TokenBuckets(_limits())
+        self._slots = None
+        self._waiting = 0
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not Config.RATE_LIMIT_ENABLED
+            or scope["method"] == "OPTIONS"
+            or scope["path"].startswith(EXEMPT_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+        cls = route_class(scope["method"], scope["path"])
+        key = (_caller(scope), cls)
+        wait = self.buckets.reserve(key, time.monotonic())
+        if wait > Config.RATE_LIMIT_QUEUE_MS / 1000:
+            self.buckets.refund(key)
+            await _reject(429, "Too many requests", wait)(scope, receive, send)
+            return
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if cls != "expensive":
+            await self.app(scope, receive, send)
+            return
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(Config.ADMISSION_EXPENSIVE_CONCURRENCY)
+        timeout = Config.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+        if self._waiting >= Config.ADMISSION_MAX_QUEUE:
+            await _reject(503, "Server busy", timeout)(scope, receive, send)
+            return
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            await _reject(503, "Server busy", timeout)(scope, receive, send)
+            return
+        finally:
+            self._waiting -= 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._slots.release()
@@ -1,13 +1,27 @@
 """Job applications."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 
 from database import cursor, db
 from deps import get_current_user, get_current_user_id, require_admin
+from fieldsets import FieldSet
+import tasks
+import writes
 
 router = APIRouter(prefix="/applications", tags=["applications"])
 
+APPLICATION_FIELDS = FieldSet({
+    "id": ("a.id",),
+    "jobId": ("a.job_id",),
+    "studentId": ("a.student_id",),
+    "studentName": ("u.name as student_name",),
+    "coverLetter": ("a.cover_letter",),
+    "resume": ("a.resume_url",),
+    "appliedDate": ("a.created_at",),
+    "status": ("a.status",),
+})
+
 
 class CreateApplication(BaseModel):
     job_id: int
@@ -22,8 +36,8 @@ class UpdateApplicationStatus(BaseModel):
 def _row_to_app(row: dict, student_name: str = "") -> dict:
     return {
         "id": str(row["id"]),
-        "jobId": str(row["job_id"]),
-        "studentId": str(row["student_id"]),
+        "jobId": str(row.get("job_id")),
+        "studentId": str(row.get("student_id")),
         "studentName": student_name,
         "coverLetter": row.get("cover_letter"),
         "resume": row.get("resume_url"),
@@ -32,56 +46,69 @@ def _row_to_app(row: dict, student_name: str = "") -> dict:
     }
 
 
+def _history(select: str, where: str, params: tuple) -> list:
+    """Applications matching `where` (on `a`), hot and archived alike (see archive.py), newest first."""
+    parts = [
+        f"SELECT {select}, a.created_at AS applied_at FROM {table} a JOIN users u ON a.student_id = u.id WHERE {where}"
+        for table in ("applications", "applications_archive")
+    ]
+    cursor.execute(" UNION ALL ".join(parts) + " ORDER BY applied_at DESC", params * 2)
+    return cursor.fetchall()
+
+
 @router.get("")
-def list_applications(job_id: Optional[int] = None, current_user: dict = Depends(get_current_user)):
+def list_applications(
+    job_id: Optional[int] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated response keys, e.g. id,status"),
+    current_user: dict = Depends(get_current_user),
+):
     user_id = current_user["id"]
     role = current_user["role"]
+    keys = APPLICATION_FIELDS.parse(fields)
+    select = APPLICATION_FIELDS.sql(keys)
     if job_id is not None:
         cursor.execute("SELECT posted_by_id FROM jobs WHERE id = %s", (job_id,))
         job = cursor.fetchone()
+        if not job:
+            cursor.execute("SELECT posted_by_id FROM jobs_archive WHERE id = %s", (job_id,))
+            job = cursor.fetchone()
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         if role != "admin" and job["posted_by_id"] != user_id:
             raise HTTPException(status_code=403, detail="Not your job")
-        cursor.execute(
-            """SELECT a.*, u.name as student_name FROM applications a
-               JOIN users u ON a.student_id = u.id WHERE a.job_id = %s ORDER BY a.created_at DESC""",
-            (job_id,),
-        )
+        rows = _history(select, "a.job_id = %s", (job_id,))
+    elif role == "student":
+        rows = _history(select, "a.student_id = %s", (user_id,))
     else:
-        if role == "student":
-            cursor.execute(
-                """SELECT a.*, u.name as student_name FROM applications a
-                   JOIN users u ON a.student_id = u.id WHERE a.student_id = %s ORDER BY a.created_at DESC""",
-                (user_id,),
-            )
-        else:
-            cursor.execute(
-                """SELECT a.*, u.name as student_name FROM applications a
-                   JOIN users u ON a.student_id = u.id ORDER BY a.created_at DESC"""
-            )
-    rows = cursor.fetchall()
-    return [_row_to_app(r, r.get("student_name") or "") for r in rows]
+        rows = _history(select, "TRUE", ())
+    return [APPLICATION_FIELDS.prune(_row_to_app(r, r.get("student_name") or ""), keys) for r in rows]
 
 
 @router.post("")
 def create_application(data: CreateApplication, user_id: int = Depends(get_current_user_id), current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "student":
         raise HTTPException(status_code=403, detail="Only students can apply")
-    cursor.execute("SELECT id FROM jobs WHERE id = %s", (data.job_id,))
-    if not cursor.fetchone():
+    cursor.execute("SELECT id, title, company, posted_by_id FROM jobs WHERE id = %s", (data.job_id,))
+    job = cursor.fetchone()
+    if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    cursor.execute("SELECT id FROM applications WHERE job_id = %s AND student_id = %s", (data.job_id, user_id))
-    if cursor.fetchone():
-        raise HTTPException(status_code=400, detail="Already applied")
-    cursor.execute(
-        "INSERT INTO applications (job_id, student_id, cover_letter, resume_url, status) VALUES (%s, %s, %s, %s, 'pending')",
-        (data.job_id, user_id, data.cover_letter, data.resume_url),
-    )
+    # unique_application (job_id, student_id) rules out applying twice
+    row = writes.insert("applications", {
+        "job_id": data.job_id,
+        "student_id": user_id,
+        "cover_letter": data.cover_letter,
+        "resume_url": data.resume_url,
+        "status": "pending",
+        "created_at": writes.now(),
+    }, duplicate="Already applied", missing="Job not found")
+    app_id = row["id"]
+    tasks.enqueue("admin_alert", {"event": "application_created", "application_id": app_id, "job_id": data.job_id,
+                                  "summary": f"{current_user['name']} applied to {job['title']} at {job['company']}"})
+    tasks.enqueue("notify", {"user_ids": [job["posted_by_id"]], "notification": {
+        "type": "job", "title": "New application",
+        "message": f"{current_user['name']} applied to {job['title']}", "action_url": f"/jobs/{data.job_id}"}})
     db.commit()
-    app_id = cursor.lastrowid
-    cursor.execute("SELECT a.*, u.name as student_name FROM applications a JOIN users u ON a.student_id = u.id WHERE a.id = %s", (app_id,))
-    return _row_to_app(cursor.fetchone(), current_user["name"])
+    return _row_to_app(row, current_user["name"])
 
 
 @router.patch("/{app_id}")
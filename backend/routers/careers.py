@@ -0,0 +1,70 @@
+"""Career paths: per-user role history and common next moves."""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from database import cursor
+from deps import get_current_user
+import careers
+
+router = APIRouter(prefix="/careers", tags=["careers"])
+
+
+def _duration(start: datetime, end: datetime) -> str:
+    months = max((end.year - start.year) * 12 + end.month - start.month, 0)
+    years, months = divmod(months, 12)
+    parts = [f"{years} yr" + ("s" if years != 1 else "")] if years else []
+    if months or not years:
+        parts.append(f"{months} mo")
+    return " ".join(parts)
+
+
+def _history(user_id: int) -> list:
+    cursor.execute("SELECT id FROM users WHERE id = %s", (user_id,))
+    if not cursor.fetchone():
+        raise HTTPException(status_code=404, detail="User not found")
+    # idx_role_history_user: one range read in start order
+    cursor.execute(
+        "SELECT organization, role, industry, started_at FROM role_history WHERE user_id = %s ORDER BY started_at, id",
+        (user_id,),
+    )
+    rows = cursor.fetchall()
+    now = datetime.utcnow()
+    path = []
+    for i, r in enumerate(rows):
+        end = rows[i + 1]["started_at"] if i + 1 < len(rows) else now
+        path.append({
+            "title": r.get("role") or "",
+            "company": r.get("organization") or "",
+            "industry": r.get("industry") or "",
+            "duration": _duration(r["started_at"], end),
+            "skills": [],
+            "year": str(r["started_at"].year),
+            "current": i + 1 == len(rows),
+        })
+    # Most recent position first, as the timeline shows it
+    return path[::-1]
+
+
+@router.get("/history/me")
+def my_history(current_user: dict = Depends(get_current_user)):
+    return _history(current_user["id"])
+
+
+@router.get("/history/{user_id}")
+def user_history(user_id: int, current_user: dict = Depends(get_current_user)):
+    return _history(user_id)
+
+
+@router.get("/next-moves")
+def next_moves(
+    role: Optional[str] = None,
+    industry: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+):
+    if bool(role) == bool(industry):
+        raise HTTPException(status_code=400, detail="Give exactly one of role or industry")
+    kind, source = ("role", role) if role else ("industry", industry)
+    return {"from": careers.normalize(source), "kind": kind, "moves": careers.next_moves(kind, source, limit)}
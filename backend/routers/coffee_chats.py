@@ -0,0 +1,200 @@
+"""Virtual coffee chats: availability, free-slot search and bookings."""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+import mysql.connector
+
+from config import Config
+from database import cursor, db
+from deps import get_current_user
+import scheduling
+import tasks
+
+router = APIRouter(prefix="/coffee-chats", tags=["coffee-chats"])
+
+MEETING_TYPES = ("virtual", "in-person", "phone")
+# status -> statuses it may move to, and who may make the move
+TRANSITIONS = {
+    "pending": {"accepted": "recipient", "declined": "recipient", "cancelled": "either"},
+    "accepted": {"completed": "either", "cancelled": "either"},
+}
+FREES_SLOTS = ("declined", "cancelled")
+
+
+class Window(BaseModel):
+    weekday: int = Field(ge=0, le=6)  # 0 = Monday
+    start: str  # "HH:MM", UTC
+    end: str
+
+
+class SetAvailability(BaseModel):
+    windows: List[Window]
+
+
+class CreateCoffeeChat(BaseModel):
+    recipient_id: int
+    topic: str
+    message: str = ""
+    date: str  # YYYY-MM-DD, UTC
+    time: str  # HH:MM, UTC
+    duration: int = 30
+    meeting_type: str = "virtual"
+
+
+class UpdateCoffeeChat(BaseModel):
+    status: str
+
+
+def _row_to_chat(row: dict) -> dict:
+    return {
+        "id": str(row["id"]),
+        "requesterId": str(row["requester_id"]),
+        "requesterName": row.get("requester_name") or "",
+        "requesterAvatar": row.get("requester_avatar") or "",
+        "recipientId": str(row["recipient_id"]),
+        "recipientName": row.get("recipient_name") or "",
+        "recipientAvatar": row.get("recipient_avatar") or "",
+        "topic": row["topic"],
+        "date": str(row["starts_at"].date()),
+        "time": row["starts_at"].strftime("%H:%M"),
+        "duration": row["duration_minutes"],
+        "meetingType": row["meeting_type"],
+        "status": row["status"],
+        "message": row.get("message") or "",
+        "createdAt": str(row["created_at"]) if row.get("created_at") else "",
+    }
+
+
+_CHAT_SELECT = (
+    "SELECT c.*, r.name as requester_name, r.avatar as requester_avatar, "
+    "p.name as recipient_name, p.avatar as recipient_avatar FROM coffee_chats c "
+    "JOIN users r ON r.id = c.requester_id JOIN users p ON p.id = c.recipient_id"
+)
+
+
+@router.get("/availability")
+def get_availability(user_id: Optional[int] = None, current_user: dict = Depends(get_current_user)):
+    cursor.execute(
+        "SELECT weekday, start_minute, end_minute FROM availability_windows WHERE user_id = %s ORDER BY weekday, start_minute",
+        (user_id or current_user["id"],),
+    )
+    return [
+        {"weekday": r["weekday"], "start": scheduling.format_hhmm(r["start_minute"]), "end": scheduling.format_hhmm(r["end_minute"])}
+        for r in cursor.fetchall()
+    ]
+
+
+@router.put("/availability")
+def set_availability(data: SetAvailability, current_user: dict = Depends(get_current_user)):
+    rows = []
+    for w in data.windows:
+        try:
+            start, end = scheduling.parse_hhmm(w.start), scheduling.parse_hhmm(w.end)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Times must be HH:MM")
+        if start >= end:
+            raise HTTPException(status_code=400, detail="Window must end after it starts")
+        rows.append((current_user["id"], w.weekday, start, end))
+    cursor.execute("DELETE FROM availability_windows WHERE user_id = %s", (current_user["id"],))
+    if rows:
+        cursor.executemany(
+            "INSERT INTO availability_windows (user_id, weekday, start_minute, end_minute) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+    db.commit()
+    return get_availability(None, current_user)
+
+
+@router.get("/slots")
+def find_slots(
+    user_ids: str = Query(..., description="Comma-separated ids of the other participants"),
+    duration: int = Query(30, ge=15, le=240),
+    days: int = Query(14, ge=1),
+    limit: int = Query(20, ge=1, le=200),
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        others = {int(x) for x in user_ids.split(",") if x.strip()}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="user_ids must be comma-separated integers")
+    if not others or len(others) > Config.COFFEE_MAX_GROUP:
+        raise HTTPException(status_code=400, detail=f"Give between 1 and {Config.COFFEE_MAX_GROUP} other participants")
+    if duration % Config.COFFEE_SLOT_MINUTES:
+        raise HTTPException(status_code=400, detail=f"Duration must be a multiple of {Config.COFFEE_SLOT_MINUTES} minutes")
+    participants = sorted(others | {current_user["id"]})
+    slots = scheduling.find_slots(participants, duration, min(days, Config.COFFEE_HORIZON_DAYS), limit)
+    return [{"date": str(s.date()), "time": s.strftime("%H:%M"), "duration": duration} for s in slots]
+
+
+@router.get("")
+def list_coffee_chats(current_user: dict = Depends(get_current_user)):
+    cursor.execute(
+        f"{_CHAT_SELECT} WHERE c.requester_id = %s OR c.recipient_id = %s ORDER BY c.starts_at DESC",
+        (current_user["id"], current_user["id"]),
+    )
+    return [_row_to_chat(r) for r in cursor.fetchall()]
+
+
+@router.post("")
+def book_coffee_chat(data: CreateCoffeeChat, current_user: dict = Depends(get_current_user)):
+    if data.recipient_id == current_user["id"]:
+        raise HTTPException(status_code=400, detail="Cannot book a chat with yourself")
+    if data.meeting_type not in MEETING_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid meeting type")
+    if data.duration <= 0 or data.duration % Config.COFFEE_SLOT_MINUTES:
+        raise HTTPException(status_code=400, detail=f"Duration must be a multiple of {Config.COFFEE_SLOT_MINUTES} minutes")
+    try:
+        starts_at = scheduling.parse_start(data.date, data.time)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date or time")
+    if starts_at <= datetime.utcnow():
+        raise HTTPException(status_code=400, detail="Start time must be in the future")
+    if starts_at.minute % Config.COFFEE_SLOT_MINUTES:
+        raise HTTPException(status_code=400, detail=f"Start time must fall on a {Config.COFFEE_SLOT_MINUTES}-minute boundary")
+    cursor.execute("SELECT id FROM users WHERE id = %s", (data.recipient_id,))
+    if not cursor.fetchone():
+        raise HTTPException(status_code=404, detail="User not found")
+    if not scheduling.within_availability(data.recipient_id, starts_at, data.duration):
+        raise HTTPException(status_code=409, detail="Recipient is not available at that time")
+    cursor.execute(
+        "INSERT INTO coffee_chats (requester_id, recipient_id, topic, message, meeting_type, starts_at, duration_minutes, status) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, 'pending')",
+        (current_user["id"], data.recipient_id, data.topic, data.message, data.meeting_type, starts_at, data.duration),
+    )
+    chat_id = cursor.lastrowid
+    try:
+        scheduling.claim_slots(chat_id, [current_user["id"], data.recipient_id], starts_at, data.duration)
+    except mysql.connector.IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="That time is already booked")
+    tasks.enqueue("notify", {"user_ids": [data.recipient_id], "notification": {
+        "type": "message", "title": "Coffee chat request",
+        "message": f"{current_user['name']} wants to chat about {data.topic} on {data.date} at {data.time} UTC",
+        "action_url": "/coffee-chats"}})
+    db.commit()
+    cursor.execute(f"{_CHAT_SELECT} WHERE c.id = %s", (chat_id,))
+    return _row_to_chat(cursor.fetchone())
+
+
+@router.patch("/{chat_id}")
+def update_coffee_chat(chat_id: int, data: UpdateCoffeeChat, current_user: dict = Depends(get_current_user)):
+    cursor.execute("SELECT id, requester_id, recipient_id, status FROM coffee_chats WHERE id = %s FOR UPDATE", (chat_id,))
+    chat = cursor.fetchone()
+    if not chat or current_user["id"] not in (chat["requester_id"], chat["recipient_id"]):
+        raise HTTPException(status_code=404, detail="Coffee chat not found")
+    allowed = TRANSITIONS.get(chat["status"], {}).get(data.status)
+    if allowed is None:
+        raise HTTPException(status_code=400, detail=f"Cannot move a {chat['status']} chat to {data.status}")
+    if allowed == "recipient" and current_user["id"] != chat["recipient_id"]:
+        raise HTTPException(status_code=403, detail="Only the recipient can do that")
+    cursor.execute("UPDATE coffee_chats SET status = %s WHERE id = %s", (data.status, chat_id))
+    if data.status in FREES_SLOTS:
+        scheduling.release_slots(chat_id)
+    other = chat["recipient_id"] if current_user["id"] == chat["requester_id"] else chat["requester_id"]
+    tasks.enqueue("notify", {"user_ids": [other], "notification": {
+        "type": "message", "title": f"Coffee chat {data.status}",
+        "message": f"{current_user['name']} marked your coffee chat as {data.status}", "action_url": "/coffee-chats"}})
+    db.commit()
+    cursor.execute(f"{_CHAT_SELECT} WHERE c.id = %s", (chat_id,))
+    return _row_to_chat(cursor.fetchone())
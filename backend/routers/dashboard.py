@@ -0,0 +1,210 @@
+"""One-request dashboard bootstrap.
+
+GET /dashboard authenticates once, then runs the sections the caller's role
+needs concurrently through database.fan_out, each on its own pooled
+connection. Every list section holds at most DASHBOARD_SECTION_LIMIT items
+with a `hasMore` flag (one extra row is read instead of a COUNT), and long
+text fields are cut to DASHBOARD_TEXT_CHARS, so the payload size is bounded
+whatever the data. A failed section comes back as null and is named in
+`errors`; the rest of the dashboard still renders.
+"""
+from fastapi import APIRouter, Depends
+
+import archive
+from config import Config
+import database
+from database import cursor
+from deps import get_current_user
+import inbox
+from routers.applications import _row_to_app
+from routers.events import _row_to_event
+from routers.jobs import _row_to_job
+from routers.mentorship import _row_to_request
+from routers.users import _row_to_user
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+_TEXT_FIELDS = ("description", "message", "coverLetter", "lastMessage", "bio")
+
+
+def _clip(item: dict) -> dict:
+    limit = Config.DASHBOARD_TEXT_CHARS
+    for field in _TEXT_FIELDS:
+        value = item.get(field)
+        if isinstance(value, str) and len(value) > limit:
+            item[field] = value[:limit - 1] + "…"
+    return item
+
+
+def _section(rows: list, to_item) -> dict:
+    limit = Config.DASHBOARD_SECTION_LIMIT
+    return {"items": [_clip(to_item(r)) for r in rows[:limit]], "hasMore": len(rows) > limit}
+
+
+def _limit() -> int:
+    # One past the cap tells whether there is more without counting
+    return Config.DASHBOARD_SECTION_LIMIT + 1
+
+
+def _conversations(user: dict):
+    def load():
+        cursor.execute(
+            """SELECT c.id, lm.content as last_message, lm.created_at as last_time,
+               u.id as other_id, u.name as other_name, u.role as other_role, u.avatar as other_avatar,
+               (SELECT COUNT(*) FROM messages m
+                 WHERE m.conversation_id = c.id AND m.id > p.last_read_message_id AND m.sender_id != p.user_id) as unread
+               FROM conversation_participants p
+               JOIN conversations c ON c.id = p.conversation_id
+               JOIN conversation_participants o ON o.conversation_id = c.id AND o.user_id != p.user_id
+               JOIN users u ON u.id = o.user_id
+               LEFT JOIN messages lm ON lm.id = c.last_message_id
+               WHERE p.user_id = %s AND c.last_message_id IS NOT NULL
+               ORDER BY c.last_message_id DESC LIMIT %s""",
+            (user["id"], _limit()),
+        )
+        return _section(cursor.fetchall(), lambda c: {
+            "id": str(c["id"]),
+            "otherId": str(c["other_id"]),
+            "otherName": c["other_name"],
+            "otherRole": c["other_role"],
+            "otherAvatar": c.get("other_avatar"),
+            "lastMessage": c.get("last_message") or "",
+            "lastMessageTime": str(c["last_time"]) if c.get("last_time") else "",
+            "unreadCount": c["unread"],
+        })
+    return load
+
+
+def _notifications(user: dict):
+    return lambda: {"unread": inbox.unread_count(user["id"], user["role"])}
+
+
+def _open_jobs():
+    cursor.execute(
+        "SELECT j.id, j.title, j.company, j.location, j.type, j.description, j.requirements, j.posted_by_id, "
+        "j.posted_by_name, j.status, j.created_at, (SELECT COUNT(*) FROM applications a WHERE a.job_id = j.id) AS applicants "
+        "FROM jobs j WHERE j.status = 'open' ORDER BY j.id DESC LIMIT %s",
+        (_limit(),),
+    )
+    return _section(cursor.fetchall(), lambda r: _row_to_job(r, r["applicants"]))
+
+
+def _posted_jobs(user: dict):
+    def load():
+        cursor.execute(
+            "SELECT j.id, j.title, j.company, j.location, j.type, j.description, j.requirements, j.posted_by_id, "
+            "j.posted_by_name, j.status, j.created_at, (SELECT COUNT(*) FROM applications a WHERE a.job_id = j.id) AS applicants "
+            "FROM jobs j WHERE j.posted_by_id = %s ORDER BY j.id DESC LIMIT %s",
+            (user["id"], _limit()),
+        )
+        return _section(cursor.fetchall(), lambda r: _row_to_job(r, r["applicants"]))
+    return load
+
+
+def _upcoming_events(user: dict):
+    def load():
+        cursor.execute(
+            "SELECT e.id, e.title, e.event_date, e.event_time, e.location, e.description, e.type, e.max_capacity, "
+            "e.organizer, e.status, (SELECT COUNT(*) FROM event_registrations r WHERE r.event_id = e.id) AS registered, "
+            "EXISTS (SELECT 1 FROM event_registrations r WHERE r.event_id = e.id AND r.user_id = %s) AS is_registered "
+            "FROM events e WHERE e.event_date >= CURDATE() ORDER BY e.event_date, e.event_time LIMIT %s",
+            (user["id"], _limit()),
+        )
+        return _section(cursor.fetchall(), lambda r: dict(_row_to_event(r, r["registered"]), isRegistered=bool(r["is_registered"])))
+    return load
+
+
+def _my_applications(user: dict):
+    def load():
+        # Applications to archived jobs were moved with them (see archive.py) and are still the student's history
+        columns = ", ".join("a." + c for c in archive.COLUMNS["applications"])
+        parts = [
+            f"(SELECT {columns}, j.title AS job_title, j.company FROM {table} a JOIN {jobs} j ON j.id = a.job_id "
+            "WHERE a.student_id = %s ORDER BY a.id DESC LIMIT %s)"
+            for table, jobs in (("applications", "jobs"), ("applications_archive", "jobs_archive"))
+        ]
+        cursor.execute(" UNION ALL ".join(parts) + " ORDER BY id DESC LIMIT %s", (user["id"], _limit()) * 2 + (_limit(),))
+        return _section(cursor.fetchall(), lambda r: dict(_row_to_app(r, user["name"]), jobTitle=r["job_title"], company=r["company"]))
+    return load
+
+
+def _mentorship(user: dict, column: str):
+    def load():
+        # Pending first: those are the ones waiting on someone
+        cursor.execute(
+            f"""SELECT m.*, u1.name as student_name, u2.name as mentor_name
+               FROM mentorship_requests m
+               JOIN users u1 ON m.student_id = u1.id
+               LEFT JOIN users u2 ON m.mentor_id = u2.id
+               WHERE m.{column} = %s ORDER BY m.status = 'pending' DESC, m.id DESC LIMIT %s""",
+            (user["id"], _limit()),
+        )
+        return _section(cursor.fetchall(), lambda r: _row_to_request(r, r.get("student_name") or "", r.get("mentor_name") or ""))
+    return load
+
+
+def _referral_stats(user: dict):
+    def load():
+        cursor.execute("SELECT total, pending, hired, bonus_earned FROM referrer_stats WHERE referrer_id = %s", (user["id"],))
+        row = cursor.fetchone() or {}
+        return {"total": row.get("total", 0), "pending": row.get("pending", 0), "hired": row.get("hired", 0),
+                "bonusEarned": row.get("bonus_earned", 0)}
+    return load
+
+
+def _admin_totals():
+    cursor.execute(
+        "SELECT (SELECT COUNT(*) FROM users WHERE role = 'student') AS students, "
+        "(SELECT COUNT(*) FROM users WHERE role = 'alumni' AND is_approved = 1) AS alumni, "
+        "(SELECT COUNT(*) FROM users WHERE role = 'alumni' AND is_approved = 0) AS pending_alumni, "
+        "(SELECT COUNT(*) FROM jobs WHERE status = 'open') AS open_jobs, "
+        "(SELECT COUNT(*) FROM events WHERE event_date >= CURDATE()) AS upcoming_events, "
+        "(SELECT COUNT(*) FROM mentorship_requests WHERE status = 'pending') AS pending_mentorship, "
+        "(SELECT COALESCE(SUM(amount), 0) FROM donations) AS donations_total"
+    )
+    r = cursor.fetchone()
+    return {
+        "students": r["students"],
+        "alumni": r["alumni"],
+        "pendingAlumni": r["pending_alumni"],
+        "openJobs": r["open_jobs"],
+        "upcomingEvents": r["upcoming_events"],
+        "pendingMentorship": r["pending_mentorship"],
+        "donationsTotal": float(r["donations_total"]),
+    }
+
+
+def _pending_alumni():
+    cursor.execute(
+        "SELECT id, name, email, graduation_year, current_organization, current_role, created_at FROM users "
+        "WHERE role = 'alumni' AND is_approved = 0 ORDER BY id LIMIT %s",
+        (_limit(),),
+    )
+    return _section(cursor.fetchall(), lambda r: {
+        "id": str(r["id"]),
+        "name": r["name"],
+        "email": r["email"],
+        "graduation_year": r.get("graduation_year"),
+        "current_organization": r.get("current_organization"),
+        "current_role": r.get("current_role"),
+        "created_at": str(r.get("created_at")),
+    })
+
+
+def _sections(user: dict) -> dict:
+    sections = {"notifications": _notifications(user), "conversations": _conversations(user), "events": _upcoming_events(user)}
+    if user["role"] == "student":
+        sections.update(jobs=_open_jobs, applications=_my_applications(user), mentorship=_mentorship(user, "student_id"))
+    elif user["role"] == "alumni":
+        sections.update(postedJobs=_posted_jobs(user), mentorship=_mentorship(user, "mentor_id"), referrals=_referral_stats(user))
+    else:
+        sections.update(totals=_admin_totals, pendingAlumni=_pending_alumni, jobs=_open_jobs)
+    return sections
+
+
+@router.get("")
+def dashboard(current_user: dict = Depends(get_current_user)):
+    results = database.fan_out(_sections(current_user))
+    errors = sorted(name for name, value in results.items() if isinstance(value, Exception))
+    payload = {name: None if name in errors else value for name, value in results.items()}
+    return dict(payload, me=_row_to_user(current_user), role=current_user["role"], errors=errors)
@@ -1,13 +1,28 @@
 """Donations: create and list."""
-from fastapi import APIRouter, Depends, HTTPException
+from decimal import Decimal, ROUND_HALF_UP
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 
 from database import cursor, db
 from deps import get_current_user, get_current_user_id, require_admin
+from fieldsets import FieldSet
+import writes
 
 router = APIRouter(prefix="/donations", tags=["donations"])
 
+DONATION_FIELDS = FieldSet({
+    "id": ("d.id",),
+    "userId": ("d.user_id",),
+    "donorName": ("d.is_anonymous",),
+    "amount": ("d.amount",),
+    "currency": ("d.currency",),
+    "message": ("d.message",),
+    "isAnonymous": ("d.is_anonymous",),
+    "createdAt": ("d.created_at",),
+})
+
 
 class CreateDonation(BaseModel):
     amount: float
@@ -19,9 +34,9 @@ class CreateDonation(BaseModel):
 def _row_to_donation(row: dict, user_name: Optional[str] = None) -> dict:
     return {
         "id": str(row["id"]),
-        "userId": str(row["user_id"]),
+        "userId": str(row.get("user_id")),
         "donorName": None if row.get("is_anonymous") else user_name,
-        "amount": float(row["amount"]),
+        "amount": float(row.get("amount") or 0),
         "currency": row.get("currency") or "USD",
         "message": row.get("message"),
         "isAnonymous": bool(row.get("is_anonymous")),
@@ -33,42 +48,39 @@ def _row_to_donation(row: dict, user_name: Optional[str] = None) -> dict:
 def create_donation(data: CreateDonation, user_id: int = Depends(get_current_user_id), current_user: dict = Depends(get_current_user)):
     if data.amount <= 0:
         raise HTTPException(status_code=400, detail="Amount must be positive")
-    cursor.execute(
-        "INSERT INTO donations (user_id, amount, currency, message, is_anonymous) VALUES (%s, %s, %s, %s, %s)",
-        (user_id, data.amount, data.currency, data.message, 1 if data.is_anonymous else 0),
-    )
+    row = writes.insert("donations", {
+        "user_id": user_id,
+        # DECIMAL(12,2): send what will be stored
+        "amount": Decimal(str(data.amount)).quantize(Decimal("0.01"), ROUND_HALF_UP),
+        "currency": data.currency,
+        "message": data.message,
+        "is_anonymous": 1 if data.is_anonymous else 0,
+        "created_at": writes.now(),
+    })
     db.commit()
-    d_id = cursor.lastrowid
-    cursor.execute("SELECT * FROM donations WHERE id = %s", (d_id,))
-    row = cursor.fetchone()
     return _row_to_donation(row, current_user["name"])
 
 
 @router.get("")
-def list_donations(current_user: dict = Depends(get_current_user)):
+def list_donations(
+    fields: Optional[str] = Query(None, description="Comma-separated response keys, e.g. id,amount,createdAt"),
+    current_user: dict = Depends(get_current_user),
+):
+    keys = DONATION_FIELDS.parse(fields)
+    select = DONATION_FIELDS.sql(keys)
     if current_user.get("role") == "admin":
+        with_name = DONATION_FIELDS.wants(keys, "donorName")
         cursor.execute(
-            "SELECT d.*, u.name as donor_name FROM donations d JOIN users u ON d.user_id = u.id ORDER BY d.created_at DESC"
+            f"SELECT {select}{', u.name as donor_name' if with_name else ''} FROM donations d "
+            f"{'JOIN users u ON d.user_id = u.id ' if with_name else ''}ORDER BY d.created_at DESC"
         )
         rows = cursor.fetchall()
-        return [
-            {
-                "id": str(r["id"]),
-                "userId": str(r["user_id"]),
-                "donorName": None if r.get("is_anonymous") else r.get("donor_name"),
-                "amount": float(r["amount"]),
-                "currency": r.get("currency") or "USD",
-                "message": r.get("message"),
-                "isAnonymous": bool(r.get("is_anonymous")),
-                "createdAt": str(r["created_at"]) if r.get("created_at") else None,
-            }
-            for r in rows
-        ]
+        return [DONATION_FIELDS.prune(_row_to_donation(r, r.get("donor_name")), keys) for r in rows]
     # Own donations only
     user_id = current_user["id"]
-    cursor.execute("SELECT * FROM donations WHERE user_id = %s ORDER BY created_at DESC", (user_id,))
+    cursor.execute(f"SELECT {select} FROM donations d WHERE d.user_id = %s ORDER BY d.created_at DESC", (user_id,))
     rows = cursor.fetchall()
-    return [_row_to_donation(r, current_user["name"]) for r in rows]
+    return [DONATION_FIELDS.prune(_row_to_donation(r, current_user["name"]), keys) for r in rows]
 
 
 @router.get("/stats")
@@ -1,17 +1,41 @@
 """Events CRUD and registration."""
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 
 from database import cursor, db
-from deps import get_current_user, get_current_user_id, require_admin
+from deps import batch_ids, get_current_user, get_current_user_id, require_admin
+from fieldsets import FieldSet
+import tasks
+import writes
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+EVENT_FIELDS = FieldSet({
+    "id": ("e.id",),
+    "title": ("e.title",),
+    "date": ("e.event_date",),
+    "time": ("e.event_time",),
+    "location": ("e.location",),
+    "description": ("e.description",),
+    "type": ("e.type",),
+    "maxCapacity": ("e.max_capacity",),
+    "registeredCount": ("(SELECT COUNT(*) FROM event_registrations r WHERE r.event_id = e.id) AS registered",),
+    "organizer": ("e.organizer",),
+    "status": ("e.status",),
+})
+# Past events and their registrations live in events_archive (see archive.py)
+EVENT_ARCHIVE_FIELDS = FieldSet(dict(
+    EVENT_FIELDS.columns,
+    registeredCount=("(SELECT COUNT(*) FROM event_registrations_archive r WHERE r.event_id = e.id) AS registered",),
+))
+
 
 class CreateEvent(BaseModel):
     title: str
-    event_date: str
+    event_date: date
     event_time: str
     location: str
     description: str
@@ -22,7 +46,7 @@ class CreateEvent(BaseModel):
 
 class UpdateEvent(BaseModel):
     title: Optional[str] = None
-    event_date: Optional[str] = None
+    event_date: Optional[date] = None
     event_time: Optional[str] = None
     location: Optional[str] = None
     description: Optional[str] = None
@@ -35,80 +59,103 @@ class UpdateEvent(BaseModel):
 def _row_to_event(row: dict, registered_count: int = 0) -> dict:
     return {
         "id": str(row["id"]),
-        "title": row["title"],
+        "title": row.get("title"),
         "date": str(row["event_date"]) if row.get("event_date") else "",
         "time": row.get("event_time") or "",
-        "location": row["location"],
-        "description": row["description"],
-        "type": row["type"],
+        "location": row.get("location"),
+        "description": row.get("description"),
+        "type": row.get("type"),
         "maxCapacity": row.get("max_capacity"),
         "registeredCount": registered_count,
-        "organizer": row["organizer"],
+        "organizer": row.get("organizer"),
         "status": row.get("status") or "upcoming",
     }
 
 
+def _fetch_event(event_id: int, keys: Optional[tuple] = None) -> dict:
+    cursor.execute(f"SELECT {EVENT_FIELDS.sql(keys)} FROM events e WHERE e.id = %s", (event_id,))
+    row = cursor.fetchone()
+    if not row:
+        cursor.execute(f"SELECT {EVENT_ARCHIVE_FIELDS.sql(keys)} FROM events_archive e WHERE e.id = %s", (event_id,))
+        row = cursor.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return EVENT_FIELDS.prune(_row_to_event(row, row.get("registered", 0)), keys)
+
+
 @router.get("")
-def list_events(current_user: dict = Depends(get_current_user)):
-    cursor.execute(
-        "SELECT id, title, event_date, event_time, location, description, type, max_capacity, organizer, status, created_at FROM events ORDER BY event_date, event_time"
-    )
-    rows = cursor.fetchall()
-    result = []
-    for r in rows:
-        cursor.execute("SELECT COUNT(*) as c FROM event_registrations WHERE event_id = %s", (r["id"],))
-        count = cursor.fetchone()["c"]
-        result.append(_row_to_event(r, count))
-    return result
+def list_events(
+    fields: Optional[str] = Query(None, description="Comma-separated response keys, e.g. id,title,date"),
+    current_user: dict = Depends(get_current_user),
+):
+    keys = EVENT_FIELDS.parse(fields)
+    cursor.execute(f"SELECT {EVENT_FIELDS.sql(keys)} FROM events e ORDER BY e.event_date, e.event_time")
+    return [EVENT_FIELDS.prune(_row_to_event(r, r.get("registered", 0)), keys) for r in cursor.fetchall()]
 
 
 @router.post("")
 def create_event(data: CreateEvent, current_user: dict = Depends(get_current_user)):
-    cursor.execute(
-        "INSERT INTO events (title, event_date, event_time, location, description, type, max_capacity, organizer, status) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'upcoming')",
-        (
-            data.title,
-            data.event_date,
-            data.event_time,
-            data.location,
-            data.description,
-            data.type,
-            data.max_capacity,
-            data.organizer,
-        ),
-    )
+    row = writes.insert("events", {
+        "title": data.title,
+        "event_date": data.event_date,
+        "event_time": data.event_time,
+        "location": data.location,
+        "description": data.description,
+        "type": data.type,
+        "max_capacity": data.max_capacity,
+        "organizer": data.organizer,
+        "status": "upcoming",
+    })
+    eid = row["id"]
+    tasks.enqueue("admin_alert", {"event": "event_created", "event_id": eid,
+                                  "summary": f"New event: {data.title} on {data.event_date} (created by {current_user['name']})"})
+    tasks.enqueue("broadcast", {"audience": "all", "type": "event", "title": "New event",
+                                "message": f"{data.title} on {data.event_date}", "action_url": f"/events/{eid}"})
     db.commit()
-    eid = cursor.lastrowid
-    cursor.execute("SELECT * FROM events WHERE id = %s", (eid,))
-    return _row_to_event(cursor.fetchone(), 0)
+    return _row_to_event(row)
+
+
+@router.get("/batch")
+def batch_events(
+    ids: list = Depends(batch_ids),
+    fields: Optional[str] = Query(None, description="Comma-separated response keys"),
+    current_user: dict = Depends(get_current_user),
+):
+    """Events by id in request order, with unknown ids listed as missing."""
+    keys = EVENT_FIELDS.parse(fields)
+    cursor.execute(f"SELECT {EVENT_FIELDS.sql(keys)} FROM events e WHERE e.id IN ({', '.join(['%s'] * len(ids))})", ids)
+    found = {r["id"]: r for r in cursor.fetchall()}
+    cold = [i for i in ids if i not in found]
+    if cold:
+        cursor.execute(f"SELECT {EVENT_ARCHIVE_FIELDS.sql(keys)} FROM events_archive e WHERE e.id IN ({', '.join(['%s'] * len(cold))})", cold)
+        found.update((r["id"], r) for r in cursor.fetchall())
+    return {
+        "items": [EVENT_FIELDS.prune(_row_to_event(found[i], found[i].get("registered", 0)), keys) for i in ids if i in found],
+        "missing": [str(i) for i in ids if i not in found],
+    }
 
 
 @router.get("/{event_id}")
-def get_event(event_id: int, current_user: dict = Depends(get_current_user)):
-    cursor.execute("SELECT * FROM events WHERE id = %s", (event_id,))
-    row = cursor.fetchone()
-    if not row:
-        raise HTTPException(status_code=404, detail="Event not found")
-    cursor.execute("SELECT COUNT(*) as c FROM event_registrations WHERE event_id = %s", (event_id,))
-    count = cursor.fetchone()["c"]
-    return _row_to_event(row, count)
+def get_event(
+    event_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated response keys"),
+    current_user: dict = Depends(get_current_user),
+):
+    return _fetch_event(event_id, EVENT_FIELDS.parse(fields))
 
 
 @router.patch("/{event_id}")
 def update_event(event_id: int, data: UpdateEvent, admin: dict = Depends(require_admin)):
     updates = data.model_dump(exclude_unset=True)
     if not updates:
-        return get_event(event_id, admin)
+        return _fetch_event(event_id)
     key_map = {"event_date": "event_date", "event_time": "event_time"}
     updates_rename = {key_map.get(k, k): v for k, v in updates.items()}
     set_clause = ", ".join(f"`{k}` = %s" for k in updates_rename)
     values = list(updates_rename.values()) + [event_id]
     cursor.execute(f"UPDATE events SET {set_clause} WHERE id = %s", values)
     db.commit()
-    cursor.execute("SELECT * FROM events WHERE id = %s", (event_id,))
-    row = cursor.fetchone()
-    cursor.execute("SELECT COUNT(*) as c FROM event_registrations WHERE event_id = %s", (event_id,))
-    return _row_to_event(row, cursor.fetchone()["c"])
+    return _fetch_event(event_id)
 
 
 @router.delete("/{event_id}")
@@ -132,7 +179,9 @@ def register_for_event(event_id: int, user_id: int = Depends(get_current_user_id
         raise HTTPException(status_code=400, detail="Event is full")
     try:
         cursor.execute("INSERT INTO event_registrations (event_id, user_id) VALUES (%s, %s)", (event_id, user_id))
-        db.commit()
     except Exception:
         raise HTTPException(status_code=400, detail="Already registered")
+    tasks.enqueue("admin_alert", {"event": "event_registration", "event_id": event_id, "user_id": user_id,
+                                  "summary": f"User {user_id} registered for event {event_id}"})
+    db.commit()
     return {"message": "Registered"}
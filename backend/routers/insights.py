@@ -0,0 +1,64 @@
+"""Industry insights: filtered group-by counts over the columnar user snapshot.
+
+    GET /insights?group_by=current_organization&role=alumni&department=CSE&department=ECE
+    GET /insights?group_by=department,batch
+    GET /insights/overview?role=alumni
+
+Any dimension in insights.DIMENSIONS may be used as a filter; repeat it or
+separate values with commas to match any of several values.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from deps import get_current_user
+import insights
+
+router = APIRouter(prefix="/insights", tags=["insights"])
+
+MAX_GROUP_DIMENSIONS = 3
+
+
+def _filters(request: Request) -> dict:
+    filters = {}
+    for d in insights.DIMENSIONS:
+        values = [v for raw in request.query_params.getlist(d) for v in raw.split(",") if v.strip()]
+        if values:
+            filters[d] = values
+    return filters
+
+
+@router.get("")
+def group_counts(
+    request: Request,
+    group_by: str = Query(..., description="Comma-separated dimensions"),
+    limit: int = Query(20, ge=1, le=500),
+    include_unset: bool = False,
+    current_user: dict = Depends(get_current_user),
+):
+    dimensions = [d.strip() for d in group_by.split(",") if d.strip()]
+    unknown = [d for d in dimensions if d not in insights.DIMENSIONS]
+    if not dimensions or unknown or len(dimensions) > MAX_GROUP_DIMENSIONS or len(set(dimensions)) != len(dimensions):
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by takes 1 to {MAX_GROUP_DIMENSIONS} distinct dimensions of: {', '.join(insights.DIMENSIONS)}",
+        )
+    snapshot = insights.current_snapshot()
+    mask = snapshot.mask(_filters(request))
+    groups = snapshot.group_by(dimensions, mask, limit, include_unset)
+    return {
+        "total": int(mask.sum()),
+        "groups": [dict(zip(dimensions, key), count=count) for key, count in groups],
+    }
+
+
+@router.get("/overview")
+def overview(request: Request, top: int = Query(10, ge=1, le=50), current_user: dict = Depends(get_current_user)):
+    """Top values of every dimension under the same filters, for the dashboard cards."""
+    snapshot = insights.current_snapshot()
+    mask = snapshot.mask(_filters(request))
+    return {
+        "total": int(mask.sum()),
+        "dimensions": {
+            d: [{"value": key[0], "count": count} for key, count in snapshot.group_by([d], mask, top)]
+            for d in insights.DIMENSIONS
+        },
+    }
@@ -1,13 +1,38 @@
 """Jobs CRUD."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Optional
 
 from database import cursor, db
-from deps import get_current_user, get_current_user_id, require_admin
+from deps import batch_ids, get_current_user, get_current_user_id, require_admin
+from fieldsets import FieldSet
+from routers import referrals
+import tasks
+import writes
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+JOB_FIELDS = FieldSet({
+    "id": ("j.id",),
+    "title": ("j.title",),
+    "company": ("j.company",),
+    "location": ("j.location",),
+    "type": ("j.type",),
+    "description": ("j.description",),
+    "requirements": ("j.requirements",),
+    "postedBy": ("j.posted_by_name",),
+    "postedById": ("j.posted_by_id",),
+    "postedDate": ("j.created_at",),
+    # Counted in the same statement, and only when asked for
+    "applicants": ("(SELECT COUNT(*) FROM applications a WHERE a.job_id = j.id) AS applicants",),
+    "status": ("j.status",),
+})
+# Old closed jobs and their applications live in jobs_archive (see archive.py)
+JOB_ARCHIVE_FIELDS = FieldSet(dict(
+    JOB_FIELDS.columns,
+    applicants=("(SELECT COUNT(*) FROM applications_archive a WHERE a.job_id = j.id) AS applicants",),
+))
+
 
 class CreateJob(BaseModel):
     title: str
@@ -38,72 +63,97 @@ def _row_to_job(row: dict, applicant_count: int = 0) -> dict:
             req = []
     return {
         "id": str(row["id"]),
-        "title": row["title"],
-        "company": row["company"],
-        "location": row["location"],
-        "type": row["type"],
-        "description": row["description"],
+        "title": row.get("title"),
+        "company": row.get("company"),
+        "location": row.get("location"),
+        "type": row.get("type"),
+        "description": row.get("description"),
         "requirements": req or [],
-        "postedBy": row["posted_by_name"],
-        "postedById": str(row["posted_by_id"]),
+        "postedBy": row.get("posted_by_name"),
+        "postedById": str(row.get("posted_by_id")),
         "postedDate": str(row["created_at"].date()) if row.get("created_at") else "",
         "applicants": applicant_count,
         "status": row.get("status") or "open",
     }
 
 
+def _fetch_job(job_id: int, keys: Optional[tuple] = None) -> dict:
+    cursor.execute(f"SELECT {JOB_FIELDS.sql(keys)} FROM jobs j WHERE j.id = %s", (job_id,))
+    row = cursor.fetchone()
+    if not row:
+        cursor.execute(f"SELECT {JOB_ARCHIVE_FIELDS.sql(keys)} FROM jobs_archive j WHERE j.id = %s", (job_id,))
+        row = cursor.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JOB_FIELDS.prune(_row_to_job(row, row.get("applicants", 0)), keys)
+
+
 @router.get("")
-def list_jobs(current_user: dict = Depends(get_current_user)):
-    cursor.execute(
-        "SELECT j.id, j.title, j.company, j.location, j.type, j.description, j.requirements, j.posted_by_id, j.posted_by_name, j.status, j.created_at FROM jobs j ORDER BY j.created_at DESC"
-    )
-    rows = cursor.fetchall()
-    result = []
-    for r in rows:
-        cursor.execute("SELECT COUNT(*) as c FROM applications WHERE job_id = %s", (r["id"],))
-        count = cursor.fetchone()["c"]
-        result.append(_row_to_job(r, count))
-    return result
+def list_jobs(
+    fields: Optional[str] = Query(None, description="Comma-separated response keys, e.g. id,title,company"),
+    current_user: dict = Depends(get_current_user),
+):
+    keys = JOB_FIELDS.parse(fields)
+    cursor.execute(f"SELECT {JOB_FIELDS.sql(keys)} FROM jobs j ORDER BY j.created_at DESC")
+    return [JOB_FIELDS.prune(_row_to_job(r, r.get("applicants", 0)), keys) for r in cursor.fetchall()]
 
 
 @router.post("")
 def create_job(data: CreateJob, user_id: int = Depends(get_current_user_id), current_user: dict = Depends(get_current_user)):
     import json
-    cursor.execute(
-        "INSERT INTO jobs (title, company, location, type, description, requirements, posted_by_id, posted_by_name, status) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'open')",
-        (
-            data.title,
-            data.company,
-            data.location,
-            data.type,
-            data.description,
-            json.dumps(data.requirements),
-            user_id,
-            current_user["name"],
-        ),
-    )
+    row = writes.insert("jobs", {
+        "title": data.title,
+        "company": data.company,
+        "location": data.location,
+        "type": data.type,
+        "description": data.description,
+        "requirements": json.dumps(data.requirements),
+        "posted_by_id": user_id,
+        "posted_by_name": current_user["name"],
+        "status": "open",
+        "created_at": writes.now(),
+    })
+    job_id = row["id"]
+    tasks.enqueue("admin_alert", {"event": "job_posted", "job_id": job_id,
+                                  "summary": f"New job: {data.title} at {data.company} (posted by {current_user['name']})"})
+    tasks.enqueue("broadcast", {"audience": "student", "type": "job", "title": "New job posted",
+                                "message": f"{data.title} at {data.company}", "action_url": f"/jobs/{job_id}"})
     db.commit()
-    job_id = cursor.lastrowid
-    cursor.execute("SELECT * FROM jobs WHERE id = %s", (job_id,))
-    return _row_to_job(cursor.fetchone(), 0)
+    return _row_to_job(row)
+
+
+@router.get("/batch")
+def batch_jobs(
+    ids: list = Depends(batch_ids),
+    fields: Optional[str] = Query(None, description="Comma-separated response keys"),
+    current_user: dict = Depends(get_current_user),
+):
+    """Jobs by id in request order, with unknown ids listed as missing."""
+    keys = JOB_FIELDS.parse(fields)
+    cursor.execute(f"SELECT {JOB_FIELDS.sql(keys)} FROM jobs j WHERE j.id IN ({', '.join(['%s'] * len(ids))})", ids)
+    found = {r["id"]: r for r in cursor.fetchall()}
+    cold = [i for i in ids if i not in found]
+    if cold:
+        cursor.execute(f"SELECT {JOB_ARCHIVE_FIELDS.sql(keys)} FROM jobs_archive j WHERE j.id IN ({', '.join(['%s'] * len(cold))})", cold)
+        found.update((r["id"], r) for r in cursor.fetchall())
+    return {
+        "items": [JOB_FIELDS.prune(_row_to_job(found[i], found[i].get("applicants", 0)), keys) for i in ids if i in found],
+        "missing": [str(i) for i in ids if i not in found],
+    }
 
 
 @router.get("/{job_id}")
-def get_job(job_id: int, current_user: dict = Depends(get_current_user)):
-    cursor.execute("SELECT * FROM jobs WHERE id = %s", (job_id,))
-    row = cursor.fetchone()
-    if not row:
-        raise HTTPException(status_code=404, detail="Job not found")
-    cursor.execute("SELECT COUNT(*) as c FROM applications WHERE job_id = %s", (job_id,))
-    count = cursor.fetchone()["c"]
-    return _row_to_job(row, count)
+def get_job(
+    job_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated response keys"),
+    current_user: dict = Depends(get_current_user),
+):
+    return _fetch_job(job_id, JOB_FIELDS.parse(fields))
 
 
 @router.patch("/{job_id}")
 def update_job(job_id: int, data: UpdateJob, user_id: int = Depends(get_current_user_id), current_user: dict = Depends(get_current_user)):
     import json
-    cursor.execute("SELECT posted_by_id, role FROM users WHERE id = %s", (user_id,))
-    u = cursor.fetchone()
     cursor.execute("SELECT posted_by_id FROM jobs WHERE id = %s", (job_id,))
     job = cursor.fetchone()
     if not job:
@@ -112,24 +162,26 @@ def update_job(job_id: int, data: UpdateJob, user_id: int = Depends(get_current_
         raise HTTPException(status_code=403, detail="Not your job")
     updates = data.model_dump(exclude_unset=True)
     if not updates:
-        return get_job(job_id, current_user)
+        return _fetch_job(job_id)
     if "requirements" in updates and isinstance(updates["requirements"], list):
         updates["requirements"] = json.dumps(updates["requirements"])
     set_clause = ", ".join(f"{k} = %s" for k in updates)
     values = list(updates.values()) + [job_id]
     cursor.execute(f"UPDATE jobs SET {set_clause} WHERE id = %s", values)
     db.commit()
-    return get_job(job_id, current_user)
+    return _fetch_job(job_id)
 
 
 @router.delete("/{job_id}")
 def delete_job(job_id: int, user_id: int = Depends(get_current_user_id), current_user: dict = Depends(get_current_user)):
-    cursor.execute("SELECT posted_by_id FROM jobs WHERE id = %s", (job_id,))
+    cursor.execute("SELECT posted_by_id FROM jobs WHERE id = %s FOR UPDATE", (job_id,))
     job = cursor.fetchone()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     if current_user.get("role") != "admin" and job["posted_by_id"] != user_id:
         raise HTTPException(status_code=403, detail="Not your job")
+    # job_referrals cascades from jobs: their counters go with them
+    referrals.release_job(job_id)
     cursor.execute("DELETE FROM jobs WHERE id = %s", (job_id,))
     db.commit()
     return {"message": "Deleted"}
@@ -1,109 +1,193 @@
 """Mentorship requests."""
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 from database import cursor, db
 from deps import get_current_user, get_current_user_id, require_admin
+from fieldsets import FieldSet
+import matching
+import tasks
+import writes
 
 router = APIRouter(prefix="/mentorship", tags=["mentorship"])
 
+REQUEST_FIELDS = FieldSet({
+    "id": ("m.id",),
+    "studentId": ("m.student_id",),
+    "studentName": ("u1.name as student_name",),
+    "mentorId": ("m.mentor_id",),
+    "mentorName": ("u2.name as mentor_name",),
+    "domain": ("m.domain",),
+    "message": ("m.message",),
+    "status": ("m.status",),
+    "requestDate": ("m.created_at",),
+})
+
 
 class CreateMentorshipRequest(BaseModel):
-    mentor_id: int
+    mentor_id: Optional[int] = None  # omitted: matched by the next batch assignment
     domain: str
     message: str
 
 
 class UpdateStatus(BaseModel):
-    status: str  # accepted | rejected
+    status: str  # accepted | rejected | completed
+
+
+class UpdateMentorProfile(BaseModel):
+    capacity: Optional[int] = Field(None, ge=0, le=50)
+    accepting: Optional[bool] = None
+    domains: Optional[List[str]] = None
 
 
 def _row_to_request(row: dict, student_name: str = "", mentor_name: str = "") -> dict:
     return {
         "id": str(row["id"]),
-        "studentId": str(row["student_id"]),
+        "studentId": str(row.get("student_id")),
         "studentName": student_name,
-        "mentorId": str(row["mentor_id"]),
+        "mentorId": str(row["mentor_id"]) if row.get("mentor_id") else "",
         "mentorName": mentor_name,
-        "domain": row["domain"],
-        "message": row["message"],
+        "domain": row.get("domain"),
+        "message": row.get("message"),
         "status": row.get("status") or "pending",
         "requestDate": str(row["created_at"].date()) if row.get("created_at") else "",
     }
 
 
 @router.get("")
-def list_mentorship_requests(current_user: dict = Depends(get_current_user)):
+def list_mentorship_requests(
+    fields: Optional[str] = Query(None, description="Comma-separated response keys, e.g. id,studentName,status"),
+    current_user: dict = Depends(get_current_user),
+):
     user_id = current_user["id"]
     role = current_user["role"]
+    keys = REQUEST_FIELDS.parse(fields)
+    select = REQUEST_FIELDS.sql(keys)
     if role == "alumni":
         cursor.execute(
-            """SELECT m.*, u1.name as student_name, u2.name as mentor_name
+            f"""SELECT {select}
                FROM mentorship_requests m
                JOIN users u1 ON m.student_id = u1.id
-               JOIN users u2 ON m.mentor_id = u2.id
+               LEFT JOIN users u2 ON m.mentor_id = u2.id
                WHERE m.mentor_id = %s ORDER BY m.created_at DESC""",
             (user_id,),
         )
     elif role == "student":
         cursor.execute(
-            """SELECT m.*, u1.name as student_name, u2.name as mentor_name
+            f"""SELECT {select}
                FROM mentorship_requests m
                JOIN users u1 ON m.student_id = u1.id
-               JOIN users u2 ON m.mentor_id = u2.id
+               LEFT JOIN users u2 ON m.mentor_id = u2.id
                WHERE m.student_id = %s ORDER BY m.created_at DESC""",
             (user_id,),
         )
     else:
         cursor.execute(
-            """SELECT m.*, u1.name as student_name, u2.name as mentor_name
+            f"""SELECT {select}
                FROM mentorship_requests m
                JOIN users u1 ON m.student_id = u1.id
-               JOIN users u2 ON m.mentor_id = u2.id
+               LEFT JOIN users u2 ON m.mentor_id = u2.id
                ORDER BY m.created_at DESC"""
         )
     rows = cursor.fetchall()
     return [
-        _row_to_request(
-            r,
-            r.get("student_name") or "",
-            r.get("mentor_name") or "",
+        REQUEST_FIELDS.prune(
+            _row_to_request(
+                r,
+                r.get("student_name") or "",
+                r.get("mentor_name") or "",
+            ),
+            keys,
         )
         for r in rows
     ]
 
 
+@router.get("/suggestions")
+def suggest_mentors(
+    domain: str,
+    k: int = Query(5, ge=1, le=20),
+    current_user: dict = Depends(get_current_user),
+):
+    if current_user["role"] != "student":
+        raise HTTPException(status_code=403, detail="Only students can request mentorship")
+    return matching.suggest(current_user, domain, k)
+
+
+@router.get("/profile")
+def get_mentor_profile(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "alumni":
+        raise HTTPException(status_code=403, detail="Only alumni have a mentor profile")
+    return matching.get_profile(current_user["id"])
+
+
+@router.put("/profile")
+def update_mentor_profile(data: UpdateMentorProfile, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "alumni":
+        raise HTTPException(status_code=403, detail="Only alumni have a mentor profile")
+    matching.update_profile(current_user["id"], data.capacity, data.accepting, data.domains)
+    db.commit()
+    return matching.get_profile(current_user["id"])
+
+
+@router.post("/assign")
+def assign_pending_requests(admin: dict = Depends(require_admin)):
+    """Run batch assignment now instead of waiting for the worker's next pass."""
+    assigned = matching.assign_pending()
+    db.commit()
+    return {"assigned": assigned}
+
+
 @router.post("")
 def create_mentorship_request(data: CreateMentorshipRequest, user_id: int = Depends(get_current_user_id), current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "student":
         raise HTTPException(status_code=403, detail="Only students can request mentorship")
-    cursor.execute("SELECT id, name FROM users WHERE id = %s AND role = 'alumni'", (data.mentor_id,))
-    mentor = cursor.fetchone()
-    if not mentor:
-        raise HTTPException(status_code=404, detail="Mentor not found")
-    cursor.execute(
-        "INSERT INTO mentorship_requests (student_id, mentor_id, domain, message, status) VALUES (%s, %s, %s, %s, 'pending')",
-        (user_id, data.mentor_id, data.domain, data.message),
-    )
+    mentor = {"name": ""}
+    if data.mentor_id is not None:
+        cursor.execute("SELECT id, name FROM users WHERE id = %s AND role = 'alumni'", (data.mentor_id,))
+        mentor = cursor.fetchone()
+        if not mentor:
+            raise HTTPException(status_code=404, detail="Mentor not found")
+        if not matching.reserve(data.mentor_id):
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Mentor is not taking new requests")
+    row = writes.insert("mentorship_requests", {
+        "student_id": user_id,
+        "mentor_id": data.mentor_id,
+        "domain": data.domain,
+        "message": data.message,
+        "status": "pending",
+        "created_at": writes.now(),
+    })
+    if data.mentor_id is not None:
+        tasks.enqueue("notify", {"user_ids": [data.mentor_id], "notification": {
+            "type": "mentorship", "title": "New mentorship request",
+            "message": f"{current_user['name']} asked for mentorship in {data.domain}", "action_url": "/mentorship"}})
     db.commit()
-    req_id = cursor.lastrowid
-    cursor.execute(
-        "SELECT m.*, u1.name as student_name, u2.name as mentor_name FROM mentorship_requests m JOIN users u1 ON m.student_id = u1.id JOIN users u2 ON m.mentor_id = u2.id WHERE m.id = %s",
-        (req_id,),
-    )
-    return _row_to_request(cursor.fetchone(), current_user["name"], mentor["name"])
+    return _row_to_request(row, current_user["name"], mentor["name"])
 
 
 @router.patch("/{request_id}")
 def update_mentorship_status(request_id: int, data: UpdateStatus, user_id: int = Depends(get_current_user_id), current_user: dict = Depends(get_current_user)):
-    if data.status not in ("accepted", "rejected"):
-        raise HTTPException(status_code=400, detail="Status must be accepted or rejected")
-    cursor.execute("SELECT mentor_id FROM mentorship_requests WHERE id = %s", (request_id,))
+    if data.status not in ("accepted", "rejected", "completed"):
+        raise HTTPException(status_code=400, detail="Status must be accepted, rejected or completed")
+    cursor.execute("SELECT mentor_id, student_id, domain, status FROM mentorship_requests WHERE id = %s FOR UPDATE", (request_id,))
     req = cursor.fetchone()
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
     if current_user["role"] != "admin" and req["mentor_id"] != user_id:
         raise HTTPException(status_code=403, detail="Not your request")
+    if req["mentor_id"] is None:
+        raise HTTPException(status_code=409, detail="Request has no mentor yet")
+    if data.status not in matching.TRANSITIONS.get(req["status"], ()):
+        raise HTTPException(status_code=409, detail=f"Cannot move a {req['status']} request to {data.status}")
+    if not matching.record_transition(req["mentor_id"], req["status"], data.status, req["domain"]):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Mentor has no capacity left")
     cursor.execute("UPDATE mentorship_requests SET status = %s WHERE id = %s", (data.status, request_id))
+    tasks.enqueue("notify", {"user_ids": [req["student_id"]], "notification": {
+        "type": "mentorship", "title": f"Mentorship request {data.status}",
+        "message": f"Your {req['domain']} mentorship request was {data.status}", "action_url": "/mentorship"}})
     db.commit()
     return {"message": "Updated"}
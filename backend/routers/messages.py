@@ -1,75 +1,83 @@
 """Conversations and messages."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 
-from database import cursor, db
+from database import cursor, db, use_primary
 from deps import get_current_user, get_current_user_id
+from fieldsets import FieldSet
+import writes
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
+MESSAGE_FIELDS = FieldSet({
+    "id": ("m.id",),
+    "conversationId": ("m.conversation_id",),
+    "senderId": ("m.sender_id",),
+    "senderName": ("u.name AS sender_name",),
+    "content": ("m.content",),
+    "timestamp": ("m.created_at",),
+    "read": ("m.sender_id",),
+})
+
 
 class SendMessage(BaseModel):
     content: str
 
 
 def _get_or_create_conversation(user_id: int, other_user_id: int) -> int:
-    cursor.execute(
-        "SELECT c.id FROM conversations c "
-        "JOIN conversation_participants p1 ON p1.conversation_id = c.id AND p1.user_id = %s "
-        "JOIN conversation_participants p2 ON p2.conversation_id = c.id AND p2.user_id = %s",
-        (user_id, other_user_id),
-    )
+    pair = (min(user_id, other_user_id), max(user_id, other_user_id))
+    cursor.execute("SELECT id FROM conversations WHERE user_low_id = %s AND user_high_id = %s", pair)
     row = cursor.fetchone()
     if row:
         return row["id"]
-    cursor.execute("INSERT INTO conversations () VALUES ()")
+    # unique_pair makes a concurrent creator wait and then resolve to the same row
+    cursor.execute(
+        "INSERT INTO conversations (user_low_id, user_high_id) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)",
+        pair,
+    )
     conv_id = cursor.lastrowid
-    cursor.execute("INSERT INTO conversation_participants (conversation_id, user_id) VALUES (%s, %s), (%s, %s)", (conv_id, user_id, conv_id, other_user_id))
+    cursor.execute(
+        "INSERT IGNORE INTO conversation_participants (conversation_id, user_id) VALUES (%s, %s), (%s, %s)",
+        (conv_id, user_id, conv_id, other_user_id),
+    )
     db.commit()
     return conv_id
 
 
 @router.get("/conversations")
 def list_conversations(current_user: dict = Depends(get_current_user), user_id: int = Depends(get_current_user_id)):
+    # Unread = messages from the other side past this user's read cursor, an index range on (conversation_id, id)
     cursor.execute(
-        """SELECT c.id, c.created_at,
-           (SELECT content FROM messages WHERE conversation_id = c.id ORDER BY created_at DESC LIMIT 1) as last_message,
-           (SELECT created_at FROM messages WHERE conversation_id = c.id ORDER BY created_at DESC LIMIT 1) as last_time
-           FROM conversations c
-           JOIN conversation_participants p ON p.conversation_id = c.id
+        """SELECT c.id, lm.content as last_message, lm.created_at as last_time,
+           u.id as other_id, u.name as other_name, u.role as other_role, u.avatar as other_avatar,
+           (SELECT COUNT(*) FROM messages m
+             WHERE m.conversation_id = c.id AND m.id > p.last_read_message_id AND m.sender_id != p.user_id) as unread
+           FROM conversation_participants p
+           JOIN conversations c ON c.id = p.conversation_id
+           JOIN conversation_participants o ON o.conversation_id = c.id AND o.user_id != p.user_id
+           JOIN users u ON u.id = o.user_id
+           LEFT JOIN messages lm ON lm.id = c.last_message_id
            WHERE p.user_id = %s""",
         (user_id,),
     )
-    convs = cursor.fetchall()
-    result = []
-    for c in convs:
-        cursor.execute(
-            "SELECT u.id, u.name, u.role, u.avatar FROM conversation_participants p JOIN users u ON u.id = p.user_id WHERE p.conversation_id = %s AND p.user_id != %s",
-            (c["id"], user_id),
-        )
-        other = cursor.fetchone()
-        if not other:
-            continue
-        cursor.execute(
-            "SELECT COUNT(*) as c FROM messages WHERE conversation_id = %s AND sender_id != %s AND is_read = 0",
-            (c["id"], user_id),
-        )
-        unread = cursor.fetchone()["c"]
-        result.append({
+    return [
+        {
             "id": str(c["id"]),
-            "participants": [str(current_user["id"]), str(other["id"])],
-            "participantNames": [current_user["name"], other["name"]],
-            "participantRoles": [current_user["role"], other["role"]],
-            "participantAvatars": [current_user.get("avatar"), other.get("avatar")],
+            "participants": [str(current_user["id"]), str(c["other_id"])],
+            "participantNames": [current_user["name"], c["other_name"]],
+            "participantRoles": [current_user["role"], c["other_role"]],
+            "participantAvatars": [current_user.get("avatar"), c.get("other_avatar")],
             "lastMessage": c.get("last_message") or "",
             "lastMessageTime": str(c["last_time"]) if c.get("last_time") else "",
-            "unreadCount": unread,
-        })
-    return result
+            "unreadCount": c["unread"],
+        }
+        for c in cursor.fetchall()
+    ]
 
 
-@router.get("/conversations/{other_user_id}")
+@router.get("/conversations/{other_user_id}", dependencies=[Depends(use_primary)])
 def get_or_create_conversation(other_user_id: int, user_id: int = Depends(get_current_user_id), current_user: dict = Depends(get_current_user)):
     cursor.execute("SELECT id, name, avatar, role FROM users WHERE id = %s", (other_user_id,))
     other = cursor.fetchone()
@@ -89,55 +97,88 @@ def get_or_create_conversation(other_user_id: int, user_id: int = Depends(get_cu
 
 
 @router.get("/conversations/{conversation_id}/messages")
-def list_messages(conversation_id: int, user_id: int = Depends(get_current_user_id)):
-    cursor.execute("SELECT user_id FROM conversation_participants WHERE conversation_id = %s AND user_id = %s", (conversation_id, user_id))
-    if not cursor.fetchone():
+def list_messages(
+    conversation_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated response keys, e.g. id,content,timestamp"),
+    user_id: int = Depends(get_current_user_id),
+):
+    keys = MESSAGE_FIELDS.parse(fields)
+    cursor.execute(
+        "SELECT p.user_id, p.last_read_message_id, c.archived_message_id FROM conversation_participants p "
+        "JOIN conversations c ON c.id = p.conversation_id WHERE p.conversation_id = %s",
+        (conversation_id,),
+    )
+    participants = cursor.fetchall()
+    read_upto = {r["user_id"]: r["last_read_message_id"] for r in participants}
+    if user_id not in read_upto:
         raise HTTPException(status_code=404, detail="Conversation not found")
+    # A message is read once the other participant's cursor has passed it
+    others_cursor = max((v for k, v in read_upto.items() if k != user_id), default=0)
+    join = " JOIN users u ON m.sender_id = u.id" if MESSAGE_FIELDS.wants(keys, "senderName") else ""
+    rows = []
+    if participants[0]["archived_message_id"]:
+        # The oldest part of this conversation was moved to messages_archive (see archive.py)
+        cursor.execute(
+            f"SELECT {MESSAGE_FIELDS.sql(keys)} FROM messages_archive m{join} WHERE m.conversation_id = %s ORDER BY m.id",
+            (conversation_id,),
+        )
+        rows = cursor.fetchall()
     cursor.execute(
-        "SELECT m.*, u.name as sender_name FROM messages m JOIN users u ON m.sender_id = u.id WHERE m.conversation_id = %s ORDER BY m.created_at ASC",
+        f"SELECT {MESSAGE_FIELDS.sql(keys)} FROM messages m{join} WHERE m.conversation_id = %s ORDER BY m.id",
         (conversation_id,),
     )
-    rows = cursor.fetchall()
+    rows += cursor.fetchall()
     return [
-        {
+        MESSAGE_FIELDS.prune({
             "id": str(r["id"]),
-            "conversationId": str(r["conversation_id"]),
-            "senderId": str(r["sender_id"]),
+            "conversationId": str(r.get("conversation_id")),
+            "senderId": str(r.get("sender_id")),
             "senderName": r.get("sender_name"),
-            "content": r["content"],
+            "content": r.get("content"),
             "timestamp": str(r["created_at"]) if r.get("created_at") else "",
-            "read": bool(r.get("is_read")),
-        }
+            "read": r["id"] <= (others_cursor if r.get("sender_id") == user_id else read_upto[user_id]),
+        }, keys)
         for r in rows
     ]
 
 
 @router.post("/conversations/{conversation_id}/messages")
 def send_message(conversation_id: int, data: SendMessage, user_id: int = Depends(get_current_user_id), current_user: dict = Depends(get_current_user)):
-    cursor.execute("SELECT user_id FROM conversation_participants WHERE conversation_id = %s AND user_id = %s", (conversation_id, user_id))
-    if not cursor.fetchone():
+    sent_at = writes.now()
+    # Inserted only if the sender takes part in the conversation: the membership check is the INSERT itself
+    cursor.execute(
+        "INSERT INTO messages (conversation_id, sender_id, content, is_read, created_at) "
+        "SELECT %s, %s, %s, 0, %s FROM conversation_participants WHERE conversation_id = %s AND user_id = %s",
+        (conversation_id, user_id, data.content, sent_at, conversation_id, user_id),
+    )
+    if not cursor.rowcount:
         raise HTTPException(status_code=404, detail="Conversation not found")
+    msg_id = cursor.lastrowid
+    # Concurrent sends may commit out of order; the pointer only ever moves forward
     cursor.execute(
-        "INSERT INTO messages (conversation_id, sender_id, content, is_read) VALUES (%s, %s, %s, 0)",
-        (conversation_id, user_id, data.content),
+        "UPDATE conversations SET last_message_id = GREATEST(COALESCE(last_message_id, 0), %s) WHERE id = %s",
+        (msg_id, conversation_id),
     )
     db.commit()
-    msg_id = cursor.lastrowid
-    cursor.execute("SELECT * FROM messages WHERE id = %s", (msg_id,))
-    r = cursor.fetchone()
     return {
-        "id": str(r["id"]),
-        "conversationId": str(r["conversation_id"]),
-        "senderId": str(r["sender_id"]),
+        "id": str(msg_id),
+        "conversationId": str(conversation_id),
+        "senderId": str(user_id),
         "senderName": current_user["name"],
-        "content": r["content"],
-        "timestamp": str(r["created_at"]) if r.get("created_at") else "",
+        "content": data.content,
+        "timestamp": str(sent_at),
         "read": False,
     }
 
 
 @router.post("/conversations/{conversation_id}/read")
 def mark_read(conversation_id: int, user_id: int = Depends(get_current_user_id)):
-    cursor.execute("UPDATE messages SET is_read = 1 WHERE conversation_id = %s AND sender_id != %s", (conversation_id, user_id))
+    # Single-row cursor move; message rows are never rewritten
+    cursor.execute(
+        "UPDATE conversation_participants p JOIN conversations c ON c.id = p.conversation_id "
+        "SET p.last_read_message_id = c.last_message_id "
+        "WHERE p.conversation_id = %s AND p.user_id = %s AND c.last_message_id > p.last_read_message_id",
+        (conversation_id, user_id),
+    )
     db.commit()
     return {"message": "Marked as read"}
@@ -0,0 +1,72 @@
+"""People you may know, mutual and second-degree connections."""
+from fastapi import APIRouter, Depends, Query
+
+from database import cursor
+from deps import get_current_user
+import network
+
+router = APIRouter(prefix="/network", tags=["network"])
+
+
+def _users_by_id(user_ids: list) -> dict:
+    if not user_ids:
+        return {}
+    cursor.execute(
+        f"SELECT id, name, role, avatar, current_organization, current_role, batch FROM users "
+        f"WHERE id IN ({', '.join(['%s'] * len(user_ids))})",
+        list(user_ids),
+    )
+    return {r["id"]: r for r in cursor.fetchall()}
+
+
+def _person(row: dict, **extra) -> dict:
+    return dict(
+        {
+            "id": str(row["id"]),
+            "name": row["name"],
+            "role": row["role"],
+            "avatar": row.get("avatar"),
+            "currentOrganization": row.get("current_organization"),
+            "currentRole": row.get("current_role"),
+            "batch": row.get("batch"),
+        },
+        **extra,
+    )
+
+
+@router.get("/connections")
+def list_connections(current_user: dict = Depends(get_current_user)):
+    graph = network.current_graph()
+    users = _users_by_id(graph.neighbors(current_user["id"]))
+    return [_person(u) for u in users.values()]
+
+
+@router.get("/suggestions")
+def people_you_may_know(limit: int = Query(10, ge=1, le=50), current_user: dict = Depends(get_current_user)):
+    cursor.execute(
+        "SELECT u.id, u.name, u.role, u.avatar, u.current_organization, u.current_role, u.batch, s.score, s.mutual_count "
+        "FROM connection_suggestions s JOIN users u ON u.id = s.suggested_id "
+        "WHERE s.user_id = %s ORDER BY s.score DESC, s.mutual_count DESC LIMIT %s",
+        (current_user["id"], limit),
+    )
+    rows = cursor.fetchall()
+    if rows:
+        return [_person(r, mutualConnections=r["mutual_count"]) for r in rows]
+    # Not precomputed yet (new user, or the worker hasn't run): answer from the in-memory graph
+    suggested = network.current_graph().suggestions(current_user["id"], limit)
+    users = _users_by_id([uid for uid, _, _ in suggested])
+    return [_person(users[uid], mutualConnections=mutual) for uid, _, mutual in suggested if uid in users]
+
+
+@router.get("/second-degree")
+def second_degree(limit: int = Query(20, ge=1, le=100), current_user: dict = Depends(get_current_user)):
+    found = network.current_graph().second_degree(current_user["id"], limit)
+    users = _users_by_id([uid for uid, _ in found])
+    return [_person(users[uid], mutualConnections=mutual) for uid, mutual in found if uid in users]
+
+
+@router.get("/mutual/{other_user_id}")
+def mutual_connections(other_user_id: int, current_user: dict = Depends(get_current_user)):
+    mutual = network.current_graph().mutual(current_user["id"], other_user_id)
+    users = _users_by_id(mutual)
+    return [_person(users[uid]) for uid in mutual if uid in users]
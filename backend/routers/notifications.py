@@ -0,0 +1,65 @@
+"""Notification inbox and unread badge."""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from typing import Optional
+
+from database import db
+from deps import get_current_user, require_admin
+import inbox
+
+router = APIRouter(prefix="/notifications", tags=["notifications"])
+
+
+class CreateBroadcast(BaseModel):
+    audience: str = "all"
+    type: str = "system"
+    title: str
+    message: str
+    action_url: Optional[str] = None
+    priority: str = "medium"
+
+
+@router.get("")
+def list_notifications(
+    limit: int = Query(30, ge=1, le=100),
+    before: Optional[str] = Query(None, description="nextCursor of the previous page"),
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        return inbox.list_inbox(current_user["id"], current_user["role"], limit, before)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/unread-count")
+def unread_count(current_user: dict = Depends(get_current_user)):
+    return {"unreadCount": inbox.unread_count(current_user["id"], current_user["role"])}
+
+
+@router.post("/read-all")
+def mark_all_read(current_user: dict = Depends(get_current_user)):
+    inbox.mark_all_read(current_user["id"], current_user["role"])
+    db.commit()
+    return {"message": "Marked as read"}
+
+
+@router.post("/{notification_id}/read")
+def mark_read(notification_id: str, current_user: dict = Depends(get_current_user)):
+    # Broadcast items ("b…") are shared rows; they are read by advancing the stream cursor via /read-all
+    if not notification_id.startswith("n") or not notification_id[1:].isdigit():
+        raise HTTPException(status_code=400, detail="Only direct notifications can be marked individually")
+    if not inbox.mark_read(current_user["id"], int(notification_id[1:])):
+        raise HTTPException(status_code=404, detail="Notification not found or already read")
+    db.commit()
+    return {"message": "Marked as read"}
+
+
+@router.post("/broadcast")
+def create_broadcast(data: CreateBroadcast, admin: dict = Depends(require_admin)):
+    if data.audience not in inbox.AUDIENCES:
+        raise HTTPException(status_code=400, detail="Invalid audience")
+    if data.type not in inbox.NOTIFICATION_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid type")
+    broadcast_id = inbox.broadcast(data.audience, data.type, data.title, data.message, data.action_url, data.priority)
+    db.commit()
+    return {"id": f"b{broadcast_id}"}
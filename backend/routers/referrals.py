@@ -0,0 +1,264 @@
+"""Job referrals: alumni refer candidates to open jobs and track them to a hire.
+
+Referrals are looked up by primary key, by referrer (newest first) and by job
+and status, each through its own index. `referrer_stats` holds one row of
+per-status counters per referrer, moved in the same transaction as every
+status change, so dashboards and the leaderboard never count referrals.
+Deleting a job cascades to its referrals, so delete_job releases them first.
+"""
+from collections import Counter, defaultdict
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, EmailStr
+from typing import Optional
+import mysql.connector
+
+from database import cursor, db
+from deps import get_current_user, require_admin
+import tasks
+
+router = APIRouter(prefix="/referrals", tags=["referrals"])
+
+STATUSES = ("pending", "accepted", "rejected", "interviewed", "hired")
+# status -> statuses the job poster (or an admin) may move it to
+TRANSITIONS = {
+    "pending": ("accepted", "rejected"),
+    "accepted": ("interviewed", "rejected"),
+    "interviewed": ("hired", "rejected"),
+}
+
+
+class CreateReferral(BaseModel):
+    job_id: int
+    candidate_name: str
+    candidate_email: EmailStr
+    candidate_phone: Optional[str] = None
+    candidate_linkedin: Optional[str] = None
+    candidate_resume: Optional[str] = None
+    relationship: Optional[str] = None
+    why_good_fit: Optional[str] = None
+
+
+class UpdateReferralStatus(BaseModel):
+    status: str
+    bonus: Optional[int] = None
+
+
+_REFERRAL_SELECT = (
+    "SELECT r.*, j.title AS job_title, j.company, j.posted_by_id, u.name AS referrer_name "
+    "FROM job_referrals r JOIN jobs j ON j.id = r.job_id JOIN users u ON u.id = r.referrer_id"
+)
+
+
+def _row_to_referral(row: dict) -> dict:
+    return {
+        "id": str(row["id"]),
+        "jobId": str(row["job_id"]),
+        "jobTitle": row.get("job_title") or "",
+        "company": row.get("company") or "",
+        "referrerId": str(row["referrer_id"]),
+        "referrerName": row.get("referrer_name") or "",
+        "candidateName": row["candidate_name"],
+        "candidateEmail": row["candidate_email"],
+        "candidatePhone": row.get("candidate_phone"),
+        "candidateLinkedIn": row.get("candidate_linkedin"),
+        "candidateResume": row.get("candidate_resume"),
+        "relationship": row.get("relationship"),
+        "whyGoodFit": row.get("why_good_fit"),
+        "status": row["status"],
+        "bonus": row.get("bonus"),
+        "createdAt": str(row["created_at"]) if row.get("created_at") else "",
+    }
+
+
+def _row_to_stats(row: dict, user_id: int) -> dict:
+    row = row or {}
+    total = row.get("total", 0)
+    return {
+        "referrerId": str(user_id),
+        "total": total,
+        **{s: row.get(s, 0) for s in STATUSES},
+        "bonusEarned": row.get("bonus_earned", 0),
+        "successRate": round(row.get("hired", 0) / total, 3) if total else 0.0,
+    }
+
+
+def _fetch(referral_id: int) -> dict:
+    cursor.execute(f"{_REFERRAL_SELECT} WHERE r.id = %s", (referral_id,))
+    return cursor.fetchone()
+
+
+def _can_see(row: dict, user: dict) -> bool:
+    return user["role"] == "admin" or user["id"] in (row["referrer_id"], row["posted_by_id"])
+
+
+@router.post("")
+def create_referral(data: CreateReferral, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ("alumni", "admin"):
+        raise HTTPException(status_code=403, detail="Only alumni can refer candidates")
+    cursor.execute("SELECT id, title, posted_by_id, status FROM jobs WHERE id = %s", (data.job_id,))
+    job = cursor.fetchone()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "open":
+        raise HTTPException(status_code=400, detail="Job is not open")
+    try:
+        cursor.execute(
+            "INSERT INTO job_referrals (job_id, referrer_id, candidate_name, candidate_email, candidate_phone, "
+            "candidate_linkedin, candidate_resume, relationship, why_good_fit) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            (data.job_id, current_user["id"], data.candidate_name, data.candidate_email.lower(), data.candidate_phone,
+             data.candidate_linkedin, data.candidate_resume, data.relationship, data.why_good_fit),
+        )
+    except mysql.connector.IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="This candidate has already been referred to this job")
+    referral_id = cursor.lastrowid
+    cursor.execute(
+        "INSERT INTO referrer_stats (referrer_id, total, pending) VALUES (%s, 1, 1) "
+        "ON DUPLICATE KEY UPDATE total = total + 1, pending = pending + 1",
+        (current_user["id"],),
+    )
+    if job["posted_by_id"] != current_user["id"]:
+        tasks.enqueue("notify", {"user_ids": [job["posted_by_id"]], "notification": {
+            "type": "job", "title": "New referral",
+            "message": f"{current_user['name']} referred {data.candidate_name} for {job['title']}",
+            "action_url": "/referrals"}})
+    db.commit()
+    return _row_to_referral(_fetch(referral_id))
+
+
+@router.get("")
+def list_referrals(
+    job_id: Optional[int] = None,
+    status: Optional[str] = None,
+    before: Optional[int] = Query(None, description="nextCursor of the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: dict = Depends(get_current_user),
+):
+    """Your referrals, or with job_id the referrals for a job you posted."""
+    if status and status not in STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
+    if job_id is not None:
+        cursor.execute("SELECT posted_by_id FROM jobs WHERE id = %s", (job_id,))
+        job = cursor.fetchone()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job["posted_by_id"] != current_user["id"] and current_user["role"] != "admin":
+            raise HTTPException(status_code=403, detail="Only the job poster can see its referrals")
+        # idx_job_referrals_job: (job_id, status, id)
+        where, params = "r.job_id = %s", [job_id]
+    else:
+        # idx_job_referrals_referrer: (referrer_id, status, id)
+        where, params = "r.referrer_id = %s", [current_user["id"]]
+    if status:
+        where += " AND r.status = %s"
+        params.append(status)
+    if before is not None:
+        where += " AND r.id < %s"
+        params.append(before)
+    cursor.execute(f"{_REFERRAL_SELECT} WHERE {where} ORDER BY r.id DESC LIMIT %s", params + [limit])
+    rows = cursor.fetchall()
+    return {
+        "items": [_row_to_referral(r) for r in rows],
+        "nextCursor": str(rows[-1]["id"]) if len(rows) == limit else None,
+    }
+
+
+@router.get("/stats/me")
+def my_stats(current_user: dict = Depends(get_current_user)):
+    return referrer_stats(current_user["id"], current_user)
+
+
+@router.get("/stats/{user_id}")
+def referrer_stats(user_id: int, current_user: dict = Depends(get_current_user)):
+    cursor.execute("SELECT * FROM referrer_stats WHERE referrer_id = %s", (user_id,))
+    return _row_to_stats(cursor.fetchone(), user_id)
+
+
+@router.get("/leaderboard")
+def leaderboard(limit: int = Query(10, ge=1, le=100), current_user: dict = Depends(get_current_user)):
+    # idx_referrer_stats_rank: (hired DESC, total DESC) read in order and cut at limit
+    cursor.execute(
+        "SELECT s.*, u.name, u.avatar, u.current_organization FROM referrer_stats s JOIN users u ON u.id = s.referrer_id "
+        "WHERE s.total > 0 ORDER BY s.hired DESC, s.total DESC LIMIT %s",
+        (limit,),
+    )
+    return [
+        dict(_row_to_stats(r, r["referrer_id"]), name=r["name"], avatar=r.get("avatar") or "",
+             company=r.get("current_organization") or "")
+        for r in cursor.fetchall()
+    ]
+
+
+@router.get("/{referral_id}")
+def get_referral(referral_id: int, current_user: dict = Depends(get_current_user)):
+    row = _fetch(referral_id)
+    if not row or not _can_see(row, current_user):
+        raise HTTPException(status_code=404, detail="Referral not found")
+    return _row_to_referral(row)
+
+
+@router.patch("/{referral_id}")
+def update_referral_status(referral_id: int, data: UpdateReferralStatus, current_user: dict = Depends(get_current_user)):
+    cursor.execute(
+        "SELECT r.id, r.referrer_id, r.status, r.candidate_name, j.posted_by_id, j.title FROM job_referrals r "
+        "JOIN jobs j ON j.id = r.job_id WHERE r.id = %s FOR UPDATE OF r",
+        (referral_id,),
+    )
+    row = cursor.fetchone()
+    if not row or not _can_see(row, current_user):
+        raise HTTPException(status_code=404, detail="Referral not found")
+    if current_user["role"] != "admin" and current_user["id"] != row["posted_by_id"]:
+        raise HTTPException(status_code=403, detail="Only the job poster can update a referral")
+    if data.status not in TRANSITIONS.get(row["status"], ()):
+        raise HTTPException(status_code=400, detail=f"Cannot move a {row['status']} referral to {data.status}")
+    bonus = data.bonus if data.status == "hired" else None
+    cursor.execute(
+        "UPDATE job_referrals SET status = %s, bonus = COALESCE(%s, bonus) WHERE id = %s",
+        (data.status, bonus, referral_id),
+    )
+    # Column names come from STATUSES, never from the request
+    cursor.execute(
+        f"UPDATE referrer_stats SET {row['status']} = GREATEST({row['status']} - 1, 0), {data.status} = {data.status} + 1, "
+        f"bonus_earned = bonus_earned + %s WHERE referrer_id = %s",
+        (bonus or 0, row["referrer_id"]),
+    )
+    tasks.enqueue("notify", {"user_ids": [row["referrer_id"]], "notification": {
+        "type": "job", "title": f"Referral {data.status}",
+        "message": f"Your referral of {row['candidate_name']} for {row['title']} is now {data.status}",
+        "action_url": "/referrals", "priority": "high" if data.status == "hired" else "medium"}})
+    db.commit()
+    return _row_to_referral(_fetch(referral_id))
+
+
+def release_job(job_id: int):
+    """Take a job's referrals out of their referrers' counters; call in the transaction that deletes the job."""
+    cursor.execute("SELECT referrer_id, status, bonus FROM job_referrals WHERE job_id = %s FOR UPDATE", (job_id,))
+    released = defaultdict(Counter)
+    for r in cursor.fetchall():
+        counts = released[r["referrer_id"]]
+        counts["total"] += 1
+        counts[r["status"]] += 1
+        if r["status"] == "hired":
+            counts["bonus_earned"] += r["bonus"] or 0
+    if not released:
+        return
+    columns = ("total",) + STATUSES + ("bonus_earned",)
+    cursor.executemany(
+        f"UPDATE referrer_stats SET {', '.join(f'{c} = GREATEST({c} - %s, 0)' for c in columns)} WHERE referrer_id = %s",
+        [tuple(counts[c] for c in columns) + (referrer_id,) for referrer_id, counts in sorted(released.items())],
+    )
+
+
+@router.post("/stats/rebuild")
+def rebuild_stats(admin: dict = Depends(require_admin)):
+    """Recompute every referrer's counters from job_referrals."""
+    cursor.execute("DELETE FROM referrer_stats")
+    cursor.execute(
+        "INSERT INTO referrer_stats (referrer_id, total, pending, accepted, rejected, interviewed, hired, bonus_earned) "
+        "SELECT referrer_id, COUNT(*), SUM(status = 'pending'), SUM(status = 'accepted'), SUM(status = 'rejected'), "
+        "SUM(status = 'interviewed'), SUM(status = 'hired'), COALESCE(SUM(CASE WHEN status = 'hired' THEN bonus END), 0) "
+        "FROM job_referrals GROUP BY referrer_id"
+    )
+    db.commit()
+    return {"message": "Referral stats rebuilt", "referrers": cursor.rowcount}
@@ -0,0 +1,240 @@
+"""Skills and endorsements.
+
+Skill names are normalized to a slug so "React.js", "reactjs" and "React" are one
+skill. Each (user, skill) row in `user_skills` carries its endorsement count,
+kept in step with `skill_endorsements` on every write (including deleting an
+endorser, whose rows the foreign key cascades away), and is indexed both per
+user and per skill by count, so a profile's top skills and the strongest users
+in a skill are each one index range read.
+"""
+import re
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from typing import List
+
+from database import cursor, db
+from deps import get_current_user, require_admin
+import tasks
+
+router = APIRouter(prefix="/skills", tags=["skills"])
+
+MAX_SKILLS = 50
+ENDORSERS_PER_SKILL = 10
+# Endorsement counts at which a skill shows as intermediate / expert
+LEVELS = ((10, "expert"), (3, "intermediate"), (0, "beginner"))
+
+_ALIASES = {
+    "reactjs": "react",
+    "react.js": "react",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "js": "javascript",
+    "ts": "typescript",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "ml": "machine learning",
+    "amazon web services": "aws",
+    "postgres": "postgresql",
+}
+
+
+class SetSkills(BaseModel):
+    skills: List[str]
+
+
+def normalize_skill(name: str) -> str:
+    slug = " ".join(name.lower().split()).strip(" .,;")
+    slug = re.sub(r"\s*([/+#.-])\s*", r"\1", slug)
+    return _ALIASES.get(slug, slug)[:100]
+
+
+def _level(count: int) -> str:
+    return next(level for threshold, level in LEVELS if count >= threshold)
+
+
+def _skill_ids(names: list) -> dict:
+    """slug -> skill id, creating skills that don't exist yet (first spelling becomes the display name)."""
+    by_slug = {}
+    for name in names:
+        slug = normalize_skill(name)
+        if slug:
+            by_slug.setdefault(slug, " ".join(name.split())[:100])
+    if not by_slug:
+        return {}
+    cursor.executemany("INSERT IGNORE INTO skills (slug, name) VALUES (%s, %s)", list(by_slug.items()))
+    cursor.execute(
+        f"SELECT id, slug FROM skills WHERE slug IN ({', '.join(['%s'] * len(by_slug))})",
+        list(by_slug),
+    )
+    return {r["slug"]: r["id"] for r in cursor.fetchall()}
+
+
+def _profile(user_id: int) -> dict:
+    cursor.execute("SELECT id, name, role, avatar FROM users WHERE id = %s", (user_id,))
+    user = cursor.fetchone()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    # idx_user_skills_top: already in rank order, no sort or aggregate
+    cursor.execute(
+        "SELECT us.skill_id, s.name, us.endorsement_count FROM user_skills us JOIN skills s ON s.id = us.skill_id "
+        "WHERE us.user_id = %s ORDER BY us.endorsement_count DESC, us.skill_id",
+        (user_id,),
+    )
+    skills = cursor.fetchall()
+    cursor.execute(
+        "SELECT e.skill_id, u.id, u.name, u.role, u.avatar FROM skill_endorsements e JOIN users u ON u.id = e.endorser_id "
+        "WHERE e.user_id = %s ORDER BY e.created_at DESC",
+        (user_id,),
+    )
+    endorsers = {}
+    for r in cursor.fetchall():
+        bucket = endorsers.setdefault(r["skill_id"], [])
+        if len(bucket) < ENDORSERS_PER_SKILL:
+            bucket.append({"id": str(r["id"]), "name": r["name"], "role": r["role"], "avatar": r.get("avatar") or ""})
+    return {
+        "userId": str(user["id"]),
+        "userName": user["name"],
+        "userRole": user["role"],
+        "userAvatar": user.get("avatar") or "",
+        "skills": [
+            {
+                "skillName": s["name"],
+                "count": s["endorsement_count"],
+                "level": _level(s["endorsement_count"]),
+                "endorsers": endorsers.get(s["skill_id"], []),
+            }
+            for s in skills
+        ],
+        "totalEndorsements": sum(s["endorsement_count"] for s in skills),
+        "topSkills": [s["name"] for s in skills[:3] if s["endorsement_count"] > 0],
+    }
+
+
+@router.get("")
+def search_skills(q: str = "", limit: int = Query(10, ge=1, le=50), current_user: dict = Depends(get_current_user)):
+    cursor.execute(
+        "SELECT name FROM skills WHERE slug LIKE %s ORDER BY slug LIMIT %s",
+        (normalize_skill(q).replace("%", r"\%").replace("_", r"\_") + "%", limit),
+    )
+    return [r["name"] for r in cursor.fetchall()]
+
+
+@router.get("/me")
+def get_my_skills(current_user: dict = Depends(get_current_user)):
+    return _profile(current_user["id"])
+
+
+@router.put("/me")
+def set_my_skills(data: SetSkills, current_user: dict = Depends(get_current_user)):
+    if len(data.skills) > MAX_SKILLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SKILLS} skills")
+    user_id = current_user["id"]
+    ids = set(_skill_ids(data.skills).values())
+    cursor.execute("SELECT skill_id FROM user_skills WHERE user_id = %s", (user_id,))
+    current = {r["skill_id"] for r in cursor.fetchall()}
+    removed = sorted(current - ids)
+    if removed:
+        placeholders = ", ".join(["%s"] * len(removed))
+        # Endorsements go with the row via ON DELETE CASCADE
+        cursor.execute(f"DELETE FROM user_skills WHERE user_id = %s AND skill_id IN ({placeholders})", [user_id] + removed)
+    added = sorted(ids - current)
+    if added:
+        cursor.executemany("INSERT INTO user_skills (user_id, skill_id) VALUES (%s, %s)", [(user_id, s) for s in added])
+    db.commit()
+    return _profile(user_id)
+
+
+@router.get("/users/{user_id}")
+def get_user_skills(user_id: int, current_user: dict = Depends(get_current_user)):
+    return _profile(user_id)
+
+
+@router.post("/users/{user_id}/endorse")
+def endorse(user_id: int, skill: str, current_user: dict = Depends(get_current_user)):
+    if user_id == current_user["id"]:
+        raise HTTPException(status_code=400, detail="You cannot endorse yourself")
+    cursor.execute(
+        "SELECT us.skill_id, s.name FROM user_skills us JOIN skills s ON s.id = us.skill_id "
+        "WHERE us.user_id = %s AND s.slug = %s FOR UPDATE",
+        (user_id, normalize_skill(skill)),
+    )
+    row = cursor.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="User does not list this skill")
+    cursor.execute(
+        "INSERT IGNORE INTO skill_endorsements (user_id, skill_id, endorser_id) VALUES (%s, %s, %s)",
+        (user_id, row["skill_id"], current_user["id"]),
+    )
+    if cursor.rowcount == 0:
+        raise HTTPException(status_code=400, detail="You have already endorsed this skill")
+    cursor.execute(
+        "UPDATE user_skills SET endorsement_count = endorsement_count + 1 WHERE user_id = %s AND skill_id = %s",
+        (user_id, row["skill_id"]),
+    )
+    tasks.enqueue("notify", {"user_ids": [user_id], "notification": {
+        "type": "user", "title": "New endorsement",
+        "message": f"{current_user['name']} endorsed you for {row['name']}", "action_url": "/skills"}})
+    db.commit()
+    return {"message": "Endorsed"}
+
+
+@router.delete("/users/{user_id}/endorse")
+def withdraw_endorsement(user_id: int, skill: str, current_user: dict = Depends(get_current_user)):
+    cursor.execute("SELECT id FROM skills WHERE slug = %s", (normalize_skill(skill),))
+    row = cursor.fetchone()
+    if row:
+        cursor.execute(
+            "DELETE FROM skill_endorsements WHERE user_id = %s AND skill_id = %s AND endorser_id = %s",
+            (user_id, row["id"], current_user["id"]),
+        )
+    if not row or cursor.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Endorsement not found")
+    cursor.execute(
+        "UPDATE user_skills SET endorsement_count = GREATEST(endorsement_count - 1, 0) WHERE user_id = %s AND skill_id = %s",
+        (user_id, row["id"]),
+    )
+    db.commit()
+    return {"message": "Endorsement withdrawn"}
+
+
+def release_endorser(endorser_id: int):
+    """Take back every endorsement `endorser_id` gave; call in the transaction that deletes them."""
+    cursor.execute(
+        "UPDATE user_skills us JOIN skill_endorsements e ON e.user_id = us.user_id AND e.skill_id = us.skill_id "
+        "SET us.endorsement_count = GREATEST(us.endorsement_count - 1, 0) WHERE e.endorser_id = %s",
+        (endorser_id,),
+    )
+
+
+@router.post("/counts/rebuild")
+def rebuild_counts(admin: dict = Depends(require_admin)):
+    """Recompute every endorsement count from skill_endorsements."""
+    cursor.execute(
+        "UPDATE user_skills us SET endorsement_count = "
+        "(SELECT COUNT(*) FROM skill_endorsements e WHERE e.user_id = us.user_id AND e.skill_id = us.skill_id)"
+    )
+    db.commit()
+    return {"message": "Endorsement counts rebuilt", "updated": cursor.rowcount}
+
+
+@router.get("/{skill}/top")
+def strongest_in_skill(skill: str, limit: int = Query(10, ge=1, le=100), current_user: dict = Depends(get_current_user)):
+    # idx_user_skills_rank: (skill_id, endorsement_count DESC, user_id) read in order and cut at limit
+    cursor.execute(
+        "SELECT u.id, u.name, u.role, u.avatar, us.endorsement_count FROM skills s "
+        "JOIN user_skills us ON us.skill_id = s.id JOIN users u ON u.id = us.user_id "
+        "WHERE s.slug = %s ORDER BY us.endorsement_count DESC, us.user_id LIMIT %s",
+        (normalize_skill(skill), limit),
+    )
+    return [
+        {
+            "userId": str(r["id"]),
+            "name": r["name"],
+            "role": r["role"],
+            "avatar": r.get("avatar") or "",
+            "count": r["endorsement_count"],
+            "level": _level(r["endorsement_count"]),
+        }
+        for r in cursor.fetchall()
+    ]
@@ -0,0 +1,23 @@
+"""Admin view of the slow query log kept by metrics.py, to look up the SQL behind a fingerprint label."""
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+
+from deps import require_admin
+import metrics
+
+router = APIRouter(prefix="/admin/slow-queries", tags=["metrics"])
+
+
+@router.get("")
+def list_slow_queries(
+    route: Optional[str] = Query(None, description="Only this route template, e.g. /jobs/{job_id}"),
+    fingerprint: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    admin: dict = Depends(require_admin),
+):
+    """Recent slow statements, newest first, and per-statement totals since the process started."""
+    def wanted(item):
+        return (route is None or item["route"] == route) and (fingerprint is None or item["fingerprint"] == fingerprint)
+
+    recent = [q for q in reversed(metrics.slow_queries()) if wanted(q)]
+    return {"recent": recent[:limit], "statements": [t for t in metrics.slow_query_totals() if wanted(t)]}
@@ -0,0 +1,297 @@
+"""Success stories feed.
+
+Pages are keyset-paginated on the story id (newest first), so every page is an
+index range read that starts where the previous one stopped; `nextCursor` is
+the id to pass back as `before`. The newest STORIES_HOT_SIZE stories of each
+feed are held in an in-process window that is dropped in every process when a
+story is published, featured or deleted, so first pages never touch the
+stories table. Likes, comments and shares are counters on the story row,
+updated with the write that changes them; they are overlaid on window pages
+with one primary-key read so they are never stale.
+"""
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+
+import cache
+from config import Config
+from database import cursor, db
+from deps import get_current_user, require_admin
+import tasks
+
+router = APIRouter(prefix="/stories", tags=["stories"])
+
+CATEGORIES = ("career", "entrepreneurship", "education", "personal")
+MAX_TAGS = 10
+
+# (category or None, featured only) -> tuple of the newest stories, newest first
+_hot = cache.Cache("stories_hot", maxsize=2 * (len(CATEGORIES) + 1))
+
+
+class CreateStory(BaseModel):
+    title: str
+    story: str
+    category: str = "career"
+    tags: List[str] = []
+
+
+class CreateComment(BaseModel):
+    content: str
+
+
+_STORY_SELECT = (
+    "SELECT s.id, s.author_id, s.title, s.story, s.category, s.tags, s.featured, s.like_count, s.comment_count, "
+    "s.share_count, s.created_at, u.name AS author_name, u.current_role AS author_role, "
+    "u.current_organization AS author_company, u.avatar AS author_avatar "
+    "FROM success_stories s JOIN users u ON u.id = s.author_id"
+)
+
+
+def _row_to_story(row: dict, liked: bool = False) -> dict:
+    tags = row.get("tags")
+    return {
+        "id": str(row["id"]),
+        "authorId": str(row["author_id"]),
+        "authorName": row.get("author_name") or "",
+        "authorRole": row.get("author_role") or "",
+        "authorCompany": row.get("author_company") or "",
+        "authorAvatar": row.get("author_avatar") or "",
+        "title": row["title"],
+        "story": row["story"],
+        "category": row["category"],
+        "tags": json.loads(tags) if isinstance(tags, str) else (tags or []),
+        "likes": row["like_count"],
+        "comments": row["comment_count"],
+        "shares": row["share_count"],
+        "timestamp": str(row["created_at"]) if row.get("created_at") else "",
+        "featured": bool(row["featured"]),
+        "likedByMe": liked,
+    }
+
+
+def _where(category: Optional[str], featured: bool, before: Optional[int]):
+    clauses, params = [], []
+    if category:
+        clauses.append("s.category = %s")
+        params.append(category)
+    if featured:
+        clauses.append("s.featured = 1")
+    if before is not None:
+        clauses.append("s.id < %s")
+        params.append(before)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _page(category: Optional[str], featured: bool, before: Optional[int], limit: int) -> list:
+    # idx_success_stories_category / _featured / the primary key: range read in id order, no sort
+    where, params = _where(category, featured, before)
+    cursor.execute(f"{_STORY_SELECT}{where} ORDER BY s.id DESC LIMIT %s", params + [limit])
+    return cursor.fetchall()
+
+
+def _hot_window(category: Optional[str], featured: bool) -> tuple:
+    return _hot.get_or_load((category, featured), lambda: tuple(_page(category, featured, None, Config.STORIES_HOT_SIZE)))
+
+
+def _overlay(rows: list, user_id: int) -> list:
+    """Current counters and the caller's like for rows that may come from the hot window."""
+    if not rows:
+        return []
+    ids = [r["id"] for r in rows]
+    cursor.execute(
+        f"SELECT s.id, s.like_count, s.comment_count, s.share_count, l.user_id IS NOT NULL AS liked "
+        f"FROM success_stories s LEFT JOIN story_likes l ON l.story_id = s.id AND l.user_id = %s "
+        f"WHERE s.id IN ({', '.join(['%s'] * len(ids))})",
+        [user_id] + ids,
+    )
+    current = {r["id"]: r for r in cursor.fetchall()}
+    # Rows deleted since the window was loaded drop out here
+    return [
+        _row_to_story(dict(r, **{k: current[r["id"]][k] for k in ("like_count", "comment_count", "share_count")}),
+                      bool(current[r["id"]]["liked"]))
+        for r in rows if r["id"] in current
+    ]
+
+
+def _get_story(story_id: int, user_id: int) -> dict:
+    cursor.execute(f"{_STORY_SELECT} WHERE s.id = %s", (story_id,))
+    row = cursor.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Story not found")
+    return _overlay([row], user_id)[0]
+
+
+def _lock_story(story_id: int) -> dict:
+    cursor.execute("SELECT id, author_id, title FROM success_stories WHERE id = %s FOR UPDATE", (story_id,))
+    story = cursor.fetchone()
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
+    return story
+
+
+@router.get("")
+def list_stories(
+    category: Optional[str] = None,
+    featured: bool = False,
+    before: Optional[int] = Query(None, description="nextCursor of the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+):
+    if category and category not in CATEGORIES:
+        raise HTTPException(status_code=400, detail="Invalid category")
+    category = category or None
+    rows = None
+    if limit <= Config.STORIES_HOT_SIZE:
+        window = _hot_window(category, featured)
+        # Serve from the window when the page lies entirely inside it
+        start = 0 if before is None else next((i for i, r in enumerate(window) if r["id"] < before), len(window))
+        if start + limit <= len(window) or len(window) < Config.STORIES_HOT_SIZE:
+            rows = list(window[start:start + limit])
+    if rows is None:
+        rows = _page(category, featured, before, limit)
+    items = _overlay(rows, current_user["id"])
+    return {"items": items, "nextCursor": str(rows[-1]["id"]) if len(rows) == limit else None}
+
+
+@router.post("")
+def create_story(data: CreateStory, current_user: dict = Depends(get_current_user)):
+    if data.category not in CATEGORIES:
+        raise HTTPException(status_code=400, detail="Invalid category")
+    if not data.title.strip() or not data.story.strip():
+        raise HTTPException(status_code=400, detail="Title and story are required")
+    tags = list(dict.fromkeys(t.strip() for t in data.tags if t.strip()))[:MAX_TAGS]
+    cursor.execute(
+        "INSERT INTO success_stories (author_id, title, story, category, tags) VALUES (%s, %s, %s, %s, %s)",
+        (current_user["id"], data.title.strip(), data.story, data.category, json.dumps(tags)),
+    )
+    story_id = cursor.lastrowid
+    cache.invalidate("stories_hot")
+    db.commit()
+    return _get_story(story_id, current_user["id"])
+
+
+@router.get("/{story_id}")
+def get_story(story_id: int, current_user: dict = Depends(get_current_user)):
+    return _get_story(story_id, current_user["id"])
+
+
+@router.delete("/{story_id}")
+def delete_story(story_id: int, current_user: dict = Depends(get_current_user)):
+    story = _lock_story(story_id)
+    if story["author_id"] != current_user["id"] and current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only the author can delete this story")
+    cursor.execute("DELETE FROM success_stories WHERE id = %s", (story_id,))
+    cache.invalidate("stories_hot")
+    db.commit()
+    return {"message": "Story deleted"}
+
+
+@router.post("/{story_id}/feature")
+def feature_story(story_id: int, featured: bool = True, admin: dict = Depends(require_admin)):
+    cursor.execute("UPDATE success_stories SET featured = %s WHERE id = %s", (int(featured), story_id))
+    if cursor.rowcount == 0:
+        cursor.execute("SELECT id FROM success_stories WHERE id = %s", (story_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Story not found")
+    cache.invalidate("stories_hot")
+    db.commit()
+    return {"message": "Story featured" if featured else "Story unfeatured"}
+
+
+@router.post("/{story_id}/like")
+def like_story(story_id: int, current_user: dict = Depends(get_current_user)):
+    story = _lock_story(story_id)
+    cursor.execute("INSERT IGNORE INTO story_likes (story_id, user_id) VALUES (%s, %s)", (story_id, current_user["id"]))
+    if cursor.rowcount:
+        cursor.execute("UPDATE success_stories SET like_count = like_count + 1 WHERE id = %s", (story_id,))
+        if story["author_id"] != current_user["id"]:
+            tasks.enqueue("notify", {"user_ids": [story["author_id"]], "notification": {
+                "type": "user", "title": "Story liked",
+                "message": f"{current_user['name']} liked \"{story['title']}\"", "action_url": "/stories"}})
+    db.commit()
+    return _get_story(story_id, current_user["id"])
+
+
+@router.delete("/{story_id}/like")
+def unlike_story(story_id: int, current_user: dict = Depends(get_current_user)):
+    _lock_story(story_id)
+    cursor.execute("DELETE FROM story_likes WHERE story_id = %s AND user_id = %s", (story_id, current_user["id"]))
+    if cursor.rowcount:
+        cursor.execute("UPDATE success_stories SET like_count = GREATEST(like_count - 1, 0) WHERE id = %s", (story_id,))
+    db.commit()
+    return _get_story(story_id, current_user["id"])
+
+
+@router.post("/{story_id}/share")
+def share_story(story_id: int, current_user: dict = Depends(get_current_user)):
+    cursor.execute("UPDATE success_stories SET share_count = share_count + 1 WHERE id = %s", (story_id,))
+    if cursor.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Story not found")
+    db.commit()
+    return {"message": "Shared"}
+
+
+@router.get("/{story_id}/comments")
+def list_comments(
+    story_id: int,
+    after: Optional[int] = Query(None, description="nextCursor of the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+):
+    # idx_story_comments_story: (story_id, id), oldest first
+    cursor.execute(
+        "SELECT c.id, c.user_id, c.content, c.created_at, u.name, u.avatar FROM story_comments c "
+        "JOIN users u ON u.id = c.user_id WHERE c.story_id = %s AND c.id > %s ORDER BY c.id LIMIT %s",
+        (story_id, after or 0, limit),
+    )
+    rows = cursor.fetchall()
+    return {
+        "items": [
+            {
+                "id": str(r["id"]),
+                "userId": str(r["user_id"]),
+                "userName": r["name"],
+                "userAvatar": r.get("avatar") or "",
+                "content": r["content"],
+                "timestamp": str(r["created_at"]) if r.get("created_at") else "",
+            }
+            for r in rows
+        ],
+        "nextCursor": str(rows[-1]["id"]) if len(rows) == limit else None,
+    }
+
+
+@router.post("/{story_id}/comments")
+def add_comment(story_id: int, data: CreateComment, current_user: dict = Depends(get_current_user)):
+    if not data.content.strip():
+        raise HTTPException(status_code=400, detail="Comment is empty")
+    story = _lock_story(story_id)
+    cursor.execute(
+        "INSERT INTO story_comments (story_id, user_id, content) VALUES (%s, %s, %s)",
+        (story_id, current_user["id"], data.content.strip()),
+    )
+    comment_id = cursor.lastrowid
+    cursor.execute("UPDATE success_stories SET comment_count = comment_count + 1 WHERE id = %s", (story_id,))
+    if story["author_id"] != current_user["id"]:
+        tasks.enqueue("notify", {"user_ids": [story["author_id"]], "notification": {
+            "type": "message", "title": "New comment on your story",
+            "message": f"{current_user['name']} commented on \"{story['title']}\"", "action_url": "/stories"}})
+    db.commit()
+    return {"id": str(comment_id), "message": "Comment added"}
+
+
+@router.delete("/{story_id}/comments/{comment_id}")
+def delete_comment(story_id: int, comment_id: int, current_user: dict = Depends(get_current_user)):
+    story = _lock_story(story_id)
+    cursor.execute("SELECT user_id FROM story_comments WHERE id = %s AND story_id = %s", (comment_id, story_id))
+    comment = cursor.fetchone()
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    if current_user["id"] not in (comment["user_id"], story["author_id"]) and current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not allowed to delete this comment")
+    cursor.execute("DELETE FROM story_comments WHERE id = %s", (comment_id,))
+    cursor.execute("UPDATE success_stories SET comment_count = GREATEST(comment_count - 1, 0) WHERE id = %s", (story_id,))
+    db.commit()
+    return {"message": "Comment deleted"}
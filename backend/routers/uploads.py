@@ -0,0 +1,120 @@
+"""Avatar and resume uploads, and downloads of stored files.
+
+Stored names are content hashes, so `/files/{name}` responses never change:
+they carry a year-long immutable Cache-Control and the hash as ETag. Downloads
+honour a single `Range: bytes=` range so resumes can be previewed and resumed.
+Files are public to anyone who has the name, like the URLs users pasted before.
+"""
+import os
+
+import aiofiles
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+
+from config import Config
+from database import cursor, db
+from deps import get_current_user, invalidate_user
+import uploads
+
+router = APIRouter(tags=["uploads"])
+
+CACHE_FOREVER = "public, max-age=31536000, immutable"
+
+
+async def _store(request: Request, allowed: dict, max_bytes: int) -> dict:
+    """Store the multipart `file` field straight from the request stream. The body is parsed here rather
+    than by a File() parameter, which would spool it to a temporary file before any limit applied."""
+    # Room for the multipart framing and a few small fields around the file
+    max_body = max_bytes + 64 * 1024
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > max_body:
+        raise HTTPException(status_code=413, detail=f"File is larger than {max_bytes // (1024 * 1024)} MB")
+    chunks = uploads.multipart_file(request.stream(), request.headers.get("content-type", ""), max_body)
+    try:
+        return await uploads.store(chunks, allowed, max_bytes)
+    except uploads.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    finally:
+        await chunks.aclose()
+
+
+def _set_avatar(user_id: int, url: str):
+    cursor.execute("UPDATE users SET avatar = %s WHERE id = %s", (url, user_id))
+    invalidate_user(user_id)
+    db.commit()
+
+
+@router.post("/uploads/avatar")
+async def upload_avatar(request: Request, current_user: dict = Depends(get_current_user)):
+    stored = await _store(request, uploads.AVATAR_TYPES, Config.UPLOAD_MAX_AVATAR_BYTES)
+    try:
+        thumbs = await uploads.thumbnails(stored)
+    except uploads.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    urls = {size: f"/files/{name}" for size, name in zip(Config.AVATAR_THUMB_SIZES, thumbs)}
+    avatar = urls[max(urls)]
+    await run_in_threadpool(_set_avatar, current_user["id"], avatar)
+    return {"avatar": avatar, "original": f"/files/{stored['name']}", "thumbnails": urls, "size": stored["size"]}
+
+
+@router.post("/uploads/resume")
+async def upload_resume(request: Request, current_user: dict = Depends(get_current_user)):
+    """Store a resume; pass the returned url as resume_url when applying."""
+    stored = await _store(request, uploads.RESUME_TYPES, Config.UPLOAD_MAX_RESUME_BYTES)
+    return {"url": f"/files/{stored['name']}", "contentType": stored["contentType"], "size": stored["size"]}
+
+
+def _byte_range(header: str, size: int):
+    """(start, end) inclusive for a single `bytes=` range, None to send the whole file; raises 416."""
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+async def _stream(path: str, start: int, length: int):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(Config.UPLOAD_CHUNK_BYTES, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@router.get("/files/{name}")
+async def download(
+    name: str,
+    range_header: str = Header(None, alias="range"),
+    if_none_match: str = Header(None),
+):
+    match = uploads.NAME.match(name)
+    path = uploads.path_for(name) if match else None
+    if not match or match["ext"] not in uploads.CONTENT_TYPES or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    etag = f'"{match["sha"]}{"_" + match["size"] if match["size"] else ""}"'
+    headers = {"Cache-Control": CACHE_FOREVER, "ETag": etag, "Accept-Ranges": "bytes"}
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    size = os.path.getsize(path)
+    span = _byte_range(range_header, size) if range_header else None
+    media_type = uploads.CONTENT_TYPES[match["ext"]]
+    if span is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_stream(path, 0, size), media_type=media_type, headers=headers)
+    start, end = span
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_stream(path, start, end - start + 1), status_code=206, media_type=media_type, headers=headers)
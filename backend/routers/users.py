@@ -1,13 +1,25 @@
 """Users: profile, list alumni/students, admin approve."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 
 from database import cursor, db
-from deps import get_current_user, get_current_user_id, require_admin
+from deps import batch_ids, get_current_user, get_current_user_id, invalidate_user, require_admin
+from fieldsets import FieldSet
+from routers import skills
+import careers
+import tasks
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+USER_FIELDS = FieldSet({
+    k: (k,) for k in (
+        "id", "name", "email", "role", "graduation_year", "current_organization", "current_role", "industry",
+        "department", "batch", "phone", "location", "bio", "linkedin", "avatar",
+    )
+})
+FIELDS_QUERY = Query(None, description="Comma-separated response keys, e.g. id,name,avatar")
+
 
 class UpdateProfile(BaseModel):
     name: Optional[str] = None
@@ -19,6 +31,7 @@ class UpdateProfile(BaseModel):
     graduation_year: Optional[str] = None
     current_organization: Optional[str] = None
     current_role: Optional[str] = None
+    industry: Optional[str] = None
     department: Optional[str] = None
     batch: Optional[str] = None
 
@@ -28,12 +41,13 @@ def _row_to_user(row: dict) -> dict:
         return None
     return {
         "id": str(row["id"]),
-        "name": row["name"],
-        "email": row["email"],
-        "role": row["role"],
+        "name": row.get("name"),
+        "email": row.get("email"),
+        "role": row.get("role"),
         "graduation_year": row.get("graduation_year"),
         "current_organization": row.get("current_organization"),
         "current_role": row.get("current_role"),
+        "industry": row.get("industry"),
         "department": row.get("department"),
         "batch": row.get("batch"),
         "phone": row.get("phone"),
@@ -45,8 +59,8 @@ def _row_to_user(row: dict) -> dict:
 
 
 @router.get("/me")
-def get_me(current_user: dict = Depends(get_current_user)):
-    return _row_to_user(current_user)
+def get_me(fields: Optional[str] = FIELDS_QUERY, current_user: dict = Depends(get_current_user)):
+    return USER_FIELDS.prune(_row_to_user(current_user), USER_FIELDS.parse(fields))
 
 
 @router.patch("/me")
@@ -54,33 +68,62 @@ def update_me(data: UpdateProfile, user_id: int = Depends(get_current_user_id)):
     updates = data.model_dump(exclude_unset=True)
     if not updates:
         return {"message": "Nothing to update"}
+    tracked = [f for f in careers.TRACKED_FIELDS if f in updates]
+    if tracked:
+        cursor.execute(f"SELECT {', '.join(careers.TRACKED_FIELDS)} FROM users WHERE id = %s FOR UPDATE", (user_id,))
+        before = cursor.fetchone()
     set_clause = ", ".join(f"{k} = %s" for k in updates)
     values = list(updates.values()) + [user_id]
     cursor.execute(f"UPDATE users SET {set_clause} WHERE id = %s", values)
+    if tracked:
+        careers.record_change(user_id, before, updates)
+    invalidate_user(user_id)
     db.commit()
     cursor.execute(
-        "SELECT id, name, email, role, graduation_year, current_organization, current_role, department, batch, phone, location, bio, linkedin, avatar FROM users WHERE id = %s",
+        "SELECT id, name, email, role, graduation_year, current_organization, current_role, industry, department, batch, phone, location, bio, linkedin, avatar FROM users WHERE id = %s",
         (user_id,),
     )
     return _row_to_user(cursor.fetchone())
 
 
-@router.get("/alumni")
-def list_alumni(current_user: dict = Depends(get_current_user)):
+@router.get("/batch")
+def batch_users(
+    ids: list = Depends(batch_ids),
+    fields: Optional[str] = FIELDS_QUERY,
+    current_user: dict = Depends(get_current_user),
+):
+    """Users by id in request order; unknown ids, and pending alumni for non-admins, are listed as missing."""
+    keys = USER_FIELDS.parse(fields)
     cursor.execute(
-        "SELECT id, name, email, role, graduation_year, current_organization, current_role, department, batch, phone, location, bio, linkedin, avatar FROM users WHERE role = 'alumni' AND is_approved = 1"
+        f"SELECT {USER_FIELDS.sql(keys)}, role AS visibility_role, is_approved FROM users "
+        f"WHERE id IN ({', '.join(['%s'] * len(ids))})",
+        ids,
     )
+    admin = current_user["role"] == "admin"
+    found = {
+        r["id"]: r for r in cursor.fetchall()
+        if admin or r["id"] == current_user["id"] or r["visibility_role"] != "alumni" or r["is_approved"]
+    }
+    return {
+        "items": [USER_FIELDS.prune(_row_to_user(found[i]), keys) for i in ids if i in found],
+        "missing": [str(i) for i in ids if i not in found],
+    }
+
+
+@router.get("/alumni")
+def list_alumni(fields: Optional[str] = FIELDS_QUERY, current_user: dict = Depends(get_current_user)):
+    keys = USER_FIELDS.parse(fields)
+    cursor.execute(f"SELECT {USER_FIELDS.sql(keys)} FROM users WHERE role = 'alumni' AND is_approved = 1")
     rows = cursor.fetchall()
-    return [_row_to_user(r) for r in rows]
+    return [USER_FIELDS.prune(_row_to_user(r), keys) for r in rows]
 
 
 @router.get("/students")
-def list_students(current_user: dict = Depends(get_current_user)):
-    cursor.execute(
-        "SELECT id, name, email, role, graduation_year, current_organization, current_role, department, batch, phone, location, bio, linkedin, avatar FROM users WHERE role = 'student'"
-    )
+def list_students(fields: Optional[str] = FIELDS_QUERY, current_user: dict = Depends(get_current_user)):
+    keys = USER_FIELDS.parse(fields)
+    cursor.execute(f"SELECT {USER_FIELDS.sql(keys)} FROM users WHERE role = 'student'")
     rows = cursor.fetchall()
-    return [_row_to_user(r) for r in rows]
+    return [USER_FIELDS.prune(_row_to_user(r), keys) for r in rows]
 
 
 @router.get("/pending")
@@ -106,16 +149,23 @@ def list_pending_alumni(admin: dict = Depends(require_admin)):
 @router.post("/{user_id}/approve")
 def approve_user(user_id: int, admin: dict = Depends(require_admin)):
     cursor.execute("UPDATE users SET is_approved = 1 WHERE id = %s AND role = 'alumni'", (user_id,))
-    db.commit()
     if cursor.rowcount == 0:
         raise HTTPException(status_code=404, detail="User not found or not alumni")
+    invalidate_user(user_id)
+    tasks.enqueue("notify", {"user_ids": [user_id], "notification": {
+        "type": "user", "title": "Account approved", "message": "Your alumni account has been approved.", "priority": "high"}})
+    db.commit()
     return {"message": "User approved"}
 
 
 @router.post("/{user_id}/reject")
 def reject_user(user_id: int, admin: dict = Depends(require_admin)):
-    cursor.execute("DELETE FROM users WHERE id = %s AND role = 'alumni' AND is_approved = 0", (user_id,))
-    db.commit()
-    if cursor.rowcount == 0:
+    cursor.execute("SELECT id FROM users WHERE id = %s AND role = 'alumni' AND is_approved = 0 FOR UPDATE", (user_id,))
+    if not cursor.fetchone():
         raise HTTPException(status_code=404, detail="User not found or already approved")
+    invalidate_user(user_id)
+    # skill_endorsements cascades from the endorser: their counts go with them
+    skills.release_endorser(user_id)
+    cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+    db.commit()
     return {"message": "User rejected"}
@@ -0,0 +1,219 @@
+"""Availability windows, free-slot search and double-booking-proof coffee chat bookings.
+
+Users publish recurring weekly windows (UTC minutes from the start of a weekday).
+A search expands each participant's windows over the horizon, removes their
+existing bookings, and indexes the result in an IntervalTree. Common free time
+is found by querying each tree only for the intervals that can still overlap the
+running intersection, so the cost follows the overlaps rather than the size of
+every calendar.
+
+Bookings claim one `coffee_chat_slots` row per participant per SLOT_MINUTES
+step. The primary key (user_id, slot_start) makes a second booking of any
+overlapping step fail inside the database, whatever the interleaving.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from config import Config
+from database import cursor
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class IntervalTree:
+    """Static interval tree over half-open [start, end) intervals.
+
+    Intervals are sorted by start and laid out as an implicit balanced BST; each
+    node stores the largest end in its subtree, so overlap queries skip whole
+    subtrees that end before the query begins. O(n log n) build, O(log n + k) query.
+    """
+
+    def __init__(self, intervals):
+        self._items = sorted(intervals)
+        self._max_end = [0] * len(self._items)
+        if self._items:
+            self._build(0, len(self._items) - 1)
+
+    def _build(self, lo: int, hi: int) -> int:
+        mid = (lo + hi) // 2
+        best = self._items[mid][1]
+        if lo < mid:
+            best = max(best, self._build(lo, mid - 1))
+        if mid < hi:
+            best = max(best, self._build(mid + 1, hi))
+        self._max_end[mid] = best
+        return best
+
+    def overlapping(self, start: int, end: int) -> list:
+        """All stored intervals overlapping [start, end), in start order."""
+        found = []
+        stack = [(0, len(self._items) - 1)] if self._items else []
+        while stack:
+            lo, hi = stack.pop()
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start:
+                continue
+            item = self._items[mid]
+            if mid < hi and item[0] < end:
+                stack.append((mid + 1, hi))
+            if item[0] < end and item[1] > start:
+                found.append(item)
+            if lo < mid:
+                stack.append((lo, mid - 1))
+        found.sort()
+        return found
+
+    def __len__(self):
+        return len(self._items)
+
+
+def parse_hhmm(value: str) -> int:
+    hours, _, minutes = value.partition(":")
+    total = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= total <= MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time {value!r}")
+    return total
+
+
+def format_hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _merge(intervals) -> list:
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(intervals: list, busy: list) -> list:
+    """Both lists merged and sorted; returns intervals minus busy."""
+    free, i = [], 0
+    for start, end in intervals:
+        while i < len(busy) and busy[i][1] <= start:
+            i += 1
+        j = i
+        while j < len(busy) and busy[j][0] < end:
+            if busy[j][0] > start:
+                free.append((start, busy[j][0]))
+            start = max(start, busy[j][1])
+            j += 1
+        if start < end:
+            free.append((start, end))
+    return free
+
+
+def _minutes_since(origin: datetime, moment: datetime) -> int:
+    return int((moment - origin).total_seconds() // 60)
+
+
+def free_intervals(user_ids: list, origin: datetime, days: int) -> dict:
+    """user_id -> merged free intervals in minutes since `origin` over the next `days`."""
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    cursor.execute(
+        f"SELECT user_id, weekday, start_minute, end_minute FROM availability_windows WHERE user_id IN ({placeholders})",
+        list(user_ids),
+    )
+    weekly = defaultdict(list)
+    for r in cursor.fetchall():
+        weekly[r["user_id"]].append((r["weekday"], r["start_minute"], r["end_minute"]))
+    horizon_end = origin + timedelta(days=days)
+    cursor.execute(
+        f"SELECT user_id, slot_start FROM coffee_chat_slots WHERE user_id IN ({placeholders}) "
+        f"AND slot_start >= %s AND slot_start < %s",
+        list(user_ids) + [origin, horizon_end],
+    )
+    busy = defaultdict(list)
+    for r in cursor.fetchall():
+        offset = _minutes_since(origin, r["slot_start"])
+        busy[r["user_id"]].append((offset, offset + Config.COFFEE_SLOT_MINUTES))
+
+    midnight = origin.replace(hour=0, minute=0, second=0, microsecond=0)
+    result = {}
+    for user_id in user_ids:
+        spans = []
+        for day in range(days + 1):
+            day_start = midnight + timedelta(days=day)
+            base = _minutes_since(origin, day_start)
+            for weekday, start, end in weekly[user_id]:
+                if weekday == day_start.weekday():
+                    spans.append((max(base + start, 0), min(base + end, days * MINUTES_PER_DAY)))
+        spans = [(s, e) for s, e in spans if s < e]
+        result[user_id] = _subtract(_merge(spans), _merge(busy[user_id]))
+    return result
+
+
+def common_free(per_user: dict) -> list:
+    """Intersection of every user's free intervals, narrowing through one tree per user."""
+    ordered = sorted(per_user.values(), key=len)
+    if not ordered:
+        return []
+    common = ordered[0]
+    for intervals in ordered[1:]:
+        tree = IntervalTree(intervals)
+        narrowed = []
+        for start, end in common:
+            for other_start, other_end in tree.overlapping(start, end):
+                narrowed.append((max(start, other_start), min(end, other_end)))
+        common = narrowed
+        if not common:
+            break
+    return common
+
+
+def find_slots(user_ids: list, duration: int, days: int, limit: int, now: datetime = None) -> list:
+    """Start times (aligned to SLOT_MINUTES) at which every user is free for `duration` minutes."""
+    step = Config.COFFEE_SLOT_MINUTES
+    now = now or datetime.utcnow()
+    # Align the origin to the slot grid so every offset below is a bookable start
+    origin = now.replace(second=0, microsecond=0) + timedelta(minutes=-(now.minute % step) + step)
+    slots = []
+    for start, end in common_free(free_intervals(user_ids, origin, days)):
+        first = -(-start // step) * step
+        for offset in range(first, end - duration + 1, step):
+            slots.append(origin + timedelta(minutes=offset))
+            if len(slots) >= limit:
+                return slots
+    return slots
+
+
+def slot_starts(starts_at: datetime, duration: int) -> list:
+    step = Config.COFFEE_SLOT_MINUTES
+    return [starts_at + timedelta(minutes=m) for m in range(0, duration, step)]
+
+
+def within_availability(user_id: int, starts_at: datetime, duration: int) -> bool:
+    """True if [starts_at, starts_at + duration) lies inside one of the user's weekly windows."""
+    start = starts_at.hour * 60 + starts_at.minute
+    end = start + duration
+    weekday = starts_at.weekday()
+    cursor.execute(
+        "SELECT weekday, start_minute, end_minute FROM availability_windows WHERE user_id = %s AND weekday IN (%s, %s)",
+        (user_id, weekday, (weekday + 1) % 7),
+    )
+    spans = []
+    for r in cursor.fetchall():
+        shift = 0 if r["weekday"] == weekday else MINUTES_PER_DAY
+        spans.append((r["start_minute"] + shift, r["end_minute"] + shift))
+    return any(s <= start and end <= e for s, e in _merge(spans))
+
+
+def claim_slots(chat_id: int, user_ids: list, starts_at: datetime, duration: int):
+    """Insert the slot rows for a booking; raises the driver's IntegrityError if any is taken."""
+    cursor.executemany(
+        "INSERT INTO coffee_chat_slots (user_id, slot_start, chat_id) VALUES (%s, %s, %s)",
+        [(user_id, slot, chat_id) for user_id in user_ids for slot in slot_starts(starts_at, duration)],
+    )
+
+
+def release_slots(chat_id: int):
+    cursor.execute("DELETE FROM coffee_chat_slots WHERE chat_id = %s", (chat_id,))
+
+
+def parse_start(day: str, time: str) -> datetime:
+    d = date.fromisoformat(day)
+    minutes = parse_hhmm(time)
+    return datetime(d.year, d.month, d.day) + timedelta(minutes=minutes)
@@ -12,6 +12,7 @@ CREATE TABLE IF NOT EXISTS users (
   graduation_year VARCHAR(20) NULL,
   current_organization VARCHAR(255) NULL,
   current_role VARCHAR(255) NULL,
+  industry VARCHAR(255) NULL,
   department VARCHAR(255) NULL,
   batch VARCHAR(50) NULL,
   phone VARCHAR(50) NULL,
@@ -19,7 +20,9 @@ CREATE TABLE IF NOT EXISTS users (
   bio TEXT NULL,
   linkedin VARCHAR(255) NULL,
   avatar VARCHAR(512) NULL,
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  INDEX idx_users_updated (updated_at)
 );
 
 -- Add columns to existing users table if it already exists (run separately if needed)
@@ -86,7 +89,8 @@ CREATE TABLE IF NOT EXISTS donations (
 CREATE TABLE IF NOT EXISTS mentorship_requests (
   id INT AUTO_INCREMENT PRIMARY KEY,
   student_id INT NOT NULL,
-  mentor_id INT NOT NULL,
+  -- NULL until batch assignment picks a mentor (see matching.py)
+  mentor_id INT NULL,
   domain VARCHAR(255) NOT NULL,
   message TEXT NOT NULL,
   status VARCHAR(20) NOT NULL DEFAULT 'pending',
@@ -103,19 +107,26 @@ CREATE TABLE IF NOT EXISTS applications (
   resume_url VARCHAR(512) NULL,
   status VARCHAR(20) NOT NULL DEFAULT 'pending',
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY unique_application (job_id, student_id),
   FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE,
   FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
 CREATE TABLE IF NOT EXISTS conversations (
   id INT AUTO_INCREMENT PRIMARY KEY,
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  user_low_id INT NULL,
+  user_high_id INT NULL,
+  last_message_id INT NULL,
+  archived_message_id INT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY unique_pair (user_low_id, user_high_id)
 );
 
 CREATE TABLE IF NOT EXISTS conversation_participants (
   id INT AUTO_INCREMENT PRIMARY KEY,
   conversation_id INT NOT NULL,
   user_id INT NOT NULL,
+  last_read_message_id INT NOT NULL DEFAULT 0,
   UNIQUE KEY unique_participant (conversation_id, user_id),
   FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE,
   FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
@@ -131,3 +142,366 @@ CREATE TABLE IF NOT EXISTS messages (
   FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE,
   FOREIGN KEY (sender_id) REFERENCES users(id) ON DELETE CASCADE
 );
+
+-- Durable background tasks, enqueued in the same transaction as the write that triggers them
+CREATE TABLE IF NOT EXISTS task_queue (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  kind VARCHAR(100) NOT NULL,
+  payload JSON NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'queued',
+  attempts INT NOT NULL DEFAULT 0,
+  max_attempts INT NOT NULL DEFAULT 5,
+  run_after TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  locked_by VARCHAR(100) NULL,
+  locked_at TIMESTAMP NULL,
+  last_error TEXT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_task_queue_ready (status, run_after),
+  INDEX idx_task_queue_lease (status, locked_at)
+);
+
+-- Notifications: targeted ones are fanned out on write into per-user inboxes,
+-- broadcasts are stored once per audience stream and fanned out on read
+CREATE TABLE IF NOT EXISTS notifications (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  user_id INT NOT NULL,
+  type VARCHAR(30) NOT NULL,
+  title VARCHAR(255) NOT NULL,
+  message TEXT NOT NULL,
+  action_url VARCHAR(512) NULL,
+  priority VARCHAR(10) NOT NULL DEFAULT 'medium',
+  is_read TINYINT(1) NOT NULL DEFAULT 0,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_notifications_page (user_id, created_at, id),
+  INDEX idx_notifications_unread (user_id, is_read),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS notification_streams (
+  audience VARCHAR(20) PRIMARY KEY,
+  seq INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS notification_broadcasts (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  audience VARCHAR(20) NOT NULL,
+  seq INT NOT NULL,
+  type VARCHAR(30) NOT NULL,
+  title VARCHAR(255) NOT NULL,
+  message TEXT NOT NULL,
+  action_url VARCHAR(512) NULL,
+  priority VARCHAR(10) NOT NULL DEFAULT 'medium',
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY unique_stream_position (audience, seq),
+  INDEX idx_broadcasts_page (audience, created_at, id)
+);
+
+-- Per-user unread counter plus how far the user has read each broadcast stream
+CREATE TABLE IF NOT EXISTS notification_state (
+  user_id INT PRIMARY KEY,
+  unread_direct INT NOT NULL DEFAULT 0,
+  seen_all_seq INT NOT NULL DEFAULT 0,
+  seen_role_seq INT NOT NULL DEFAULT 0,
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Cache invalidation log tailed by every API process (see cache.py)
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  cache VARCHAR(64) NOT NULL,
+  cache_key VARCHAR(255) NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_cache_invalidations_created (created_at)
+);
+
+-- Mentor capacity and live load; load_pct is indexed for least-loaded lookups
+CREATE TABLE IF NOT EXISTS mentor_profiles (
+  user_id INT PRIMARY KEY,
+  capacity INT NOT NULL DEFAULT 5,
+  open_requests INT NOT NULL DEFAULT 0,
+  accepted_requests INT NOT NULL DEFAULT 0,
+  accepting TINYINT(1) NOT NULL DEFAULT 1,
+  load_pct INT AS (IF(capacity > 0, FLOOR(100 * (open_requests + accepted_requests) / capacity), 100)) STORED,
+  INDEX idx_mentor_load (accepting, load_pct),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS mentor_domains (
+  domain VARCHAR(100) NOT NULL,
+  user_id INT NOT NULL,
+  PRIMARY KEY (domain, user_id),
+  INDEX idx_mentor_domains_user (user_id),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Recurring weekly availability in UTC minutes from the start of the weekday (0 = Monday)
+CREATE TABLE IF NOT EXISTS availability_windows (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  user_id INT NOT NULL,
+  weekday TINYINT NOT NULL,
+  start_minute SMALLINT NOT NULL,
+  end_minute SMALLINT NOT NULL,
+  INDEX idx_availability_user (user_id, weekday),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS coffee_chats (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  requester_id INT NOT NULL,
+  recipient_id INT NOT NULL,
+  topic VARCHAR(255) NOT NULL,
+  message TEXT NULL,
+  meeting_type VARCHAR(20) NOT NULL DEFAULT 'virtual',
+  starts_at DATETIME NOT NULL,
+  duration_minutes INT NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'pending',
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_coffee_chats_requester (requester_id, starts_at),
+  INDEX idx_coffee_chats_recipient (recipient_id, starts_at),
+  FOREIGN KEY (requester_id) REFERENCES users(id) ON DELETE CASCADE,
+  FOREIGN KEY (recipient_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- One row per participant per booked step; the primary key is what rules out double-booking
+CREATE TABLE IF NOT EXISTS coffee_chat_slots (
+  user_id INT NOT NULL,
+  slot_start DATETIME NOT NULL,
+  chat_id INT NOT NULL,
+  PRIMARY KEY (user_id, slot_start),
+  INDEX idx_coffee_chat_slots_chat (chat_id),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+  FOREIGN KEY (chat_id) REFERENCES coffee_chats(id) ON DELETE CASCADE
+);
+
+-- Skills keyed by normalized slug; name keeps the first spelling seen
+CREATE TABLE IF NOT EXISTS skills (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  slug VARCHAR(100) NOT NULL UNIQUE,
+  name VARCHAR(100) NOT NULL
+);
+
+-- endorsement_count mirrors skill_endorsements and is maintained on write
+CREATE TABLE IF NOT EXISTS user_skills (
+  user_id INT NOT NULL,
+  skill_id INT NOT NULL,
+  endorsement_count INT NOT NULL DEFAULT 0,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (user_id, skill_id),
+  INDEX idx_user_skills_top (user_id, endorsement_count DESC, skill_id),
+  INDEX idx_user_skills_rank (skill_id, endorsement_count DESC, user_id),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+  FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS skill_endorsements (
+  user_id INT NOT NULL,
+  skill_id INT NOT NULL,
+  endorser_id INT NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (user_id, skill_id, endorser_id),
+  INDEX idx_skill_endorsements_endorser (endorser_id),
+  FOREIGN KEY (user_id, skill_id) REFERENCES user_skills(user_id, skill_id) ON DELETE CASCADE,
+  FOREIGN KEY (endorser_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- People-you-may-know lists, rewritten per user by the worker (see network.py)
+CREATE TABLE IF NOT EXISTS connection_suggestions (
+  user_id INT NOT NULL,
+  suggested_id INT NOT NULL,
+  score INT NOT NULL,
+  mutual_count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, suggested_id),
+  INDEX idx_connection_suggestions_rank (user_id, score DESC, mutual_count DESC),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+  FOREIGN KEY (suggested_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Append-only: one row per change of organization, role or industry (see careers.py)
+CREATE TABLE IF NOT EXISTS role_history (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  user_id INT NOT NULL,
+  organization VARCHAR(255) NULL,
+  role VARCHAR(255) NULL,
+  industry VARCHAR(255) NULL,
+  started_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_role_history_user (user_id, started_at),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Precomputed from role_history by the worker. kind is role or industry, keys are normalized
+CREATE TABLE IF NOT EXISTS career_transitions (
+  kind VARCHAR(10) NOT NULL,
+  from_key VARCHAR(191) NOT NULL,
+  to_key VARCHAR(191) NOT NULL,
+  move_count INT NOT NULL,
+  median_tenure_days INT NOT NULL,
+  PRIMARY KEY (kind, from_key, to_key),
+  INDEX idx_career_transitions_top (kind, from_key, move_count DESC)
+);
+
+-- Like, comment and share counts are maintained on write (see routers/stories.py)
+CREATE TABLE IF NOT EXISTS success_stories (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  author_id INT NOT NULL,
+  title VARCHAR(255) NOT NULL,
+  story TEXT NOT NULL,
+  category ENUM('career', 'entrepreneurship', 'education', 'personal') NOT NULL DEFAULT 'career',
+  tags JSON NULL,
+  featured TINYINT(1) NOT NULL DEFAULT 0,
+  like_count INT NOT NULL DEFAULT 0,
+  comment_count INT NOT NULL DEFAULT 0,
+  share_count INT NOT NULL DEFAULT 0,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_success_stories_category (category, id),
+  INDEX idx_success_stories_featured (featured, id),
+  INDEX idx_success_stories_author (author_id),
+  FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS story_likes (
+  story_id INT NOT NULL,
+  user_id INT NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (story_id, user_id),
+  INDEX idx_story_likes_user (user_id),
+  FOREIGN KEY (story_id) REFERENCES success_stories(id) ON DELETE CASCADE,
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS story_comments (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  story_id INT NOT NULL,
+  user_id INT NOT NULL,
+  content TEXT NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_story_comments_story (story_id, id),
+  FOREIGN KEY (story_id) REFERENCES success_stories(id) ON DELETE CASCADE,
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Candidates referred to jobs by alumni (see routers/referrals.py)
+CREATE TABLE IF NOT EXISTS job_referrals (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  job_id INT NOT NULL,
+  referrer_id INT NOT NULL,
+  candidate_name VARCHAR(255) NOT NULL,
+  candidate_email VARCHAR(255) NOT NULL,
+  candidate_phone VARCHAR(50) NULL,
+  candidate_linkedin VARCHAR(255) NULL,
+  candidate_resume VARCHAR(512) NULL,
+  relationship VARCHAR(255) NULL,
+  why_good_fit TEXT NULL,
+  status ENUM('pending', 'accepted', 'rejected', 'interviewed', 'hired') NOT NULL DEFAULT 'pending',
+  bonus INT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  UNIQUE KEY unique_job_candidate (job_id, candidate_email),
+  INDEX idx_job_referrals_referrer (referrer_id, status, id),
+  INDEX idx_job_referrals_job (job_id, status, id),
+  FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE,
+  FOREIGN KEY (referrer_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Per-referrer counters moved with every referral status change
+CREATE TABLE IF NOT EXISTS referrer_stats (
+  referrer_id INT PRIMARY KEY,
+  total INT NOT NULL DEFAULT 0,
+  pending INT NOT NULL DEFAULT 0,
+  accepted INT NOT NULL DEFAULT 0,
+  rejected INT NOT NULL DEFAULT 0,
+  interviewed INT NOT NULL DEFAULT 0,
+  hired INT NOT NULL DEFAULT 0,
+  bonus_earned INT NOT NULL DEFAULT 0,
+  INDEX idx_referrer_stats_rank (hired DESC, total DESC),
+  FOREIGN KEY (referrer_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Cold storage filled by the worker (see archive.py). Rows keep their hot-table ids and land in the
+-- partition of their month. The archiver splits p_future as new months arrive, so p_start ends up
+-- holding everything before the first archived month. Partitioned tables can't have foreign keys.
+CREATE TABLE IF NOT EXISTS messages_archive (
+  id INT NOT NULL,
+  conversation_id INT NOT NULL,
+  sender_id INT NOT NULL,
+  content TEXT NOT NULL,
+  is_read TINYINT(1) NOT NULL DEFAULT 0,
+  created_at TIMESTAMP NULL,
+  archive_month INT NOT NULL,
+  PRIMARY KEY (id, archive_month),
+  INDEX idx_messages_archive_conversation (conversation_id, id)
+) PARTITION BY RANGE (archive_month) (
+  PARTITION p_start VALUES LESS THAN (200001),
+  PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE IF NOT EXISTS events_archive (
+  id INT NOT NULL,
+  title VARCHAR(255) NOT NULL,
+  event_date DATE NOT NULL,
+  event_time VARCHAR(50) NOT NULL,
+  location VARCHAR(255) NOT NULL,
+  description TEXT NOT NULL,
+  type VARCHAR(100) NOT NULL,
+  max_capacity INT NULL,
+  organizer VARCHAR(255) NOT NULL,
+  status VARCHAR(20) NOT NULL,
+  created_at TIMESTAMP NULL,
+  archive_month INT NOT NULL,
+  PRIMARY KEY (id, archive_month)
+) PARTITION BY RANGE (archive_month) (
+  PARTITION p_start VALUES LESS THAN (200001),
+  PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- archive_month is the event's, so registrations sit in the same partition as their event
+CREATE TABLE IF NOT EXISTS event_registrations_archive (
+  id INT NOT NULL,
+  event_id INT NOT NULL,
+  user_id INT NOT NULL,
+  registered_at TIMESTAMP NULL,
+  archive_month INT NOT NULL,
+  PRIMARY KEY (id, archive_month),
+  INDEX idx_event_registrations_archive_event (event_id),
+  INDEX idx_event_registrations_archive_user (user_id)
+) PARTITION BY RANGE (archive_month) (
+  PARTITION p_start VALUES LESS THAN (200001),
+  PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE IF NOT EXISTS jobs_archive (
+  id INT NOT NULL,
+  title VARCHAR(255) NOT NULL,
+  company VARCHAR(255) NOT NULL,
+  location VARCHAR(255) NOT NULL,
+  type VARCHAR(50) NOT NULL,
+  description TEXT NOT NULL,
+  requirements JSON NULL,
+  posted_by_id INT NOT NULL,
+  posted_by_name VARCHAR(255) NOT NULL,
+  status VARCHAR(20) NOT NULL,
+  created_at TIMESTAMP NULL,
+  archive_month INT NOT NULL,
+  PRIMARY KEY (id, archive_month),
+  INDEX idx_jobs_archive_poster (posted_by_id)
+) PARTITION BY RANGE (archive_month) (
+  PARTITION p_start VALUES LESS THAN (200001),
+  PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- archive_month is the job's
+CREATE TABLE IF NOT EXISTS applications_archive (
+  id INT NOT NULL,
+  job_id INT NOT NULL,
+  student_id INT NOT NULL,
+  cover_letter TEXT NULL,
+  resume_url VARCHAR(512) NULL,
+  status VARCHAR(20) NOT NULL,
+  created_at TIMESTAMP NULL,
+  archive_month INT NOT NULL,
+  PRIMARY KEY (id, archive_month),
+  INDEX idx_applications_archive_job (job_id),
+  INDEX idx_applications_archive_student (student_id)
+) PARTITION BY RANGE (archive_month) (
+  PARTITION p_start VALUES LESS THAN (200001),
+  PARTITION p_future VALUES LESS THAN MAXVALUE
+);
@@ -0,0 +1,197 @@
+"""Database-backed background task queue.
+
+Request handlers call enqueue() before their own db.commit(), so a task exists
+if and only if the write that caused it was committed. worker.py claims ready
+tasks with SELECT ... FOR UPDATE SKIP LOCKED, runs them, and reschedules
+failures with exponential backoff. Handlers registered with batch=True receive
+every claimed payload of their kind at once, which is how digests are built;
+if such a batch fails, its tasks are run again one at a time, so a single bad
+payload is the only one rescheduled. That replay is only safe because batch
+handlers do nothing but write in the worker's transaction, which a failure
+rolls back; anything leaving the database, like email, is enqueued as its own
+single task (one per recipient) and retried on its own.
+"""
+import json
+import logging
+import random
+from collections import defaultdict
+
+from config import Config
+from database import cursor, db
+import inbox
+import mailer
+
+logger = logging.getLogger("tasks")
+
+_handlers = {}
+
+
+def handler(kind: str, batch: bool = False):
+    """Register the function that runs tasks of `kind`."""
+    def register(fn):
+        _handlers[kind] = (fn, batch)
+        return fn
+    return register
+
+
+def enqueue(kind: str, payload: dict, delay_seconds: int = 0):
+    """Queue a task inside the caller's transaction; the caller commits."""
+    cursor.execute(
+        "INSERT INTO task_queue (kind, payload, max_attempts, run_after) "
+        "VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)",
+        (kind, json.dumps(payload, default=str), Config.TASK_MAX_ATTEMPTS, delay_seconds),
+    )
+
+
+def _backoff(attempts: int) -> int:
+    delay = min(Config.TASK_BACKOFF_SECONDS * 2 ** (attempts - 1), Config.TASK_BACKOFF_MAX_SECONDS)
+    return int(delay * random.uniform(0.8, 1.2))
+
+
+def _claim(worker_id: str, limit: int) -> list:
+    cursor.execute(
+        "SELECT id, kind, payload, attempts, max_attempts FROM task_queue "
+        "WHERE status = 'queued' AND run_after <= NOW() ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED",
+        (limit,),
+    )
+    rows = cursor.fetchall()
+    if rows:
+        ids = [r["id"] for r in rows]
+        cursor.execute(
+            f"UPDATE task_queue SET status = 'running', locked_by = %s, locked_at = NOW(), attempts = attempts + 1 "
+            f"WHERE id IN ({', '.join(['%s'] * len(ids))})",
+            [worker_id] + ids,
+        )
+    db.commit()
+    for r in rows:
+        r["attempts"] += 1
+        r["payload"] = json.loads(r["payload"]) if isinstance(r["payload"], (str, bytes)) else r["payload"]
+    return rows
+
+
+def _finish(rows: list):
+    ids = [r["id"] for r in rows]
+    cursor.execute(
+        f"UPDATE task_queue SET status = 'done', locked_by = NULL, last_error = NULL WHERE id IN ({', '.join(['%s'] * len(ids))})",
+        ids,
+    )
+    db.commit()
+
+
+def _fail(rows: list, error: str):
+    for r in rows:
+        if r["attempts"] >= r["max_attempts"]:
+            cursor.execute(
+                "UPDATE task_queue SET status = 'failed', locked_by = NULL, last_error = %s WHERE id = %s",
+                (error[:2000], r["id"]),
+            )
+            logger.error("Task %s (%s) failed permanently: %s", r["id"], r["kind"], error)
+        else:
+            cursor.execute(
+                "UPDATE task_queue SET status = 'queued', locked_by = NULL, last_error = %s, "
+                "run_after = NOW() + INTERVAL %s SECOND WHERE id = %s",
+                (error[:2000], _backoff(r["attempts"]), r["id"]),
+            )
+    db.commit()
+
+
+def run_once(worker_id: str) -> int:
+    """Claim and run one batch of ready tasks; returns how many were claimed."""
+    rows = _claim(worker_id, Config.TASK_BATCH_SIZE)
+    by_kind = defaultdict(list)
+    for r in rows:
+        by_kind[r["kind"]].append(r)
+    for kind, group in by_kind.items():
+        if kind not in _handlers:
+            for r in group:
+                r["attempts"] = r["max_attempts"]
+            _fail(group, f"No handler for task kind {kind!r}")
+            continue
+        fn, batch = _handlers[kind]
+        if batch and len(group) > 1:
+            if _run(fn, group, batch) is None:
+                _finish(group)
+                continue
+            # One bad payload fails the whole batch: run the tasks one at a time so only it is rescheduled
+        for r in group:
+            error = _run(fn, [r], batch)
+            if error is None:
+                _finish([r])
+            else:
+                _fail([r], f"{type(error).__name__}: {error}")
+    return len(rows)
+
+
+def _run(fn, unit: list, batch: bool):
+    """Run `unit` through its handler; returns the exception it raised, or None."""
+    try:
+        if batch:
+            fn([r["payload"] for r in unit])
+        else:
+            fn(unit[0]["payload"])
+    except Exception as e:
+        db.rollback()
+        logger.exception("Task batch %s failed", [r["id"] for r in unit])
+        return e
+    return None
+
+
+def reclaim_expired():
+    """Requeue tasks whose worker died mid-run."""
+    cursor.execute(
+        "UPDATE task_queue SET status = 'queued', locked_by = NULL "
+        "WHERE status = 'running' AND locked_at < NOW() - INTERVAL %s SECOND",
+        (Config.TASK_LEASE_SECONDS,),
+    )
+    db.commit()
+    return cursor.rowcount
+
+
+def purge_done():
+    cursor.execute(
+        "DELETE FROM task_queue WHERE status = 'done' AND created_at < NOW() - INTERVAL %s HOUR LIMIT 1000",
+        (Config.TASK_RETENTION_HOURS,),
+    )
+    db.commit()
+    return cursor.rowcount
+
+
+# --- handlers ---------------------------------------------------------------------
+
+@handler("admin_alert", batch=True)
+def send_admin_digest(payloads: list):
+    """Queue one digest email per admin covering every alert in the batch."""
+    cursor.execute("SELECT email FROM users WHERE role = 'admin'")
+    admins = [r["email"] for r in cursor.fetchall()]
+    lines = [f"- {p['summary']}" for p in payloads]
+    subject = f"Smart Alumni Connect: {len(payloads)} new update{'s' if len(payloads) != 1 else ''}"
+    body = "Recent activity:\n\n" + "\n".join(lines) + "\n"
+    for email in admins:
+        enqueue("email", {"to": email, "subject": subject, "body": body})
+
+
+@handler("email")
+def send_email(payload: dict):
+    mailer.send(payload["to"], payload["subject"], payload["body"])
+
+
+@handler("notify", batch=True)
+def deliver_notifications(payloads: list):
+    """Fan targeted notifications out to inbox rows, one insert batch for the whole claim.
+
+    Payloads name recipients by `user_ids` and/or a small `role` such as admin;
+    audiences the size of a whole role use broadcasts instead.
+    """
+    rows = []
+    for p in payloads:
+        user_ids = set(p.get("user_ids") or [])
+        if p.get("role"):
+            cursor.execute("SELECT id FROM users WHERE role = %s", (p["role"],))
+            user_ids.update(r["id"] for r in cursor.fetchall())
+        rows.extend(dict(p["notification"], user_id=uid) for uid in sorted(user_ids))
+    inbox.notify_users(rows)
+
+
+@handler("broadcast")
+def deliver_broadcast(payload: dict):
+    inbox.broadcast(**payload)
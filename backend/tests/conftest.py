@@ -0,0 +1,93 @@
+"""Unit tests run without MySQL: modules are imported as-is and their `cursor`/`db` swapped for fakes.
+
+    cd backend && python -m pytest -q
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class FakeCursor:
+    """Records statements; `results` is consumed in order by fetchone/fetchall, and `errors` maps a
+    SQL fragment to the exception executing a matching statement raises."""
+
+    def __init__(self, results=(), errors=None):
+        self.statements = []
+        self.results = list(results)
+        self.errors = errors or {}
+        self.lastrowid = 1
+        self.rowcount = 1
+
+    def execute(self, operation, params=None):
+        self.statements.append((operation, params))
+        for fragment, error in self.errors.items():
+            if fragment in operation:
+                raise error
+
+    def executemany(self, operation, seq_params):
+        self.statements.append((operation, list(seq_params)))
+
+    def fetchone(self):
+        return self.results.pop(0) if self.results else None
+
+    def fetchall(self):
+        return self.results.pop(0) if self.results else []
+
+    def close(self):
+        pass
+
+
+class FakeDb:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def fake_db():
+    return FakeDb()
+
+
+def _install(monkeypatch, fake_db, cursor, modules):
+    for module in modules:
+        monkeypatch.setattr(module, "cursor", cursor)
+        if hasattr(module, "db"):
+            monkeypatch.setattr(module, "db", fake_db)
+
+
+@pytest.fixture
+def cursor_with(monkeypatch, fake_db):
+    """`cursor_with(results, *modules)`: a FakeCursor over `results`, installed with `fake_db`
+    as the `cursor`/`db` of every module given."""
+    def make(results, *modules, errors=None):
+        cursor = FakeCursor(results=results, errors=errors)
+        _install(monkeypatch, fake_db, cursor, modules)
+        return cursor
+    return make
+
+
+@pytest.fixture
+def client_with(monkeypatch, fake_db):
+    """`client_with(router_module, cursor, user, *modules)`: a TestClient serving one router as `user`,
+    with `cursor` and `fake_db` installed in the router module and every other module given."""
+    import deps
+
+    def make(router_module, cursor, user, *modules):
+        _install(monkeypatch, fake_db, cursor, (router_module, *modules))
+        app = FastAPI()
+        app.include_router(router_module.router)
+        app.dependency_overrides[deps.get_current_user] = lambda: user
+        app.dependency_overrides[deps.get_current_user_id] = lambda: user["id"]
+        return TestClient(app)
+    return make
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from conftest import FakeCursor
+from routers import applications
+
+ALUMNUS = {"id": 7, "name": "Al", "role": "alumni"}
+
+
+def _app(app_id):
+    return {"id": app_id, "job_id": 3, "student_id": 1, "student_name": "Ann", "status": "accepted",
+            "created_at": datetime(2024, 5, 1, 9, 0, 0)}
+
+
+def test_student_history_includes_archived_applications(client_with):
+    cursor = FakeCursor(results=[[_app(9), _app(2)]])
+    body = client_with(applications, cursor, {"id": 1, "name": "Ann", "role": "student"}).get("/applications").json()
+    assert [a["id"] for a in body] == ["9", "2"]
+    sql, params = cursor.statements[0]
+    assert "FROM applications a" in sql and "FROM applications_archive a" in sql and "UNION ALL" in sql
+    assert sql.endswith("ORDER BY applied_at DESC") and params == (1, 1)
+
+
+def test_archived_job_lists_its_applications(client_with):
+    cursor = FakeCursor(results=[None, {"posted_by_id": 7}, [_app(2)]])
+    body = client_with(applications, cursor, ALUMNUS).get("/applications?job_id=3&fields=status").json()
+    assert body == [{"id": "2", "status": "accepted"}]
+    assert "FROM jobs_archive" in cursor.statements[1][0]
+    assert cursor.statements[2][1] == (3, 3)
+
+
+def test_someone_elses_archived_job_is_forbidden(client_with):
+    cursor = FakeCursor(results=[None, {"posted_by_id": 8}])
+    assert client_with(applications, cursor, ALUMNUS).get("/applications?job_id=3").status_code == 403
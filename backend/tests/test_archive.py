@@ -0,0 +1,68 @@
+import pytest
+
+import archive
+from config import Config
+
+
+@pytest.mark.parametrize("month, following", [(202401, 202402), (202411, 202412), (202412, 202501)])
+def test_next_month(month, following):
+    assert archive._next_month(month) == following
+
+
+def test_ensure_partitions_splits_p_future_up_to_the_newest_month(cursor_with):
+    cursor = cursor_with([[{"bound": "202311"}, {"bound": "202312"}, {"bound": "MAXVALUE"}]], archive)
+    assert archive.ensure_partitions("messages_archive", {202311, 202401}) == 2
+    ddl = cursor.statements[1][0]
+    assert "REORGANIZE PARTITION p_future INTO (PARTITION p202312 VALUES LESS THAN (202401), " \
+           "PARTITION p202401 VALUES LESS THAN (202402), PARTITION p_future VALUES LESS THAN MAXVALUE)" in ddl
+
+
+def test_ensure_partitions_is_a_no_op_when_covered(cursor_with):
+    cursor = cursor_with([[{"bound": "202402"}, {"bound": "MAXVALUE"}]], archive)
+    assert archive.ensure_partitions("jobs_archive", {202312, 202401}) == 0
+    assert len(cursor.statements) == 1
+
+
+def test_messages_keep_the_archived_watermark_per_conversation(cursor_with, fake_db):
+    rows = [{"id": 1, "conversation_id": 5, "month": 202401}, {"id": 4, "conversation_id": 5, "month": 202401},
+            {"id": 2, "conversation_id": 6, "month": 202401}]
+    cursor = cursor_with([rows, [{"bound": "202402"}, {"bound": "MAXVALUE"}]], archive)
+    assert archive._archive_messages() == 3
+    copy, delete, update = cursor.statements[2:]
+    assert copy[0].startswith("INSERT INTO messages_archive") and copy[1] == [1, 4, 2]
+    assert delete[0].startswith("DELETE FROM messages") and delete[1] == [1, 4, 2]
+    assert "GREATEST" in update[0] and update[1] == [(4, 5), (2, 6)]
+    assert fake_db.commits == 1
+
+
+def test_parents_move_only_rows_still_due_after_locking(cursor_with):
+    cursor = cursor_with([
+        [{"id": 10, "month": 202301}, {"id": 11, "month": 202301}],
+        [{"bound": "202302"}, {"bound": "MAXVALUE"}],
+        [{"bound": "202302"}, {"bound": "MAXVALUE"}],
+        [{"id": 11}],
+    ], archive)
+    assert archive._archive_jobs() == 1
+    moved = [(sql.split(" (")[0], params) for sql, params in cursor.statements[4:]]
+    assert moved == [
+        ("INSERT INTO applications_archive", [11]),
+        ("INSERT INTO jobs_archive", [11]),
+        ("DELETE FROM applications WHERE job_id IN", [11]),
+        ("DELETE FROM jobs WHERE id IN", [11]),
+    ]
+
+
+def test_run_skips_when_another_runner_holds_the_lock(cursor_with):
+    cursor = cursor_with([{"got": 0}], archive)
+    assert archive.run() == {}
+    assert len(cursor.statements) == 1
+
+
+def test_run_stops_each_kind_at_a_short_batch(cursor_with, monkeypatch):
+    monkeypatch.setattr(Config, "ARCHIVE_BATCH_ROWS", 2)
+    monkeypatch.setattr(Config, "ARCHIVE_PAUSE_SECONDS", 0)
+    counts = {"messages": [2, 2, 1], "events": [0], "jobs": [1]}
+    for kind in counts:
+        monkeypatch.setattr(archive, f"_archive_{kind}", lambda kind=kind: counts[kind].pop(0))
+    cursor_with([{"got": 1}], archive)
+    assert archive.run() == {"messages": 5, "events": 0, "jobs": 1}
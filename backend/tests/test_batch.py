@@ -0,0 +1,44 @@
+import pytest
+from fastapi import HTTPException
+
+import deps
+from config import Config
+from conftest import FakeCursor
+from routers import jobs, users
+
+STUDENT = {"id": 1, "name": "Ann", "role": "student"}
+
+
+def test_batch_ids_dedupes_in_first_seen_order():
+    assert deps.batch_ids("3, 1,3,,2") == [3, 1, 2]
+
+
+@pytest.mark.parametrize("raw", ["", " , ", "1,x", "1.5"])
+def test_batch_ids_rejects_bad_input(raw):
+    with pytest.raises(HTTPException) as e:
+        deps.batch_ids(raw)
+    assert e.value.status_code == 400
+
+
+def test_batch_ids_caps_distinct_ids(monkeypatch):
+    monkeypatch.setattr(Config, "BATCH_MAX_IDS", 3)
+    assert deps.batch_ids("1,1,2,2,3") == [1, 2, 3]
+    with pytest.raises(HTTPException):
+        deps.batch_ids("1,2,3,4")
+
+
+def test_batch_jobs_keeps_request_order_and_falls_back_to_the_archive(client_with):
+    cursor = FakeCursor(results=[[{"id": 7, "title": "Hot"}], [{"id": 2, "title": "Cold"}]])
+    body = client_with(jobs, cursor, STUDENT).get("/jobs/batch?ids=2,9,7&fields=title").json()
+    assert body == {"items": [{"id": "2", "title": "Cold"}, {"id": "7", "title": "Hot"}], "missing": ["9"]}
+    sql, params = cursor.statements[1]
+    assert "FROM jobs_archive j" in sql and params == [2, 9]
+
+
+def test_batch_users_hides_pending_alumni_from_non_admins(client_with):
+    rows = [{"id": 2, "name": "Pending", "visibility_role": "alumni", "is_approved": 0},
+            {"id": 3, "name": "Student", "visibility_role": "student", "is_approved": 0}]
+    body = client_with(users, FakeCursor(results=[rows]), STUDENT).get("/users/batch?ids=2,3&fields=name").json()
+    assert body == {"items": [{"id": "3", "name": "Student"}], "missing": ["2"]}
+    body = client_with(users, FakeCursor(results=[rows]), dict(STUDENT, role="admin")).get("/users/batch?ids=2,3&fields=name").json()
+    assert body["missing"] == []
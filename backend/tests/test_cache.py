@@ -0,0 +1,76 @@
+import pytest
+
+import cache
+from conftest import FakeCursor
+
+
+@pytest.fixture
+def synced(monkeypatch, fake_db):
+    monkeypatch.setattr(cache, "_synced", True)
+    monkeypatch.setattr(cache.database, "DB_REPLICA_LAG_SECONDS", 0)
+    monkeypatch.setattr(cache, "_caches", {})
+    cursor = FakeCursor()
+    monkeypatch.setattr(cache, "cursor", cursor)
+    monkeypatch.setattr(cache, "db", fake_db)
+    return cursor
+
+
+def test_lru_evicts_the_least_recently_used(synced):
+    c = cache.Cache("t", ttl=60, maxsize=2)
+    c.get_or_load("a", lambda: 1)
+    c.get_or_load("b", lambda: 2)
+    c.get("a")
+    c.get_or_load("c", lambda: 3)
+    assert (c.get("a"), c.get("b"), c.get("c")) == (1, None, 3)
+
+
+def test_expired_entries_are_misses(synced):
+    c = cache.Cache("t", ttl=-1)
+    c.get_or_load("a", lambda: 1)
+    assert c.get("a") is None
+
+
+def test_nothing_is_served_until_synced(synced, monkeypatch):
+    monkeypatch.setattr(cache, "_synced", False)
+    c = cache.Cache("t", ttl=60)
+    assert c.get_or_load("a", lambda: 1) == 1
+    assert c.get("a") is None
+
+
+def test_fill_racing_an_invalidation_is_not_stored(synced):
+    c = cache.Cache("t", ttl=60)
+
+    def load():
+        # Another writer's invalidation lands while this value is being read
+        cache.invalidate("t", "a")
+        return "stale"
+
+    assert c.get_or_load("a", load) == "stale"
+    assert c.get("a") is None
+    assert c.get_or_load("a", lambda: "fresh") == "fresh" and c.get("a") == "fresh"
+    assert synced.statements[0][1] == ("t", "a")
+
+
+def test_invalidating_every_cache(synced):
+    first, second = cache.Cache("one", ttl=60), cache.Cache("two", ttl=60)
+    first.get_or_load(1, lambda: "x")
+    second.get_or_load(2, lambda: "y")
+    cache._apply("*", None)
+    assert first.get(1) is None and second.get(2) is None
+
+
+def test_tailer_applies_late_commits_in_gaps(synced):
+    c = cache.Cache("t", ttl=60)
+    tailer = cache._Tailer()
+    synced.results = [{"id": 10}]
+    tailer._poll()
+    assert tailer.applied == 10
+    # 12 commits before 11: 11 is remembered as a gap and applied when it shows up
+    synced.results = [[{"id": 12, "cache": "t", "cache_key": "b"}]]
+    tailer._poll()
+    assert tailer.applied == 12 and set(tailer.gaps) == {11}
+    c.get_or_load("a", lambda: 1)
+    synced.results = [[{"id": 11, "cache": "t", "cache_key": "a"}, {"id": 12, "cache": "t", "cache_key": "b"}]]
+    tailer._poll()
+    assert synced.statements[-1][1] == (10,)
+    assert tailer.gaps == {} and c.get("a") is None
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+import careers
+from conftest import FakeCursor
+from routers.careers import _duration
+
+
+def _row(user_id, role, industry, started_at):
+    return {"user_id": user_id, "role": role, "industry": industry, "started_at": started_at}
+
+
+def test_transitions_fold_consecutive_changes_per_kind():
+    rows = [
+        _row(1, "Analyst", "Finance", datetime(2018, 1, 1)),
+        # Organization-only change: same role and industry, no move and the runs keep their start
+        _row(1, " analyst ", "finance", datetime(2019, 1, 1)),
+        _row(1, "Data Scientist", "Finance", datetime(2020, 1, 1)),
+        _row(1, "Data Scientist", "Tech", datetime(2021, 1, 1)),
+        _row(2, "Analyst", None, datetime(2020, 1, 1)),
+        _row(2, "Data  Scientist", "Tech", datetime(2020, 7, 1)),
+    ]
+    moves = careers._transitions(rows)
+    assert dict(moves) == {
+        ("role", "analyst", "data scientist"): [730, 182],
+        ("industry", "finance", "tech"): [1096],
+    }
+
+
+def test_transitions_never_cross_users():
+    rows = [_row(1, "Analyst", None, datetime(2020, 1, 1)), _row(2, "Founder", None, datetime(2019, 1, 1))]
+    assert careers._transitions(rows) == {}
+
+
+def test_record_change_only_writes_real_changes(monkeypatch):
+    cursor = FakeCursor()
+    monkeypatch.setattr(careers, "cursor", cursor)
+    before = {"current_organization": "Acme", "current_role": "Analyst", "industry": None}
+    careers.record_change(1, before, {"current_role": " analyst", "location": "Pune"})
+    assert cursor.statements == []
+    careers.record_change(1, before, {"current_organization": "Globex"})
+    assert cursor.statements[0][1] == (1, "Globex", "Analyst", None)
+
+
+def test_next_moves_reports_share_and_tenure(monkeypatch):
+    cursor = FakeCursor(results=[[
+        {"to_key": "manager", "move_count": 3, "median_tenure_days": 913, "total": 4},
+        {"to_key": "founder", "move_count": 1, "median_tenure_days": 365, "total": 4},
+    ]])
+    monkeypatch.setattr(careers, "cursor", cursor)
+    moves = careers.next_moves("role", " Analyst ", 5)
+    assert cursor.statements[0][1] == ("role", "analyst", 5)
+    assert moves[0] == {"to": "manager", "count": 3, "share": 0.75, "medianTenureMonths": 30.0}
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    (datetime(2020, 1, 15), datetime(2020, 1, 20), "0 mo"),
+    (datetime(2020, 1, 1), datetime(2020, 8, 1), "7 mo"),
+    (datetime(2019, 3, 1), datetime(2020, 3, 1), "1 yr"),
+    (datetime(2017, 1, 1), datetime(2019, 6, 1), "2 yrs 5 mo"),
+])
+def test_duration(start, end, expected):
+    assert _duration(start, end) == expected
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import deps
+from config import Config
+from conftest import FakeCursor
+from routers import dashboard
+
+
+@pytest.fixture(autouse=True)
+def small_sections(monkeypatch):
+    monkeypatch.setattr(Config, "DASHBOARD_SECTION_LIMIT", 2)
+    monkeypatch.setattr(Config, "DASHBOARD_TEXT_CHARS", 5)
+
+
+def test_section_caps_items_and_clips_long_text():
+    rows = [{"description": "short"}, {"description": "much too long"}, {"description": "extra"}]
+    section = dashboard._section(rows, dict)
+    assert section == {"items": [{"description": "short"}, {"description": "much…"}], "hasMore": True}
+    assert dashboard._section(rows[:2], dict)["hasMore"] is False
+
+
+@pytest.mark.parametrize("role, names", [
+    ("student", {"notifications", "conversations", "events", "jobs", "applications", "mentorship"}),
+    ("alumni", {"notifications", "conversations", "events", "postedJobs", "mentorship", "referrals"}),
+    ("admin", {"notifications", "conversations", "events", "totals", "pendingAlumni", "jobs"}),
+])
+def test_sections_per_role(role, names):
+    assert set(dashboard._sections({"id": 1, "name": "A", "role": role})) == names
+
+
+def test_my_applications_reads_hot_and_archived(monkeypatch):
+    row = {"id": 4, "job_id": 2, "student_id": 1, "status": "pending", "created_at": datetime(2026, 1, 1),
+           "job_title": "Dev", "company": "Acme"}
+    cursor = FakeCursor(results=[[row]])
+    monkeypatch.setattr(dashboard, "cursor", cursor)
+    section = dashboard._my_applications({"id": 1, "name": "Ann", "role": "student"})()
+    assert section["items"][0]["jobTitle"] == "Dev" and section["hasMore"] is False
+    sql, params = cursor.statements[0]
+    assert "FROM applications_archive a JOIN jobs_archive j" in sql and params == (1, 3, 1, 3, 3)
+
+
+def test_failed_section_is_null_and_named(monkeypatch):
+    def fan_out(calls):
+        results = {}
+        for name, fn in calls.items():
+            try:
+                results[name] = fn()
+            except Exception as e:
+                results[name] = e
+        return results
+
+    def broken():
+        raise RuntimeError("down")
+
+    monkeypatch.setattr(dashboard.database, "fan_out", fan_out)
+    monkeypatch.setattr(dashboard, "_sections", lambda user: {"ok": lambda: {"items": []}, "bad": broken})
+    app = FastAPI()
+    app.include_router(dashboard.router)
+    user = {"id": 1, "name": "Ann", "email": "a@x.io", "role": "student"}
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    body = TestClient(app).get("/dashboard").json()
+    assert body["ok"] == {"items": []} and body["bad"] is None and body["errors"] == ["bad"]
+    assert body["role"] == "student" and body["me"]["name"] == "Ann"
@@ -0,0 +1,118 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import database
+from conftest import FakeCursor
+
+
+class FakeConnection:
+    def __init__(self, name):
+        self.name = name
+        self.in_transaction = False
+        self.commits = 0
+
+    def cursor(self, dictionary=False):
+        return FakeCursor()
+
+    def commit(self):
+        self.commits += 1
+
+
+class FakePool:
+    def __init__(self, name):
+        self.name = name
+        self.conn = FakeConnection(name)
+        self.out = 0
+        self.acquired = 0
+
+    def acquire(self, timeout=None):
+        self.out += 1
+        self.acquired += 1
+        return self.conn
+
+    def release(self, conn):
+        self.out -= 1
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    primary, replica = FakePool("primary"), FakePool("replica")
+    monkeypatch.setattr(database, "primary_pool", primary)
+    monkeypatch.setattr(database, "replica_pools", [replica])
+    return primary, replica
+
+
+@pytest.mark.parametrize("sql, write", [
+    ("SELECT * FROM users", False),
+    ("  insert into jobs VALUES (1)", True),
+    ("REPLACE INTO t VALUES (1)", True),
+    ("SELECT id FROM jobs WHERE id = 1 FOR UPDATE", True),
+    ("SELECT updated_at FROM t", False),
+])
+def test_is_write(sql, write):
+    assert database.is_write(sql) is write
+
+
+def test_pinned_only_while_the_token_is_fresh(monkeypatch):
+    monkeypatch.setattr(database, "DB_REPLICA_LAG_SECONDS", 2)
+    now = int(time.time() * 1000)
+    assert database._pinned([(b"x-consistency-token", str(now - 500).encode())])
+    assert not database._pinned([(b"x-consistency-token", str(now - 5000).encode())])
+    assert not database._pinned([(b"x-consistency-token", str(now + 500).encode())])
+    assert not database._pinned([(b"x-consistency-token", b"99999999999999999")])
+    assert not database._pinned([(b"x-consistency-token", b"junk")])
+    assert not database._pinned([])
+
+
+def test_binding_reads_from_the_replica_until_it_writes(pools):
+    primary, replica = pools
+    binding = database.Binding(read_only=True)
+    binding.cursor("SELECT 1")
+    assert binding.current is not None and replica.out == 1 and primary.out == 0
+    binding.cursor("UPDATE t SET a = 1")
+    # Once a request writes, its later reads follow it to the primary
+    binding.cursor("SELECT 1")
+    assert binding.wrote and binding._target() == "primary" and primary.out == 1
+    binding.release()
+    assert (primary.out, replica.out) == (0, 0)
+
+
+def test_without_replicas_everything_uses_the_primary(pools, monkeypatch):
+    monkeypatch.setattr(database, "replica_pools", [])
+    assert database.Binding(read_only=True)._target() == "primary"
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/read")
+    def read():
+        database.cursor.execute("SELECT 1")
+        return {"ok": True}
+
+    @app.post("/write")
+    def write():
+        database.cursor.execute("INSERT INTO t VALUES (1)")
+        database.db.commit()
+        return {"ok": True}
+
+    app.add_middleware(database.ConnectionMiddleware)
+    return TestClient(app)
+
+
+def test_middleware_routes_requests_and_issues_consistency_tokens(pools):
+    primary, replica = pools
+    client = _app()
+    response = client.get("/read")
+    assert database.CONSISTENCY_HEADER not in response.headers
+    assert (primary.acquired, replica.acquired) == (0, 1)
+    response = client.post("/write")
+    token = response.headers[database.CONSISTENCY_HEADER]
+    assert primary.conn.commits == 1 and (primary.acquired, replica.acquired) == (1, 1)
+    # A read carrying the fresh token is pinned to the primary
+    client.get("/read", headers={database.CONSISTENCY_HEADER: token})
+    assert (primary.acquired, replica.acquired) == (2, 1)
+    assert (primary.out, replica.out) == (0, 0)
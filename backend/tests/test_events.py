@@ -0,0 +1,24 @@
+import pytest
+
+import tasks
+import writes
+from conftest import FakeCursor
+from routers import events
+
+EVENT = {"title": "Reunion", "event_time": "18:00", "location": "Hall", "description": "Annual",
+         "type": "reunion", "organizer": "Alumni cell"}
+ADMIN = {"id": 1, "name": "Ann", "role": "admin"}
+
+
+def test_create_event_echoes_the_date_as_stored(client_with):
+    cursor = FakeCursor()
+    cursor.lastrowid = 4
+    body = client_with(events, cursor, ADMIN, writes, tasks).post("/events", json=dict(EVENT, event_date="2026-07-01T00:00:00")).json()
+    assert body["id"] == "4" and body["date"] == "2026-07-01"
+
+
+@pytest.mark.parametrize("value", ["next friday", "2026-02-30"])
+def test_create_event_rejects_bad_dates(client_with, value):
+    cursor = FakeCursor()
+    assert client_with(events, cursor, ADMIN, writes, tasks).post("/events", json=dict(EVENT, event_date=value)).status_code == 422
+    assert cursor.statements == []
@@ -0,0 +1,51 @@
+import pytest
+from fastapi import HTTPException
+
+from conftest import FakeCursor
+from fieldsets import FieldSet
+from routers import applications, donations, events, jobs, mentorship, messages, users
+
+FIELDS = FieldSet({
+    "id": ("t.id",),
+    "name": ("t.name",),
+    "owner": ("t.owner_id", "u.name AS owner_name"),
+    "ownerId": ("t.owner_id",),
+})
+
+
+def test_parse_keeps_declaration_order_and_always_includes_id():
+    assert FIELDS.parse("ownerId, name,,") == ("id", "name", "ownerId")
+    assert FIELDS.parse(None) is None
+    assert FIELDS.parse("  ") is None
+
+
+def test_parse_rejects_unknown_keys():
+    with pytest.raises(HTTPException) as e:
+        FIELDS.parse("name,secret")
+    assert e.value.status_code == 400 and "secret" in e.value.detail
+
+
+def test_sql_selects_each_expression_once():
+    assert FIELDS.sql(("id", "owner", "ownerId")) == "t.id, t.owner_id, u.name AS owner_name"
+    assert FIELDS.sql(None) == "t.id, t.name, t.owner_id, u.name AS owner_name"
+
+
+def test_prune():
+    item = {"id": "1", "name": "n", "ownerId": "2"}
+    assert FIELDS.prune(item, ("id", "ownerId")) == {"id": "1", "ownerId": "2"}
+    assert FIELDS.prune(item, None) is item
+
+
+@pytest.mark.parametrize("fieldset", [
+    users.USER_FIELDS, jobs.JOB_FIELDS, events.EVENT_FIELDS, applications.APPLICATION_FIELDS,
+    donations.DONATION_FIELDS, mentorship.REQUEST_FIELDS, messages.MESSAGE_FIELDS,
+])
+def test_every_router_fieldset_has_an_id(fieldset):
+    assert "id" in fieldset.columns and fieldset.parse("id") == ("id",)
+
+
+def test_list_jobs_selects_only_requested_columns(client_with):
+    cursor = FakeCursor(results=[[{"id": 4, "title": "Dev"}]])
+    client = client_with(jobs, cursor, {"id": 1, "name": "Ann", "role": "student"})
+    assert client.get("/jobs?fields=title").json() == [{"id": "4", "title": "Dev"}]
+    assert cursor.statements[0][0].startswith("SELECT j.id, j.title FROM jobs j")
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import health
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(health, "_state", {"warm": True})
+    app = FastAPI()
+    app.include_router(health.router)
+    return TestClient(app)
+
+
+def test_liveness_needs_nothing(client, monkeypatch):
+    monkeypatch.setattr(health, "_state", {"warm": False})
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/readyz").status_code == 503
+
+
+@pytest.mark.parametrize("pools, code, status", [
+    ({"primary": "ok", "replica-1": "ok"}, 200, "ready"),
+    ({"primary": "ok", "replica-1": "timeout"}, 200, "degraded"),
+    ({"primary": "timeout", "replica-1": "ok"}, 503, "unavailable"),
+])
+def test_readiness_follows_the_primary(client, monkeypatch, pools, code, status):
+    monkeypatch.setattr(health.database, "readiness", lambda: pools)
+    monkeypatch.setattr(health.database.primary_pool, "name", "primary")
+    response = client.get("/readyz")
+    assert response.status_code == code and response.json() == {"status": status, "pools": pools}
+
+
+def test_warm_up_retries_until_the_database_answers(monkeypatch):
+    attempts, sleeps = [], []
+
+    def warm_up():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("refused")
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(health, "_state", {"warm": False})
+    monkeypatch.setattr(health.database, "warm_up", warm_up)
+    monkeypatch.setattr(health.asyncio, "sleep", sleep)
+    asyncio.run(health._warm_up())
+    assert health._state["warm"] and len(attempts) == 3
+    assert sleeps == [health.WARM_UP_RETRY_SECONDS, health.WARM_UP_RETRY_SECONDS * 2]
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+
+import inbox
+from conftest import FakeCursor
+
+
+def _use(monkeypatch, cursor):
+    monkeypatch.setattr(inbox, "cursor", cursor)
+
+
+def test_unread_count_adds_direct_and_unseen_broadcasts(monkeypatch):
+    _use(monkeypatch, FakeCursor(results=[
+        {"unread_direct": 2, "seen_all_seq": 5, "seen_role_seq": 9, "all_seq": 8, "role_seq": 9},
+    ]))
+    assert inbox.unread_count(1, "student") == 5
+
+
+def test_unread_count_ignores_cursors_past_the_stream_head(monkeypatch):
+    _use(monkeypatch, FakeCursor(results=[
+        {"unread_direct": 0, "seen_all_seq": 10, "seen_role_seq": 3, "all_seq": 8, "role_seq": 1},
+    ]))
+    assert inbox.unread_count(1, "student") == 0
+
+
+def test_list_inbox_merges_newest_first_with_broadcast_read_flags(monkeypatch):
+    _use(monkeypatch, FakeCursor(results=[
+        {"unread_direct": 1, "seen_all_seq": 1, "seen_role_seq": 0, "all_seq": 2, "role_seq": 1},
+        [{"id": 7, "type": "job", "title": "d", "message": "", "action_url": None, "priority": "high",
+          "is_read": 0, "created_at": datetime(2026, 1, 3)}],
+        [{"id": 3, "seq": 2, "type": "event", "title": "a2", "message": "", "created_at": datetime(2026, 1, 4)},
+         {"id": 1, "seq": 1, "type": "event", "title": "a1", "message": "", "created_at": datetime(2026, 1, 1)}],
+        [{"id": 2, "seq": 1, "type": "system", "title": "r1", "message": "", "created_at": datetime(2026, 1, 2)}],
+    ]))
+    page = inbox.list_inbox(1, "student")
+    assert page["nextCursor"] is None
+    assert [(i["id"], i["read"]) for i in page["items"]] == [("b3", False), ("n7", False), ("b2", False), ("b1", True)]
+
+
+def _direct(row_id, second):
+    return {"id": row_id, "type": "job", "title": "", "message": "", "is_read": 0, "created_at": datetime(2026, 1, 1, 0, 0, second)}
+
+
+def test_list_inbox_pages_rows_sharing_a_second_by_id(monkeypatch):
+    state = {"unread_direct": 0, "seen_all_seq": 0, "seen_role_seq": 0, "all_seq": 0, "role_seq": 0}
+    cursor = FakeCursor(results=[state, [_direct(9, 5), _direct(8, 5)], [], []])
+    _use(monkeypatch, cursor)
+    page = inbox.list_inbox(1, "student", limit=2)
+    assert [i["id"] for i in page["items"]] == ["n9", "n8"]
+    assert page["nextCursor"] == "20260101000005_8.."
+
+    cursor = FakeCursor(results=[state, [_direct(7, 5)], [], []])
+    _use(monkeypatch, cursor)
+    page = inbox.list_inbox(1, "student", limit=2, before="20260101000005_8..")
+    assert [i["id"] for i in page["items"]] == ["n7"] and page["nextCursor"] is None
+    sql, params = cursor.statements[1]
+    assert "AND (created_at, id) < (%s, %s) ORDER BY created_at DESC, id DESC" in sql
+    assert params == (1, datetime(2026, 1, 1, 0, 0, 5), 8, 2)
+    assert "(created_at, id)" not in cursor.statements[2][0]
+
+
+def test_list_inbox_keeps_a_stream_position_it_did_not_reach(monkeypatch):
+    state = {"unread_direct": 0, "seen_all_seq": 0, "seen_role_seq": 0, "all_seq": 0, "role_seq": 0}
+    _use(monkeypatch, FakeCursor(results=[
+        state, [_direct(9, 5)],
+        [{"id": 4, "seq": 2, "type": "event", "title": "", "message": "", "created_at": datetime(2026, 1, 1, 0, 0, 6)}],
+        [],
+    ]))
+    page = inbox.list_inbox(1, "student", limit=1, before="20260101000009_12.20260101000007_5.")
+    assert [i["id"] for i in page["items"]] == ["b4"]
+    assert page["nextCursor"] == "20260101000009_12.20260101000006_4."
+
+
+@pytest.mark.parametrize("value", ["", "1.2", "x_1..", "20260101000005_..", "20260101000005_8.."[:-1]])
+def test_bad_cursors_are_rejected(value):
+    with pytest.raises(ValueError):
+        inbox._parse_cursor(value)
@@ -0,0 +1,109 @@
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import insights
+
+
+def _user(user_id, **dims):
+    row = {d: None for d in insights.DIMENSIONS}
+    row.update(id=user_id, role="alumni", is_approved=1, updated_at=datetime(2026, 1, 1))
+    row.update(dims)
+    return row
+
+
+def _brute(rows, dimensions, include_unset=False):
+    counts = Counter(tuple(insights._clean(r[d]) for d in dimensions) for r in rows)
+    return {k: n for k, n in counts.items() if include_unset or all(k)}
+
+
+@pytest.fixture
+def rows():
+    rng = random.Random(7)
+    return [
+        _user(i, department=rng.choice(["CS", "EE", None]), batch=rng.choice(["2019", "2020", "2021"]),
+              location=rng.choice(["Pune", "Delhi", "", None]))
+        for i in range(1, 400)
+    ]
+
+
+@pytest.mark.parametrize("include_unset", [False, True])
+def test_group_by_matches_brute_force(rows, include_unset):
+    snapshot = insights.Snapshot.from_rows(rows, None)
+    dims = ["department", "location"]
+    groups = snapshot.group_by(dims, snapshot.mask({}), limit=100, include_unset=include_unset)
+    assert dict(groups) == _brute(rows, dims, include_unset)
+    counts = [n for _, n in groups]
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_group_by_limit_keeps_most_common(rows):
+    snapshot = insights.Snapshot.from_rows(rows, None)
+    expected = sorted(_brute(rows, ["batch"]).values(), reverse=True)[:2]
+    assert [n for _, n in snapshot.group_by(["batch"], snapshot.mask({}), limit=2)] == expected
+
+
+def test_group_by_high_cardinality_is_sized_by_rows():
+    # 3000^3 cells would be hundreds of GiB if allocated; only observed combinations may be
+    rows = [_user(i, current_organization=f"org{i}", current_role=f"role{i}", location=f"city{i}") for i in range(1, 3001)]
+    snapshot = insights.Snapshot.from_rows(rows, None)
+    groups = snapshot.group_by(["current_organization", "current_role", "location"], snapshot.mask({}), limit=5)
+    assert len(groups) == 5 and all(n == 1 for _, n in groups)
+
+
+def test_mask_filters_by_value(rows):
+    snapshot = insights.Snapshot.from_rows(rows, None)
+    mask = snapshot.mask({"department": ["CS"], "batch": ["2020", "nope"]})
+    expected = {r["id"] for r in rows if r["department"] == "CS" and r["batch"] == "2020"}
+    assert set(snapshot.ids[mask].tolist()) == expected
+
+
+def test_apply_upserts_without_touching_the_original(rows):
+    snapshot = insights.Snapshot.from_rows(rows, None)
+    patched = snapshot.apply([_user(5, department="Math"), _user(1000, department="CS")], None)
+    assert len(snapshot) == len(rows) and len(patched) == len(rows) + 1
+    assert list(patched.ids) == sorted(patched.ids)
+    assert dict(patched.group_by(["department"], patched.mask({"department": ["Math"]}), 10)) == {("Math",): 1}
+    assert "Math" not in snapshot.index["department"]
+
+
+def test_without_drops_ids_and_ignores_unknown(rows):
+    snapshot = insights.Snapshot.from_rows(rows, None)
+    trimmed = snapshot.without([3, 4, 99999])
+    assert len(trimmed) == len(rows) - 2
+    assert not np.isin([3, 4], trimmed.ids).any()
+    assert snapshot.without([99999]) is snapshot
+
+
+def test_refresh_drops_newly_pending_users_without_rebuilding(monkeypatch, cursor_with, rows):
+    snapshot = insights.Snapshot.from_rows(rows, datetime(2026, 1, 1))
+    monkeypatch.setattr(insights, "build", lambda: pytest.fail("refresh rebuilt the snapshot"))
+    cursor_with([
+        {"watermark": datetime(2026, 1, 2)},
+        [_user(7, is_approved=0), _user(8, department="Bio")],
+        {"n": len(rows) - 1},
+    ], insights)
+    refreshed = insights.refresh(snapshot)
+    assert 7 not in refreshed.ids and len(refreshed) == len(rows) - 1
+    assert refreshed.watermark == datetime(2026, 1, 2)
+    assert dict(refreshed.group_by(["department"], refreshed.mask({"department": ["Bio"]}), 10)) == {("Bio",): 1}
+
+
+def test_cold_snapshot_is_built_once_for_concurrent_callers(monkeypatch, rows):
+    monkeypatch.setattr(insights, "_snapshot", {"current": None, "refreshing": False})
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)
+        return insights.Snapshot.from_rows(rows, datetime(2026, 1, 1))
+
+    monkeypatch.setattr(insights, "build", build)
+    with ThreadPoolExecutor(4) as pool:
+        snapshots = list(pool.map(lambda _: insights.current_snapshot(), range(4)))
+    assert len(builds) == 1 and all(s is snapshots[0] for s in snapshots)
@@ -0,0 +1,93 @@
+import pytest
+
+import matching
+import tasks
+from conftest import FakeCursor
+from routers import mentorship
+
+MENTOR = {"id": 7, "name": "Al", "role": "alumni"}
+
+
+def _mentor(user_id, domain, capacity, load, department):
+    return {"domain": domain, "user_id": user_id, "capacity": capacity, "load_count": load, "department": department}
+
+
+def _fallback(user_id, capacity, load, department):
+    return {"id": user_id, "capacity": capacity, "open_requests": load, "accepted_requests": 0, "department": department}
+
+
+def test_normalize_domain():
+    assert matching.normalize_domain("  Data   SCIENCE ") == "data science"
+
+
+def test_assign_pending_places_scarce_domains_first_on_the_least_loaded(cursor_with):
+    cursor = cursor_with([
+        [{"id": 1, "student_id": 1, "domain": "Software", "department": "CS"},
+         {"id": 2, "student_id": 2, "domain": "software ", "department": "EE"},
+         {"id": 3, "student_id": 3, "domain": "Poetry", "department": "CS"}],
+        [_mentor(10, "software", 2, 1, "EE"), _mentor(11, "software", 2, 0, "CS")],
+        [_fallback(11, 2, 0, "CS"), _fallback(12, 1, 0, "ME")],
+        [],
+    ], matching, tasks)
+    assert matching.assign_pending() == 3
+    # Poetry has no mentor and goes first to the least loaded overall (department breaking the tie);
+    # that fills 11 up level with 10, where department decides again, and then 11 is full
+    assignments = next(params for sql, params in cursor.statements if sql.startswith("UPDATE mentorship_requests"))
+    assert assignments == [(11, 3), (11, 1), (10, 2)]
+    counters = next(params for sql, params in cursor.statements if sql.startswith("UPDATE mentor_profiles"))
+    assert counters == [(2, 11), (1, 10)]
+
+
+def test_assign_pending_skips_mentors_the_student_already_has(cursor_with):
+    cursor_with([
+        [{"id": 1, "student_id": 1, "domain": "software", "department": "CS"}],
+        [_mentor(10, "software", 3, 0, "CS")],
+        [_fallback(10, 3, 0, "CS")],
+        [{"student_id": 1, "mentor_id": 10}],
+    ], matching, tasks)
+    assert matching.assign_pending() == 0
+
+
+def test_accepting_moves_the_slot_only_while_under_capacity(cursor_with):
+    cursor = cursor_with([], matching)
+    assert matching.record_transition(10, "pending", "accepted", " Data Science ") is True
+    sql, params = cursor.statements[0]
+    assert "accepted_requests = accepted_requests + 1" in sql and sql.endswith("AND accepted_requests < capacity")
+    assert cursor.statements[1][1] == ("data science", 10)
+    cursor.rowcount = 0
+    assert matching.record_transition(10, "pending", "accepted") is False
+    assert len(cursor.statements) == 3
+
+
+@pytest.mark.parametrize("old, new, column", [("pending", "rejected", "open_requests"), ("accepted", "completed", "accepted_requests")])
+def test_rejecting_or_completing_releases_the_slot(cursor_with, old, new, column):
+    cursor = cursor_with([], matching)
+    assert matching.record_transition(10, old, new) is True
+    assert cursor.statements == [(f"UPDATE mentor_profiles SET {column} = GREATEST({column} - 1, 0) WHERE user_id = %s", (10,))]
+
+
+@pytest.mark.parametrize("old, new", [("rejected", "accepted"), ("completed", "accepted"), ("pending", "completed"), ("accepted", "rejected")])
+def test_status_changes_outside_the_machine_are_refused(client_with, old, new):
+    cursor = FakeCursor(results=[{"mentor_id": 7, "student_id": 1, "domain": "software", "status": old}])
+    response = client_with(mentorship, cursor, MENTOR, matching, tasks).patch("/mentorship/3", json={"status": new})
+    assert response.status_code == 409
+    assert len(cursor.statements) == 1
+
+
+def test_accepting_a_full_mentor_leaves_the_request_pending(client_with, fake_db):
+    cursor = FakeCursor(results=[{"mentor_id": 7, "student_id": 1, "domain": "software", "status": "pending"}])
+    cursor.rowcount = 0
+    response = client_with(mentorship, cursor, MENTOR, matching, tasks).patch("/mentorship/3", json={"status": "accepted"})
+    assert response.status_code == 409 and fake_db.rollbacks == 1
+    assert not any(sql.startswith("UPDATE mentorship_requests") for sql, _ in cursor.statements)
+
+
+def test_assign_pending_locks_the_fallback_mentors(cursor_with):
+    cursor = cursor_with([
+        [{"id": 1, "student_id": 1, "domain": "poetry", "department": "CS"}],
+        [],
+        [_fallback(12, 1, 0, "ME")],
+        [],
+    ], matching, tasks)
+    assert matching.assign_pending() == 1
+    assert cursor.statements[2][0].endswith("LIMIT %s FOR UPDATE OF mp")
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+import writes
+from conftest import FakeCursor
+from routers import messages
+
+STUDENT = {"id": 1, "name": "Ann", "role": "student"}
+
+
+def _message(message_id, sender_id):
+    return {"id": message_id, "conversation_id": 9, "sender_id": sender_id, "content": f"m{message_id}",
+            "created_at": datetime(2026, 1, 1, 12, 0, 0), "sender_name": "x"}
+
+
+def test_list_messages_orders_by_id_and_reads_archive_first(client_with):
+    cursor = FakeCursor(results=[
+        [{"user_id": 1, "last_read_message_id": 3, "archived_message_id": 2},
+         {"user_id": 2, "last_read_message_id": 4, "archived_message_id": 2}],
+        [_message(1, 2), _message(2, 1)],
+        [_message(3, 2), _message(4, 1), _message(5, 1)],
+    ])
+    body = client_with(messages, cursor, STUDENT, writes).get("/messages/conversations/9/messages").json()
+    assert [m["id"] for m in body] == ["1", "2", "3", "4", "5"]
+    # Own messages are read up to the other side's cursor (4), theirs up to ours (3)
+    assert [m["read"] for m in body] == [True, True, True, True, False]
+    hot = cursor.statements[-1][0]
+    assert "FROM messages m" in hot and hot.endswith("ORDER BY m.id")
+
+
+def test_list_messages_skips_archive_when_nothing_was_moved(client_with):
+    cursor = FakeCursor(results=[[{"user_id": 1, "last_read_message_id": 0, "archived_message_id": None}], []])
+    assert client_with(messages, cursor, STUDENT, writes).get("/messages/conversations/9/messages").json() == []
+    assert not any("messages_archive" in sql for sql, _ in cursor.statements)
+
+
+def test_send_message_moves_last_message_forward_only(client_with):
+    cursor = FakeCursor()
+    cursor.lastrowid = 12
+    body = client_with(messages, cursor, STUDENT, writes).post("/messages/conversations/9/messages", json={"content": "hi"}).json()
+    assert body["id"] == "12" and body["senderName"] == "Ann"
+    update, params = cursor.statements[-1]
+    assert "GREATEST(COALESCE(last_message_id, 0), %s)" in update and params == (12, 9)
+
+
+def test_send_message_to_foreign_conversation_is_404(client_with):
+    cursor = FakeCursor()
+    cursor.rowcount = 0
+    response = client_with(messages, cursor, STUDENT, writes).post("/messages/conversations/9/messages", json={"content": "hi"})
+    assert response.status_code == 404
+    assert len(cursor.statements) == 1
+
+
+@pytest.mark.parametrize("other", [2, 0])
+def test_conversation_lookup_uses_the_canonical_pair(client_with, other):
+    me = 1
+    cursor = FakeCursor(results=[{"id": other, "name": "Bo", "avatar": None, "role": "alumni"}, {"id": 9}])
+    body = client_with(messages, cursor, STUDENT, writes).get(f"/messages/conversations/{other}").json()
+    assert body["id"] == "9" and body["participants"] == ["1", str(other)]
+    sql, params = cursor.statements[1]
+    assert "user_low_id = %s AND user_high_id = %s" in sql and params == (min(me, other), max(me, other))
+    assert len(cursor.statements) == 2
+
+
+def test_first_conversation_is_created_once_per_pair(client_with, fake_db):
+    cursor = FakeCursor(results=[{"id": 2, "name": "Bo", "avatar": None, "role": "alumni"}, None])
+    cursor.lastrowid = 11
+    assert client_with(messages, cursor, STUDENT, writes).get("/messages/conversations/2").json()["id"] == "11"
+    insert, participants = cursor.statements[2:]
+    assert "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)" in insert[0] and insert[1] == (1, 2)
+    assert participants[1] == (11, 1, 11, 2) and fake_db.commits == 1
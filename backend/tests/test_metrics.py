@@ -0,0 +1,60 @@
+from collections import defaultdict, deque
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import deps
+import metrics
+from config import Config
+from routers import slow_queries
+
+SLOW = "SELECT * FROM jobs WHERE id = %s AND title = 'x' AND company IN (1, 2, 3)"
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "_slow_queries", defaultdict(int))
+    monkeypatch.setattr(metrics, "_slow_query_max", defaultdict(float))
+    monkeypatch.setattr(metrics, "_slow_query_log", deque(maxlen=10))
+    monkeypatch.setattr(Config, "SLOW_QUERY_MS", 100.0)
+
+
+def test_normalize_sql_strips_literals_and_parameters():
+    assert metrics.normalize_sql(SLOW) == "SELECT * FROM jobs WHERE id = ? AND title = ? AND company IN (...)"
+    assert metrics.normalize_sql("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)") == "INSERT INTO t (a, b) VALUES (...)"
+    assert metrics.normalize_sql("SELECT  1\n FROM t WHERE a = \"b\"") == "SELECT ? FROM t WHERE a = ?"
+
+
+def test_slow_queries_are_labelled_by_fingerprint():
+    metrics.record_query(SLOW, 0.5)
+    metrics.record_query(SLOW.replace("%s", "7"), 0.2)
+    metrics.record_query("SELECT 1", 0.01)
+    statement = metrics.normalize_sql(SLOW)
+    fp = metrics.fingerprint(statement)
+    assert len(fp) == 12
+    text = metrics.render()
+    assert f'db_slow_queries_total{{route="-",fingerprint="{fp}"}} 2' in text
+    assert statement not in text
+    assert metrics.slow_query_totals() == [
+        {"route": "-", "fingerprint": fp, "statement": statement, "count": 2, "maxSeconds": 0.5}
+    ]
+
+
+def _client(role):
+    app = FastAPI()
+    app.include_router(slow_queries.router)
+    app.dependency_overrides[deps.get_current_user] = lambda: {"id": 1, "name": "A", "role": role}
+    return TestClient(app)
+
+
+def test_slow_query_endpoint_is_admin_only_and_newest_first():
+    metrics.record_query("SELECT a FROM t", 0.3)
+    metrics.record_query("SELECT b FROM t", 0.4)
+    assert _client("alumni").get("/admin/slow-queries").status_code == 403
+    body = _client("admin").get("/admin/slow-queries?limit=1").json()
+    assert [q["statement"] for q in body["recent"]] == ["SELECT b FROM t"]
+    assert len(body["statements"]) == 2
+    fp = metrics.fingerprint("SELECT a FROM t")
+    body = _client("admin").get(f"/admin/slow-queries?fingerprint={fp}").json()
+    assert [q["statement"] for q in body["statements"]] == ["SELECT a FROM t"]
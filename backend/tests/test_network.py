@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import network
+from config import Config
+
+# 1-2, 1-3, 2-4, 3-4, 3-5, 4-6; 7 has no connections
+EDGES = [(1, 2), (3, 1), (2, 4), (3, 4), (3, 5), (4, 6), (2, 1), (8, 1), (1, 1)]
+
+
+def _graph(edges=EDGES):
+    ids = [1, 2, 3, 4, 5, 6, 7]
+    return network.Graph(ids, [(None, None, None)] * len(ids), edges)
+
+
+def test_rows_are_sorted_deduplicated_and_skip_unknown_users():
+    graph = _graph()
+    assert graph.neighbors(1) == [2, 3]
+    assert graph.neighbors(4) == [2, 3, 6]
+    assert graph.neighbors(7) == []
+    assert graph.neighbors(99) == []
+
+
+def test_mutual():
+    graph = _graph()
+    assert graph.mutual(1, 4) == [2, 3]
+    assert graph.mutual(2, 3) == [1, 4]
+    assert graph.mutual(1, 7) == []
+    assert graph.mutual(1, 99) == []
+
+
+def test_second_degree_counts_mutuals_and_excludes_direct():
+    graph = _graph()
+    assert graph.second_degree(1, 10) == [(4, 2), (5, 1)]
+    assert graph.second_degree(1, 1) == [(4, 2)]
+    assert graph.second_degree(7, 10) == []
+
+
+def test_second_degree_budget_stops_inside_a_row(monkeypatch):
+    # User 1's only neighbour is a hub connected to everyone else
+    hub = [(1, 2)] + [(2, u) for u in range(3, 8)]
+    monkeypatch.setattr(Config, "NETWORK_BFS_LIMIT", 3)
+    counts = _graph(hub)._second_degree_rows(0)
+    # The hub's row is [1, 3, 4, 5, 6, 7] (as rows 0, 2..6); only its first three entries are visited
+    assert dict(counts) == {2: 1, 3: 1}
+
+
+def test_cold_graph_is_built_once_for_concurrent_callers(monkeypatch):
+    monkeypatch.setattr(network, "_snapshot", {"graph": None, "rebuilding": False})
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)
+        return network.Graph([1, 2], [(None, None, None)] * 2, [(1, 2)])
+
+    monkeypatch.setattr(network, "build", build)
+    with ThreadPoolExecutor(4) as pool:
+        graphs = list(pool.map(lambda _: network.current_graph(), range(4)))
+    assert len(builds) == 1 and all(g is graphs[0] for g in graphs)
+
+
+def test_build_leaves_the_callers_transaction_alone(monkeypatch, cursor_with, fake_db):
+    cursor_with([[{"id": 1}, {"id": 2}], [{"a": 1, "b": 2}]], network)
+    graph = network.build()
+    assert graph.mutual(1, 2) == [] and list(graph.neighbors(1)) == [2]
+    assert fake_db.commits == 0
@@ -0,0 +1,49 @@
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import deps
+import profiling
+from config import Config
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "PROFILE_MAX_FILES", 2)
+    return tmp_path
+
+
+def test_fold_is_root_first_and_ends_at_the_frame():
+    def leaf():
+        return profiling._fold(sys._getframe())
+
+    stack = leaf().split(";")
+    assert stack[-1].startswith("leaf (test_profiling.py:")
+    assert stack[-2].startswith("test_fold_is_root_first_and_ends_at_the_frame (")
+    assert len(profiling._fold(sys._getframe(), max_depth=2).split(";")) == 2
+
+
+def test_save_writes_folded_stacks_and_keeps_the_newest(profile_dir, monkeypatch):
+    session = profiling._Session()
+    session.samples.update(["a;b", "a;b", "a;c"])
+    for ms in (1000, 2000, 3000):
+        monkeypatch.setattr(profiling.time, "time", lambda ms=ms: ms)
+        profiling._save(session, "GET", "/jobs/{job_id}", 0.25)
+    names = sorted(p.name for p in profile_dir.iterdir())
+    assert names == ["2000000-GET-jobs_job_id-250ms.folded", "3000000-GET-jobs_job_id-250ms.folded"]
+    assert (profile_dir / names[0]).read_text() == "a;b 2\na;c 1\n"
+
+
+def test_download_only_serves_profile_names(profile_dir):
+    (profile_dir / "1-GET-root-5ms.folded").write_text("a 1\n")
+    (profile_dir / "secret.txt").write_text("x")
+    app = FastAPI()
+    app.include_router(profiling.router)
+    app.dependency_overrides[deps.get_current_user] = lambda: {"id": 1, "name": "A", "role": "admin"}
+    client = TestClient(app)
+    assert [p["name"] for p in client.get("/admin/profiles").json()] == ["1-GET-root-5ms.folded"]
+    assert client.get("/admin/profiles/1-GET-root-5ms.folded").text == "a 1\n"
+    assert client.get("/admin/profiles/secret.txt").status_code == 404
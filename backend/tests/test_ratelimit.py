@@ -0,0 +1,49 @@
+import pytest
+
+import ratelimit
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("GET", "/users/alumni", "expensive"),
+    ("GET", "/users/alumni/", "expensive"),
+    ("HEAD", "/dashboard", "expensive"),
+    ("GET", "/messages/conversations", "expensive"),
+    ("GET", "/messages/conversations/5/messages", "read"),
+    ("GET", "/messages/conversations/42", "read"),
+    ("GET", "/users/alumnix", "read"),
+    ("GET", "/jobs", "read"),
+    ("POST", "/messages/conversations/5/messages", "write"),
+    ("DELETE", "/dashboard", "write"),
+])
+def test_route_class(method, path, expected):
+    assert ratelimit.route_class(method, path) == expected
+
+
+def test_bucket_allows_burst_then_reports_wait():
+    buckets = ratelimit.TokenBuckets({"read": (2.0, 3.0)})
+    key = ("user:a", "read")
+    assert [buckets.reserve(key, 0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.reserve(key, 0.0) == pytest.approx(0.5)
+    buckets.refund(key)
+    # Half a second later a token has come back
+    assert buckets.reserve(key, 0.5) == 0.0
+
+
+def test_buckets_are_per_caller():
+    buckets = ratelimit.TokenBuckets({"read": (1.0, 1.0)})
+    assert buckets.reserve(("user:a", "read"), 0.0) == 0.0
+    assert buckets.reserve(("user:b", "read"), 0.0) == 0.0
+    assert buckets.reserve(("user:a", "read"), 0.0) > 0
+
+
+def test_buckets_stay_bounded_and_evict_the_least_recently_used(monkeypatch):
+    monkeypatch.setattr(ratelimit, "MAX_BUCKETS", 2)
+    buckets = ratelimit.TokenBuckets({"read": (1.0, 1.0)})
+    buckets.reserve(("user:a", "read"), 0.0)
+    buckets.reserve(("user:b", "read"), 0.0)
+    # a is used again, so b is now the oldest and goes when c arrives
+    assert buckets.reserve(("user:a", "read"), 0.0) > 0
+    buckets.reserve(("user:c", "read"), 0.0)
+    assert len(buckets._buckets) == 2
+    assert buckets.reserve(("user:b", "read"), 0.0) == 0.0
+    assert buckets.reserve(("user:a", "read"), 0.0) == 0.0
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+
+import tasks
+from conftest import FakeCursor
+from routers import jobs, referrals
+
+POSTER = {"id": 7, "name": "Po", "role": "alumni"}
+LOCKED = {"id": 3, "referrer_id": 5, "status": "interviewed", "candidate_name": "Cy", "posted_by_id": 7, "title": "Dev"}
+
+
+def test_stats_success_rate():
+    stats = referrals._row_to_stats({"total": 4, "hired": 1, "pending": 3, "bonus_earned": 500}, 5)
+    assert stats["successRate"] == 0.25 and stats["pending"] == 3 and stats["rejected"] == 0
+    assert referrals._row_to_stats(None, 5)["successRate"] == 0.0
+
+
+def test_hire_moves_the_counters_and_books_the_bonus(client_with, fake_db):
+    full = dict(LOCKED, job_id=1, status="hired", candidate_email="c@x.io", bonus=500,
+                created_at=datetime(2026, 1, 1), referrer_name="Re")
+    cursor = FakeCursor(results=[LOCKED, full])
+    body = client_with(referrals, cursor, POSTER, tasks).patch("/referrals/3", json={"status": "hired", "bonus": 500}).json()
+    assert body["status"] == "hired" and body["bonus"] == 500
+    sql, params = cursor.statements[2]
+    assert "interviewed = GREATEST(interviewed - 1, 0), hired = hired + 1" in sql and params == (500, 5)
+    assert fake_db.commits == 1
+
+
+@pytest.mark.parametrize("status", ["pending", "accepted", "bogus"])
+def test_only_forward_transitions_are_allowed(client_with, status):
+    cursor = FakeCursor(results=[LOCKED])
+    assert client_with(referrals, cursor, POSTER, tasks).patch("/referrals/3", json={"status": status}).status_code == 400
+    assert len(cursor.statements) == 1
+
+
+def test_strangers_cannot_see_a_referral(client_with):
+    cursor = FakeCursor(results=[LOCKED])
+    stranger = {"id": 9, "name": "St", "role": "alumni"}
+    assert client_with(referrals, cursor, stranger, tasks).patch("/referrals/3", json={"status": "hired"}).status_code == 404
+    # The referrer sees it but may not move it
+    cursor = FakeCursor(results=[LOCKED])
+    referrer = {"id": 5, "name": "Re", "role": "alumni"}
+    assert client_with(referrals, cursor, referrer, tasks).patch("/referrals/3", json={"status": "hired"}).status_code == 403
+
+
+def test_deleting_a_job_releases_its_referrals_from_the_counters(client_with, fake_db):
+    cursor = FakeCursor(results=[
+        {"posted_by_id": 7},
+        [{"referrer_id": 5, "status": "hired", "bonus": 500}, {"referrer_id": 5, "status": "pending", "bonus": None},
+         {"referrer_id": 6, "status": "rejected", "bonus": None}],
+    ])
+    assert client_with(jobs, cursor, POSTER, referrals).delete("/jobs/4").status_code == 200
+    sql, params = cursor.statements[2]
+    assert sql.startswith("UPDATE referrer_stats SET total = GREATEST(total - %s, 0), pending = GREATEST(pending - %s, 0)")
+    # total, pending, accepted, rejected, interviewed, hired, bonus_earned, referrer
+    assert params == [(2, 1, 0, 0, 0, 1, 500, 5), (1, 0, 0, 1, 0, 0, 0, 6)]
+    assert cursor.statements[3] == ("DELETE FROM jobs WHERE id = %s", (4,))
+    assert fake_db.commits == 1
+
+
+def test_deleting_a_job_without_referrals_touches_no_counters(client_with):
+    cursor = FakeCursor(results=[{"posted_by_id": 7}, []])
+    assert client_with(jobs, cursor, POSTER, referrals).delete("/jobs/4").status_code == 200
+    assert [sql.split(" ")[0] for sql, _ in cursor.statements] == ["SELECT", "SELECT", "DELETE"]
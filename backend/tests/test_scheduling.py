@@ -0,0 +1,62 @@
+import random
+from datetime import datetime
+
+import pytest
+
+import scheduling
+from config import Config
+from conftest import FakeCursor
+
+
+def test_interval_tree_matches_a_linear_scan():
+    rng = random.Random(7)
+    intervals = [(s, s + rng.randint(1, 50)) for s in (rng.randint(0, 500) for _ in range(200))]
+    tree = scheduling.IntervalTree(intervals)
+    assert len(tree) == 200
+    for _ in range(200):
+        start = rng.randint(0, 550)
+        end = start + rng.randint(1, 40)
+        assert tree.overlapping(start, end) == sorted(i for i in intervals if i[0] < end and i[1] > start)
+
+
+def test_interval_tree_is_half_open_and_handles_empty():
+    tree = scheduling.IntervalTree([(0, 10), (10, 20)])
+    assert tree.overlapping(10, 11) == [(10, 20)]
+    assert tree.overlapping(5, 10) == [(0, 10)]
+    assert scheduling.IntervalTree([]).overlapping(0, 100) == []
+
+
+def test_merge_and_subtract():
+    assert scheduling._merge([(5, 8), (0, 3), (3, 4), (7, 10)]) == [(0, 4), (5, 10)]
+    assert scheduling._subtract([(0, 60), (100, 160)], [(10, 20), (50, 110), (150, 200)]) == [
+        (0, 10), (20, 50), (110, 150),
+    ]
+
+
+def test_common_free_intersects_every_user():
+    per_user = {1: [(0, 100), (200, 300)], 2: [(50, 250)], 3: [(60, 70), (90, 220)]}
+    assert scheduling.common_free(per_user) == [(60, 70), (90, 100), (200, 220)]
+    assert scheduling.common_free({1: [(0, 10)], 2: [(20, 30)]}) == []
+
+
+@pytest.mark.parametrize("value, minutes", [("00:00", 0), ("9:30", 570), ("24:00", 1440), ("7", 420)])
+def test_parse_hhmm(value, minutes):
+    assert scheduling.parse_hhmm(value) == minutes
+
+
+def test_parse_hhmm_rejects_out_of_range():
+    with pytest.raises(ValueError):
+        scheduling.parse_hhmm("24:01")
+
+
+def test_find_slots_skips_bookings(monkeypatch):
+    monkeypatch.setattr(Config, "COFFEE_SLOT_MINUTES", 30)
+    now = datetime(2026, 10, 19, 8, 7)
+    monday = now.weekday()
+    cursor = FakeCursor(results=[
+        [{"user_id": 1, "weekday": monday, "start_minute": 540, "end_minute": 660},
+         {"user_id": 2, "weekday": monday, "start_minute": 600, "end_minute": 720}],
+        [{"user_id": 2, "slot_start": datetime(2026, 10, 19, 10, 0)}],
+    ])
+    monkeypatch.setattr(scheduling, "cursor", cursor)
+    assert scheduling.find_slots([1, 2], 30, 1, 10, now=now) == [datetime(2026, 10, 19, 10, 30)]
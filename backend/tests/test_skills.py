@@ -0,0 +1,78 @@
+import pytest
+
+import deps
+import tasks
+from conftest import FakeCursor
+from routers import skills, users
+
+ALUMNUS = {"id": 1, "name": "Ann", "role": "alumni"}
+
+
+@pytest.mark.parametrize("name, slug", [
+    ("React.js", "react"),
+    ("reactjs", "react"),
+    ("  Machine   Learning ", "machine learning"),
+    ("ML", "machine learning"),
+    ("C / C++", "c/c++"),
+    ("Node", "node.js"),
+    ("Python.", "python"),
+])
+def test_normalize_skill(name, slug):
+    assert skills.normalize_skill(name) == slug
+
+
+@pytest.mark.parametrize("count, level", [(0, "beginner"), (2, "beginner"), (3, "intermediate"), (10, "expert")])
+def test_level(count, level):
+    assert skills._level(count) == level
+
+
+def test_skill_ids_keep_the_first_spelling_per_slug(monkeypatch):
+    cursor = FakeCursor(results=[[{"id": 1, "slug": "react"}, {"id": 2, "slug": "python"}]])
+    monkeypatch.setattr(skills, "cursor", cursor)
+    assert skills._skill_ids(["React.js", "reactjs", " Python ", "  "]) == {"react": 1, "python": 2}
+    assert cursor.statements[0][1] == [("react", "React.js"), ("python", "Python")]
+
+
+def test_endorse_bumps_the_counter_once(client_with):
+    cursor = FakeCursor(results=[{"skill_id": 5, "name": "React"}])
+    assert client_with(skills, cursor, ALUMNUS, tasks).post("/skills/users/2/endorse?skill=reactjs").status_code == 200
+    assert cursor.statements[0][1] == (2, "react")
+    assert "endorsement_count = endorsement_count + 1" in cursor.statements[2][0]
+
+
+def test_endorsing_twice_leaves_the_counter(client_with):
+    cursor = FakeCursor(results=[{"skill_id": 5, "name": "React"}])
+    cursor.rowcount = 0
+    response = client_with(skills, cursor, ALUMNUS, tasks).post("/skills/users/2/endorse?skill=react")
+    assert response.status_code == 400
+    assert not any("UPDATE user_skills" in sql for sql, _ in cursor.statements)
+
+
+def test_cannot_endorse_yourself(client_with):
+    cursor = FakeCursor()
+    assert client_with(skills, cursor, ALUMNUS, tasks).post("/skills/users/1/endorse?skill=react").status_code == 400
+    assert cursor.statements == []
+
+
+def test_rejecting_a_user_takes_back_their_endorsements_first(client_with, fake_db):
+    cursor = FakeCursor(results=[{"id": 5}, None])
+    admin = {"id": 1, "name": "Ad", "role": "admin"}
+    assert client_with(users, cursor, admin, skills, deps).post("/users/5/reject").status_code == 200
+    release, delete = cursor.statements[2:]
+    assert release[0].startswith("UPDATE user_skills us JOIN skill_endorsements e") and release[1] == (5,)
+    assert delete == ("DELETE FROM users WHERE id = %s", (5,))
+    assert fake_db.commits == 1
+
+
+def test_rejecting_an_approved_user_changes_nothing(client_with):
+    cursor = FakeCursor(results=[None])
+    admin = {"id": 1, "name": "Ad", "role": "admin"}
+    assert client_with(users, cursor, admin, skills, deps).post("/users/5/reject").status_code == 404
+    assert len(cursor.statements) == 1
+
+
+def test_rebuild_counts_is_admin_only(client_with, fake_db):
+    cursor = FakeCursor()
+    assert client_with(skills, cursor, ALUMNUS).post("/skills/counts/rebuild").status_code == 403
+    body = client_with(skills, cursor, dict(ALUMNUS, role="admin")).post("/skills/counts/rebuild").json()
+    assert body["updated"] == 1 and "COUNT(*) FROM skill_endorsements" in cursor.statements[0][0]
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+
+from config import Config
+from conftest import FakeCursor
+from routers import stories
+
+STUDENT = {"id": 1, "name": "Ann", "role": "student"}
+
+
+def _story(story_id, likes=0):
+    return {"id": story_id, "author_id": 9, "title": f"t{story_id}", "story": "s", "category": "career",
+            "tags": '["a"]', "featured": 0, "like_count": likes, "comment_count": 0, "share_count": 0,
+            "created_at": datetime(2026, 1, story_id), "author_name": "Bo"}
+
+
+def _counts(story_id, likes, liked=0):
+    return {"id": story_id, "like_count": likes, "comment_count": 1, "share_count": 0, "liked": liked}
+
+
+@pytest.fixture(autouse=True)
+def hot_window(monkeypatch):
+    monkeypatch.setattr(Config, "STORIES_HOT_SIZE", 3)
+    # Unsynced, so nothing is kept between requests: each test loads its own window
+    monkeypatch.setattr(stories, "_hot", stories.cache.Cache("stories_hot_test"))
+
+
+def test_first_page_comes_from_the_window_with_current_counters(client_with):
+    cursor = FakeCursor(results=[[_story(3), _story(2), _story(1)], [_counts(3, 5, 1), _counts(2, 0)]])
+    body = client_with(stories, cursor, STUDENT).get("/stories?limit=2").json()
+    assert [s["id"] for s in body["items"]] == ["3", "2"] and body["nextCursor"] == "2"
+    assert body["items"][0]["likes"] == 5 and body["items"][0]["likedByMe"] is True
+    assert body["items"][0]["tags"] == ["a"]
+    assert len(cursor.statements) == 2
+
+
+def test_page_past_the_window_reads_the_table_from_the_cursor(client_with):
+    cursor = FakeCursor(results=[[_story(3), _story(2), _story(1)], [], []])
+    body = client_with(stories, cursor, STUDENT).get("/stories?before=2&limit=2").json()
+    assert body == {"items": [], "nextCursor": None}
+    sql, params = cursor.statements[1]
+    assert "s.id < %s" in sql and params == [2, 2]
+
+
+def test_deleted_stories_drop_out_of_window_pages(client_with):
+    cursor = FakeCursor(results=[[_story(3), _story(2)], [_counts(2, 0)]])
+    body = client_with(stories, cursor, STUDENT).get("/stories?limit=5").json()
+    assert [s["id"] for s in body["items"]] == ["2"] and body["nextCursor"] is None
+
+
+def test_unknown_category_is_rejected(client_with):
+    assert client_with(stories, FakeCursor(), STUDENT).get("/stories?category=gossip").status_code == 400
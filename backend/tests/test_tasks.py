@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+import tasks
+from conftest import FakeCursor
+
+
+def _task(task_id, kind, payload):
+    return {"id": task_id, "kind": kind, "payload": payload, "attempts": 0, "max_attempts": 3}
+
+
+@pytest.fixture
+def run_with(monkeypatch, fake_db):
+    def run(rows, handlers):
+        cursor = FakeCursor(results=[rows])
+        monkeypatch.setattr(tasks, "cursor", cursor)
+        monkeypatch.setattr(tasks, "db", fake_db)
+        monkeypatch.setattr(tasks, "_handlers", handlers)
+        tasks.run_once("w1")
+        return cursor.statements[2:]
+    return run
+
+
+def _outcomes(statements):
+    done, requeued = [], []
+    for sql, params in statements:
+        if "status = 'done'" in sql:
+            done.extend(params)
+        elif "status = 'queued'" in sql:
+            requeued.append(params[-1])
+    return done, requeued
+
+
+def test_batch_runs_once_when_it_succeeds(run_with):
+    calls = []
+    statements = run_with([_task(1, "digest", {"n": 1}), _task(2, "digest", {"n": 2})],
+                          {"digest": (calls.append, True)})
+    assert calls == [[{"n": 1}, {"n": 2}]]
+    assert _outcomes(statements) == ([1, 2], [])
+
+
+def test_failed_batch_falls_back_to_one_at_a_time(run_with, fake_db):
+    calls = []
+
+    def digest(payloads):
+        calls.append([p["n"] for p in payloads])
+        if any(p.get("bad") for p in payloads):
+            raise KeyError("summary")
+
+    statements = run_with([_task(1, "digest", {"n": 1}), _task(2, "digest", {"n": 2, "bad": True}),
+                           _task(3, "digest", {"n": 3})], {"digest": (digest, True)})
+    assert calls == [[1, 2, 3], [1], [2], [3]]
+    assert _outcomes(statements) == ([1, 3], [2])
+    assert fake_db.rollbacks == 2
+
+
+def test_single_tasks_fail_alone(run_with):
+    def send(payload):
+        if payload["n"] == 1:
+            raise RuntimeError("smtp down")
+
+    statements = run_with([_task(1, "mail", {"n": 1}), _task(2, "mail", {"n": 2})], {"mail": (send, False)})
+    assert _outcomes(statements) == ([2], [1])
+
+
+def test_digest_queues_one_email_per_admin_and_sends_nothing(monkeypatch, cursor_with):
+    sent = []
+    monkeypatch.setattr(tasks.mailer, "send", lambda *message: sent.append(message))
+    cursor = cursor_with([[{"email": "a@x.io"}, {"email": "b@x.io"}]], tasks)
+    tasks.send_admin_digest([{"summary": "Job posted"}, {"summary": "Event created"}])
+    assert sent == []
+    queued = [params for sql, params in cursor.statements if sql.startswith("INSERT INTO task_queue")]
+    assert [(p[0], json.loads(p[1])["to"]) for p in queued] == [("email", "a@x.io"), ("email", "b@x.io")]
+    assert json.loads(queued[0][1])["subject"] == "Smart Alumni Connect: 2 new updates"
@@ -0,0 +1,124 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+import uploads
+from config import Config
+from routers.uploads import _byte_range
+
+BOUNDARY = "xYzZY"
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+ALLOWED = {"png": "image/png"}
+
+
+def _body(content: bytes, field: str = "file") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nhello\r\n"
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"a.png\"\r\n"
+        f"Content-Type: image/png\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def _chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _file(data: bytes, size: int = 7, max_body: int = 1 << 20, field: str = "file") -> bytes:
+    async def collect():
+        parts = uploads.multipart_file(_chunked(data, size), f"multipart/form-data; boundary={BOUNDARY}", max_body, field)
+        return b"".join([chunk async for chunk in parts])
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 4096])
+def test_multipart_file_yields_only_the_file_field(size):
+    assert _file(_body(PNG), size=size) == PNG
+
+
+def test_multipart_file_without_the_field_is_a_400():
+    with pytest.raises(uploads.UploadError) as e:
+        _file(_body(PNG, field="other"))
+    assert e.value.status_code == 400
+
+
+def test_multipart_file_counts_the_body_as_it_arrives():
+    with pytest.raises(uploads.UploadError) as e:
+        _file(_body(PNG), max_body=64)
+    assert e.value.status_code == 413
+
+
+def test_multipart_file_requires_multipart():
+    async def collect():
+        return [c async for c in uploads.multipart_file(_chunked(PNG, 8), "application/octet-stream", 1 << 20)]
+    with pytest.raises(uploads.UploadError) as e:
+        asyncio.run(collect())
+    assert e.value.status_code == 400
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _store(data: bytes, max_bytes: int = 1 << 20, size: int = 5):
+    return asyncio.run(uploads.store(_chunked(data, size), ALLOWED, max_bytes))
+
+
+def test_store_sniffs_across_small_chunks_and_is_content_addressed(upload_dir):
+    first = _store(PNG, size=3)
+    assert first["name"].endswith(".png") and first["size"] == len(PNG) and first["created"]
+    with open(uploads.path_for(first["name"]), "rb") as f:
+        assert f.read() == PNG
+    assert _store(PNG, size=50)["created"] is False
+    assert os.listdir(upload_dir / "tmp") == []
+
+
+@pytest.mark.parametrize("data, status", [
+    (PNG, 413),
+    (b"%PDF-1.7" + b"\x00" * 20, 415),
+    (b"", 400),
+])
+def test_store_rejects(upload_dir, data, status):
+    with pytest.raises(uploads.UploadError) as e:
+        _store(data, max_bytes=50)
+    assert e.value.status_code == status
+    assert os.listdir(upload_dir / "tmp") == []
+
+
+@pytest.mark.parametrize("head, expected", [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff\xe0", "jpg"),
+    (b"GIF89a", "gif"),
+    (b"RIFF\x00\x00\x00\x00WEBP", "webp"),
+    (b"%PDF-1.4", "pdf"),
+    (b"PK\x03\x04", "docx"),
+    (b"hello", None),
+])
+def test_sniff(head, expected):
+    assert uploads.sniff(head) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=10-", (10, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=a-b", None),
+])
+def test_byte_range(header, expected):
+    assert _byte_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=50-10"])
+def test_byte_range_unsatisfiable(header):
+    with pytest.raises(HTTPException) as e:
+        _byte_range(header, 1000)
+    assert e.value.status_code == 416
+    assert e.value.headers["Content-Range"] == "bytes */1000"
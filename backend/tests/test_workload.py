@@ -0,0 +1,16 @@
+from benchmarks import workload
+
+
+def test_throttled_requests_are_counted_but_not_timed():
+    recorder = workload.Recorder()
+    recorder.add("jobs.list_jobs", 200, 0.010)
+    recorder.add("jobs.list_jobs", 503, 0.200)
+    recorder.add("jobs.list_jobs", 429, 0.001, throttled=True)
+    recorder.add("jobs.list_jobs", 503, 0.001, throttled=True)
+    recorder.add("dashboard.dashboard", 429, 0.001, throttled=True)
+    summary = workload.summarize(recorder, 1.0)
+    jobs = summary["endpoints"]["jobs.list_jobs"]
+    assert (jobs["requests"], jobs["throttled"], jobs["errors"]) == (2, 2, 1)
+    assert jobs["p50_ms"] == 10.0 and jobs["max_ms"] == 200.0
+    assert summary["endpoints"]["dashboard.dashboard"]["requests"] == 0
+    assert summary["total"]["throttled"] == 3 and summary["total"]["requests"] == 2
@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+import mysql.connector
+import pytest
+from fastapi import HTTPException
+
+import writes
+from conftest import FakeCursor
+
+
+def _use(monkeypatch, cursor, db):
+    monkeypatch.setattr(writes, "cursor", cursor)
+    monkeypatch.setattr(writes, "db", db)
+
+
+def test_insert_returns_values_with_new_id(monkeypatch, fake_db):
+    cursor = FakeCursor()
+    cursor.lastrowid = 42
+    _use(monkeypatch, cursor, fake_db)
+    row = writes.insert("donations", {"user_id": 5, "amount": 10})
+    assert row == {"user_id": 5, "amount": 10, "id": 42}
+    assert cursor.statements == [("INSERT INTO donations (user_id, amount) VALUES (%s, %s)", [5, 10])]
+    assert fake_db.commits == 0
+
+
+@pytest.mark.parametrize("errno, status, detail", [
+    (writes.DUPLICATE_KEY, 400, "Already applied"),
+    (writes.NO_REFERENCED_ROW, 404, "Job not found"),
+])
+def test_insert_maps_constraint_errors(monkeypatch, fake_db, errno, status, detail):
+    error = mysql.connector.IntegrityError(msg="constraint", errno=errno)
+    _use(monkeypatch, FakeCursor(errors={"INSERT": error}), fake_db)
+    with pytest.raises(HTTPException) as raised:
+        writes.insert("applications", {"job_id": 1}, duplicate="Already applied", missing="Job not found")
+    assert (raised.value.status_code, raised.value.detail) == (status, detail)
+    assert fake_db.rollbacks == 1
+
+
+def test_insert_reraises_unmapped_errors(monkeypatch, fake_db):
+    error = mysql.connector.IntegrityError(msg="constraint", errno=writes.DUPLICATE_KEY)
+    _use(monkeypatch, FakeCursor(errors={"INSERT": error}), fake_db)
+    with pytest.raises(mysql.connector.IntegrityError):
+        writes.insert("users", {"email": "a@b.co"})
+
+
+def test_now_is_naive_whole_second_utc():
+    value = writes.now()
+    assert value.tzinfo is None and value.microsecond == 0
+    assert abs((datetime.now(timezone.utc).replace(tzinfo=None) - value).total_seconds()) < 2
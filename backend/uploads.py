@@ -0,0 +1,232 @@
+"""Content-addressed file storage for avatars and resumes.
+
+An upload is parsed out of the multipart request body as it arrives (see
+`multipart_file`) and each chunk is size-checked, hashed and written to a
+temporary file, which is then renamed to `objects/<sha[:2]>/<sha>.<ext>`. The
+body is never spooled anywhere else first, and the size limit applies to the
+bytes received so far, with or without a Content-Length. Identical content
+lands on the same name, so a second copy is dropped instead of stored. Names
+never change meaning, which is what lets downloads be cached forever.
+
+The file type comes from the leading bytes, not the client's Content-Type.
+Avatar thumbnails are decoded and resized in a process pool so Pillow work
+never holds the event loop or the GIL of the API process.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import aiofiles
+import aiofiles.os
+from python_multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+
+from config import Config
+
+AVATAR_TYPES = {"png": "image/png", "jpg": "image/jpeg", "gif": "image/gif", "webp": "image/webp"}
+RESUME_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "doc": "application/msword",
+}
+CONTENT_TYPES = dict(AVATAR_TYPES, **RESUME_TYPES)
+# <sha256>.<ext> for originals, <sha256>_<size>.jpg for thumbnails
+NAME = re.compile(r"^(?P<sha>[0-9a-f]{64})(?:_(?P<size>\d+))?\.(?P<ext>[a-z]+)$")
+
+
+class UploadError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def sniff(head: bytes) -> str:
+    """Extension for the file type announced by the first bytes, or None."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx"
+    if head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        return "doc"
+    return None
+
+
+def _allowed_kind(head: bytes, allowed: dict) -> str:
+    ext = sniff(head[:16])
+    if ext not in allowed:
+        raise UploadError(415, f"Unsupported file type; allowed: {', '.join(sorted(allowed))}")
+    return ext
+
+
+def path_for(name: str) -> str:
+    """Filesystem path for a stored name; the name must already match NAME."""
+    return os.path.join(Config.UPLOAD_DIR, "objects", name[:2], name)
+
+
+async def multipart_file(body, content_type: str, max_body: int, field: str = "file"):
+    """Yield the content of multipart field `field` as `body` (an async iterable of bytes, e.g.
+    `request.stream()`) arrives. Other fields are skipped; more than `max_body` bytes of body is a 413."""
+    kind, options = parse_options_header(content_type)
+    if kind != b"multipart/form-data" or not options.get(b"boundary"):
+        raise UploadError(400, f"Send the file as multipart field '{field}'")
+    part = {"headers": {}, "name": b"", "value": b"", "wanted": False, "found": False}
+    pending = []
+
+    def on_part_begin():
+        part.update(headers={}, wanted=False)
+
+    def on_header_field(data, start, end):
+        part["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["name"].lower()] = part["value"]
+        part.update(name=b"", value=b"")
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["wanted"] = not part["found"] and disposition.get(b"name") == field.encode()
+        part["found"] = part["found"] or part["wanted"]
+
+    def on_part_data(data, start, end):
+        if part["wanted"]:
+            pending.append(bytes(data[start:end]))
+
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": on_part_begin, "on_header_field": on_header_field, "on_header_value": on_header_value,
+        "on_header_end": on_header_end, "on_headers_finished": on_headers_finished, "on_part_data": on_part_data,
+    })
+    received = 0
+    async for chunk in body:
+        received += len(chunk)
+        if received > max_body:
+            raise UploadError(413, f"Request is larger than {max_body // (1024 * 1024)} MB")
+        try:
+            parser.write(chunk)
+        except MultipartParseError:
+            raise UploadError(400, "Malformed multipart body")
+        if pending:
+            yield b"".join(pending)
+            pending.clear()
+    parser.finalize()
+    if not part["found"]:
+        raise UploadError(400, f"Send the file as multipart field '{field}'")
+
+
+async def store(chunks, allowed: dict, max_bytes: int) -> dict:
+    """Write `chunks` (an async iterable of bytes) into the store as they come; returns name, sha256, size,
+    content type. The type is sniffed from the first bytes and the size checked on every chunk."""
+    tmp_dir = os.path.join(Config.UPLOAD_DIR, "tmp")
+    await aiofiles.os.makedirs(tmp_dir, exist_ok=True)
+    tmp = os.path.join(tmp_dir, uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    size = 0
+    ext = None
+    head = b""
+    try:
+        async with aiofiles.open(tmp, "wb") as out:
+
+            async def write(chunk: bytes):
+                nonlocal size
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadError(413, f"File is larger than {max_bytes // (1024 * 1024)} MB")
+                digest.update(chunk)
+                await out.write(chunk)
+
+            async for chunk in chunks:
+                if ext is None:
+                    # The magic bytes may be split across the first chunks
+                    head += chunk
+                    if len(head) < 16:
+                        continue
+                    ext, chunk = _allowed_kind(head, allowed), head
+                await write(chunk)
+            if ext is None and head:
+                ext = _allowed_kind(head, allowed)
+                await write(head)
+        if size == 0:
+            raise UploadError(400, "File is empty")
+        sha = digest.hexdigest()
+        name = f"{sha}.{ext}"
+        final = path_for(name)
+        if await aiofiles.os.path.exists(final):
+            created = False
+        else:
+            await aiofiles.os.makedirs(os.path.dirname(final), exist_ok=True)
+            # Atomic: a concurrent upload of the same bytes just replaces it with identical content
+            await aiofiles.os.replace(tmp, final)
+            created = True
+        return {"name": name, "sha256": sha, "size": size, "contentType": allowed[ext], "created": created}
+    finally:
+        if await aiofiles.os.path.exists(tmp):
+            await aiofiles.os.remove(tmp)
+
+
+def _make_thumbnails(source: str, sha: str, sizes: tuple) -> list:
+    """Runs in a pool process: square-crop and resize to each size, as JPEG next to the original."""
+    from PIL import Image, ImageOps
+
+    names = []
+    try:
+        image = Image.open(source)
+    except Image.DecompressionBombError as e:
+        raise ValueError(str(e))
+    with image:
+        image.draft("RGB", (max(sizes), max(sizes)))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for size in sizes:
+            name = f"{sha}_{size}.jpg"
+            target = path_for(name)
+            if not os.path.exists(target):
+                tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+                ImageOps.fit(image, (size, size), Image.LANCZOS).save(tmp, "JPEG", quality=85, optimize=True)
+                os.replace(tmp, target)
+            names.append(name)
+    return names
+
+
+_pool = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the API process has threads (pools, cache tailer) that must not be forked mid-lock
+        _pool = ProcessPoolExecutor(Config.UPLOAD_THUMB_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def thumbnails(stored: dict) -> list:
+    """Thumbnail names for a stored avatar, generating any that are missing."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _get_pool(), _make_thumbnails, path_for(stored["name"]), stored["sha256"], Config.AVATAR_THUMB_SIZES
+        )
+    except (OSError, ValueError, SyntaxError) as e:
+        # Pillow reports undecodable images this way; don't keep bytes that only look like an image
+        if stored.get("created"):
+            await aiofiles.os.remove(path_for(stored["name"]))
+        raise UploadError(400, f"Could not read image: {e}")
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
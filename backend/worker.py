@@ -0,0 +1,95 @@
+"""
+Background worker for the task queue.
+
+    python worker.py                 # one worker process
+    python worker.py --processes 4   # four worker processes
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from config import Config
+
+MAINTENANCE_SECONDS = 60
+
+
+def run_worker():
+    import archive
+    import cache
+    import careers
+    import matching
+    import network
+    import tasks
+    from database import db
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logging.info("Worker %s started", worker_id)
+    last_maintenance = 0.0
+    last_network = 0.0
+    last_careers = 0.0
+    last_archive = 0.0
+    graph = None
+    while not stopping:
+        try:
+            if time.monotonic() - last_maintenance > MAINTENANCE_SECONDS:
+                tasks.reclaim_expired()
+                tasks.purge_done()
+                cache.purge_log()
+                matching.assign_pending()
+                db.commit()
+                last_maintenance = time.monotonic()
+            if time.monotonic() - last_network > Config.NETWORK_REFRESH_SECONDS:
+                graph = network.refresh_suggestions(graph)
+                last_network = time.monotonic()
+            if time.monotonic() - last_careers > Config.CAREER_REFRESH_SECONDS:
+                careers.refresh_transitions()
+                last_careers = time.monotonic()
+            if time.monotonic() - last_archive > Config.ARCHIVE_INTERVAL_SECONDS:
+                archive.run()
+                last_archive = time.monotonic()
+            if tasks.run_once(worker_id) == 0:
+                time.sleep(Config.TASK_POLL_SECONDS)
+        except Exception:
+            logging.exception("Worker loop error")
+            time.sleep(Config.TASK_POLL_SECONDS)
+    logging.info("Worker %s stopped", worker_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background task workers")
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    if args.processes <= 1:
+        run_worker()
+        return
+    procs = [multiprocessing.Process(target=run_worker, name=f"worker-{i}") for i in range(args.processes)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
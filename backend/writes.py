@@ -0,0 +1,44 @@
+"""Single-round-trip inserts for the create endpoints.
+
+`insert` sends one INSERT and lets the schema do the checking: a unique key
+rejects duplicates and a foreign key rejects a missing parent, so there is no
+SELECT before the write. The response is built from the values sent plus the
+new id; columns the response shows that the server would otherwise default
+(status, created_at) are sent explicitly, so there is no SELECT after it
+either. The caller commits, once, after any related writes.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+import mysql.connector
+from fastapi import HTTPException
+
+from database import cursor, db
+
+DUPLICATE_KEY = 1062
+NO_REFERENCED_ROW = 1452
+
+
+def now() -> datetime:
+    """The created_at to send: whole seconds, as TIMESTAMP stores them. Naive UTC, which is what
+    CURRENT_TIMESTAMP gives in our sessions (database.SESSION_TIME_ZONE), so explicit and defaulted
+    values order and compare alike."""
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def insert(table: str, values: dict, duplicate: Optional[str] = None, missing: Optional[str] = None) -> dict:
+    """INSERT one row; returns `values` with its new id. A unique-key clash is a 400 with `duplicate`,
+    a missing foreign-key parent a 404 with `missing`; either way the transaction is rolled back."""
+    try:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(values)}) VALUES ({', '.join(['%s'] * len(values))})",
+            list(values.values()),
+        )
+    except mysql.connector.IntegrityError as e:
+        db.rollback()
+        if e.errno == DUPLICATE_KEY and duplicate:
+            raise HTTPException(status_code=400, detail=duplicate)
+        if e.errno == NO_REFERENCED_ROW and missing:
+            raise HTTPException(status_code=404, detail=missing)
+        raise
+    return dict(values, id=cursor.lastrowid)
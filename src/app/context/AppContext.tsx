@@ -74,7 +74,7 @@ export interface MentorshipRequest {
   mentorName: string;
   domain: string;
   message: string;
-  status: 'pending' | 'accepted' | 'rejected';
+  status: 'pending' | 'accepted' | 'rejected' | 'completed';
   requestDate: string;
 }
 
@@ -126,7 +126,7 @@ interface AppContextType {
   registerForEvent: (eventId: string) => void;
   mentorshipRequests: MentorshipRequest[];
   addMentorshipRequest: (request: Omit<MentorshipRequest, 'id' | 'requestDate'>) => void;
-  updateMentorshipStatus: (id: string, status: 'accepted' | 'rejected') => void;
+  updateMentorshipStatus: (id: string, status: 'accepted' | 'rejected' | 'completed') => void;
   applications: Application[];
   applyForJob: (application: Omit<Application, 'id' | 'appliedDate'>) => void;
   updateApplicationStatus: (id: string, status: Application['status']) => void;
@@ -575,7 +575,7 @@ export function AppProvider({ children }: { children: ReactNode }) {
     setMentorshipRequests([newRequest, ...mentorshipRequests]);
   };
 
-  const updateMentorshipStatus = (id: string, status: 'accepted' | 'rejected') => {
+  const updateMentorshipStatus = (id: string, status: 'accepted' | 'rejected' | 'completed') => {
     setMentorshipRequests(mentorshipRequests.map(req => 
       req.id === id ? { ...req, status } : req
     ));